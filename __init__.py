@@ -1,3 +1,124 @@
-from .decline_calculators import *
-from .helper_functions import *
-from .case import *
\ No newline at end of file
+import importlib
+import sys
+import types
+
+# The package loads lazily - importing pumper runs no submodule. Each public name
+# below is imported from its submodule on first access, so the decline
+# calculators and helpers load with NumPy only, and pandas is not imported until
+# something that needs it (case, portfolio, pricing...) is first used:
+#
+#   from pumper import calc_hyperbolic_rates    loads decline_calculators only
+#   pumper.case(...)                            loads case, and pandas with it
+#
+# EXPORTS lists every public name by the submodule that provides it, in the
+# order the package used to star-import them. Add new public names here
+
+EXPORTS = {
+    'decline_calculators': (
+        'CUM_FUNCTIONS', 'FIT_BOUNDS', 'LOSS_FUNCTIONS', 'SHUT_IN', 'TIME_TO_RATE_FUNCTIONS', 'as_key',
+        'broadcast_parameters', 'calc_batch_forecast', 'calc_cum', 'calc_eur', 'calc_exponential_batch',
+        'calc_exponential_cum', 'calc_exponential_forecast', 'calc_exponential_rates',
+        'calc_exponential_time_to_rate', 'calc_exponential_volumes', 'calc_flat_batch', 'calc_flat_cum',
+        'calc_flat_forecast', 'calc_flat_rates', 'calc_flat_time_to_rate', 'calc_flat_volumes', 'calc_harmonic_batch',
+        'calc_harmonic_cum', 'calc_harmonic_forecast', 'calc_harmonic_rates', 'calc_harmonic_time_to_rate',
+        'calc_harmonic_volumes', 'calc_hyperbolic_batch', 'calc_hyperbolic_cum', 'calc_hyperbolic_forecast',
+        'calc_hyperbolic_rates', 'calc_hyperbolic_time_to_rate', 'calc_hyperbolic_volumes',
+        'calc_mod_hyperbolic_batch', 'calc_mod_hyperbolic_cum', 'calc_mod_hyperbolic_forecast',
+        'calc_mod_hyperbolic_rates', 'calc_mod_hyperbolic_time_to_rate', 'calc_mod_hyperbolic_volumes',
+        'calc_terminal_switch', 'calc_time_to_rate', 'evaluate_segment', 'exponential_cum', 'find_outliers',
+        'fit_decline_batch', 'fit_to_forecasts', 'forecast_chain', 'forecast_segment', 'harmonic_cum',
+        'hyperbolic_cum', 'hyperbolic_rates', 'initial_parameters', 'levenberg_marquardt', 'log_rate_model',
+        'stack_forecast'
+    ),
+    'helper_functions': (
+        'add_instrumentation_hook', 'calc_q_switch', 'calc_t_switch', 'collect_instrumentation', 'count_event',
+        'disable_instrumentation', 'enable_instrumentation', 'frozen_settings', 'get_setting', 'instrumentation_enabled',
+        'instrumentation_options', 'instrumentation_report', 'instrumented', 'load_settings', 'merge_instrumentation',
+        'nominal_to_secant', 'override_settings', 'parse_declines', 'read_default_pricing', 'read_settings',
+        'record_stage', 'reload_settings', 'remove_instrumentation_hook', 'reset_instrumentation',
+        'secant_to_nominal', 'slice_time_vector', 'terminal_switch', 'vector_to_endpoints'
+    ),
+    'economics': (
+        'BREAKEVEN_BOUNDS', 'BREAKEVEN_VARIABLES', 'ECONOMIC_LIMIT_COLUMNS', 'SENSITIVITY_COLUMNS', 'bisect_breakeven',
+        'breakeven_columns', 'breakeven_factors', 'calc_breakevens', 'calc_cash_flow_metrics', 'calc_dcf_roi', 'calc_discount_factors',
+        'calc_discount_times', 'calc_economic_limit', 'calc_irr', 'calc_npv_profile', 'calc_payout',
+        'calc_payout_month', 'calc_sensitivities', 'economic_limit_weights', 'evaluate_sensitivities', 'metric_columns',
+        'pv_label', 'reversion_interests', 'solve_breakeven', 'solve_breakeven_exact'
+    ),
+    'pricing': (
+        'DECK_KEYWORDS', 'DURATION_UNITS', 'PRICE_COLUMNS', 'build_segments', 'default_price_deck', 'escalated_deck',
+        'extend_vector', 'flat_deck', 'is_row_index', 'load_price_decks', 'parse_price_text', 'parse_segment',
+        'price_deck', 'price_segment', 'read_price_decks', 'read_price_table'
+    ),
+    'costs': (
+        'COST_CATEGORIES', 'ESCALATION_STEPS', 'TABLE_COLUMNS', 'as_cost_schedule', 'calc_escalation_factors',
+        'cost_schedule', 'escalation_factors', 'linear_costs', 'load_cost_tables', 'read_cost_table', 'read_cost_tables',
+        'stepped_costs'
+    ),
+    'schedule': (
+        'FFT_THRESHOLD', 'convolve', 'rig_schedule', 'schedule_capex', 'schedule_forecast', 'schedule_from_locations',
+        'schedule_timeseries', 'type_curve'
+    ),
+    'time_grids': (
+        'COLUMN_AGGREGATION', 'GRID_MODES', 'calc_month_edges', 'calc_month_lengths', 'column_aggregation',
+        'resample_columns', 'resample_rates', 'resample_volumes', 'time_grid'
+    ),
+    'case': (
+        'COLUMN_INDEX', 'CUMULATIVE_COLUMNS', 'DERIVED_COLUMNS', 'DOWNSTREAM_COLUMNS', 'ONELINE_COLUMNS',
+        'ONELINE_SUM_COLUMNS', 'PARTIAL_MONTH_COLUMNS', 'RATE_COLUMNS', 'RATE_INDEX', 'SCENARIO_SCALES',
+        'TIMESERIES_COLUMNS', 'array_window', 'breakeven_inputs', 'build_downstream', 'calc_derived_columns',
+        'calc_oneline_values', 'calc_reversion', 'case', 'column_window', 'oneline_columns', 'resolve_price_deck',
+        'select_scenario'
+    ),
+    'checkpoints': (
+        'CHECKPOINT_VERSION', 'case_key', 'checkpoint_store', 'default_deck_hash', 'file_hash', 'update_hash',
+        'workflow_files'
+    ),
+    'portfolio': (
+        'AGGREGATE_WEIGHTS', 'METRIC_INPUT_COLUMNS', 'STREAM_BLOCK_BYTES', 'TIME_COLUMNS', 'accumulate_aggregate',
+        'aggregate_timeseries', 'attach_block', 'evaluate_chunk', 'finish_aggregate', 'first_time_values', 'init_worker',
+        'portfolio', 'run_chunk'
+    ),
+    'results_cube': (
+        'CUBE_AXES', 'CUBE_BLOCK_BYTES', 'create_cube', 'open_cube', 'results_cube'
+    ),
+    'rollups': (
+        'METRIC_ITEMS', 'PEAK_ITEMS', 'TOTAL_LEVEL', 'rollup', 'segment_sum'
+    ),
+    'stochastic': (
+        'DISTRIBUTIONS', 'MODEL_DEFAULTS', 'PARAMETER_BOUNDS', 'RESULT_COLUMNS', 'evaluate_model',
+        'evaluate_realizations', 'is_distribution', 'monte_carlo', 'sample_parameter', 'samples_at', 'summarize'
+    ),
+    'writers': (
+        'EXTENSIONS', 'open_results', 'results_writer'
+    )
+}
+
+EXPORT_MODULES = {name: module for module, names in EXPORTS.items() for name in names}
+
+__all__ = sorted(EXPORT_MODULES)
+
+def __getattr__(name):
+
+    if name not in EXPORT_MODULES:
+        raise AttributeError("module '" + __name__ + "' has no attribute '" + name + "'")
+    value = getattr(importlib.import_module('.' + EXPORT_MODULES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+
+    return sorted(set(globals()) | set(__all__))
+
+class lazy_package(types.ModuleType):
+    # Importing a submodule binds it as an attribute of the package. Where the
+    # submodule shares its name with one of its exports (case, portfolio), the
+    # export is bound instead, as the star imports used to
+
+    def __setattr__(self, name, value):
+
+        if isinstance(value, types.ModuleType) and EXPORT_MODULES.get(name) == name and value.__name__ == __name__ + '.' + name:
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+sys.modules[__name__].__class__ = lazy_package
\ No newline at end of file
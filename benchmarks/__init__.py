@@ -0,0 +1,14 @@
+from .synthetic import *
+from .suite import *
+
+# Benchmarks measures the decline calculators, the single-case economics chain and
+# portfolio runs on synthetic wells, and compares them to stored baselines
+#
+#   USAGE:
+#       python -m pumper.benchmarks                 run everything, compare to baselines
+#       python -m pumper.benchmarks --quick         skip the 10k well portfolio runs
+#       python -m pumper.benchmarks --match case/   only benchmarks whose key contains 'case/'
+#       python -m pumper.benchmarks --save          store the results as the new baselines
+#
+#   Baselines are machine specific - regenerate them with --save on the machine
+#   used to check for regressions
\ No newline at end of file
@@ -0,0 +1,29 @@
+import argparse
+import sys
+from . import suite
+
+# Command line entry point, see benchmarks/__init__.py
+
+def main(arguments = None):
+
+    parser = argparse.ArgumentParser(prog = 'python -m pumper.benchmarks', description = 'Run the pumper benchmark suite')
+    parser.add_argument('--quick', action = 'store_true', help = 'skip the 10k well portfolio runs')
+    parser.add_argument('--match', default = None, help = 'only run benchmarks whose key contains this text')
+    parser.add_argument('--repeat', type = int, default = 5, help = 'timed runs per benchmark')
+    parser.add_argument('--save', action = 'store_true', help = 'store the results as the new baselines')
+    parser.add_argument('--baselines', default = suite.BASELINE_PATH, help = 'baseline file')
+    parser.add_argument('--tolerance', type = float, default = 0.25, help = 'allowed relative slowdown before a regression is reported')
+    options = parser.parse_args(arguments)
+
+    results = suite.run_benchmarks(options.match, options.repeat, options.quick)
+    if options.save:
+        suite.save_baselines(results, options.baselines)
+        return 0
+
+    regressions = suite.compare_to_baselines(results, suite.load_baselines(options.baselines), options.tolerance)
+    for key, measure, baseline, result in regressions:
+        print('REGRESSION ' + key + ' ' + measure + ': ' + format(baseline, '.6g') + ' -> ' + format(result, '.6g'))
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
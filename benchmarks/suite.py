@@ -0,0 +1,280 @@
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+import numpy as np
+from .. import decline_calculators as dca
+from .. import helper_functions as helpers
+from ..case import case
+from ..portfolio import portfolio
+from . import synthetic
+
+# suite.py defines the benchmarks and measures them
+#
+# Each benchmark has an untimed setup, a timed run and an optional teardown. It
+# is measured in two passes:
+#
+#   timing                      run repeat times, best and median wall time kept
+#   memory                      run once more under tracemalloc - peak memory
+#                               allocated during the run and the number of memory
+#                               blocks it allocated and left alive
+#
+# tracemalloc only sees the calling process, so portfolio memory figures leave
+# out the pool workers and the shared memory blocks
+#
+# Results are compared to stored baselines (baselines.json next to this file) by
+# benchmark key "name|wells|months". A benchmark regresses when its best time or
+# peak memory exceeds the baseline by more than the tolerance
+
+MONTHS = [60, 600]
+PORTFOLIO_WELLS = [1, 100, 10000]
+BATCH_WELLS = 10000
+
+# Portfolio runs keep only these columns so a 10k well, 600 month run fits in memory
+PORTFOLIO_COLUMNS = ['days_start', 'days_end', 'oil_volume', 'gas_volume', 'net_revenue', 'net_capex', 'net_cash_flow', 'net_pv10']
+
+SINGLE_FORECASTS = {
+    'exponential':          dca.calc_exponential_forecast,
+    'harmonic':             dca.calc_harmonic_forecast,
+    'hyperbolic':           dca.calc_hyperbolic_forecast,
+    'modified hyperbolic':  dca.calc_mod_hyperbolic_forecast,
+    'flat':                 dca.calc_flat_forecast
+}
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baselines.json')
+
+class benchmark:
+
+    def __init__(self, name, wells, months, run, setup = None, teardown = None, repeat = None):
+        # INPUTS:
+        #   name                    Benchmark name
+        #   wells, months           Problem size, for throughput and the baseline key
+        #   run                     Timed function of the setup state
+        #   setup                   Untimed function returning the state, default None
+        #   teardown                Untimed function of the state, run after each run
+        #   repeat                  Upper limit on timing repeats, for slow benchmarks
+
+        self.name = name
+        self.wells = wells
+        self.months = months
+        self.run = run
+        self.setup = setup or (lambda: None)
+        self.teardown = teardown or (lambda state: None)
+        self.repeat = repeat
+
+    @property
+    def key(self):
+
+        return self.name + '|' + str(self.wells) + '|' + str(self.months)
+
+    def measure(self, repeat = 5):
+        # Times the benchmark, then measures its memory
+        # INPUTS:
+        #   repeat                  Timed runs, capped by the benchmark's own repeat
+        # OUTPUTS:
+        #   result                  Dictionary of measurements
+
+        repeat = max(1, repeat if self.repeat is None else min(repeat, self.repeat))
+        times = []
+        for _ in range(repeat):
+            state = self.setup()
+            start = time.perf_counter()
+            self.run(state)
+            times.append(time.perf_counter() - start)
+            self.teardown(state)
+
+        state = self.setup()
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        baseline_memory = tracemalloc.get_traced_memory()[0]
+        self.run(state)
+        peak = tracemalloc.get_traced_memory()[1] - baseline_memory
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        retained = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, 'lineno'))
+        self.teardown(state)
+
+        best = min(times)
+        return {
+            'name':                     self.name,
+            'wells':                    self.wells,
+            'months':                   self.months,
+            'repeat':                   repeat,
+            'best_seconds':             best,
+            'median_seconds':           float(np.median(times)),
+            'well_months_per_second':   self.wells * self.months / best if best > 0 else float('inf'),
+            'peak_kib':                 peak / 1024,
+            'retained_blocks':          retained
+        }
+
+def build_benchmarks(quick = False):
+    # Builds the benchmark list
+    # INPUTS:
+    #   quick                   Leave out the 10k well portfolio runs
+    # OUTPUTS:
+    #   benchmarks              List of benchmark objects
+
+    benchmarks = []
+    for months in MONTHS:
+        benchmarks += decline_benchmarks(months)
+        benchmarks += case_benchmarks(months)
+        for wells in PORTFOLIO_WELLS:
+            if quick and wells > 100:
+                continue
+            benchmarks.append(portfolio_benchmark(wells, months))
+    return benchmarks
+
+def decline_benchmarks(months):
+    # Single-well calc_(declinetype)_forecast and the batch calculators
+
+    time_vector = synthetic.synthetic_time_vector(months)
+    parameters = synthetic.synthetic_parameters(BATCH_WELLS)
+    benchmarks = []
+    for forecast_type, function in SINGLE_FORECASTS.items():
+        kwargs = synthetic.synthetic_forecast_kwargs(parameters, 0, forecast_type)
+        benchmarks.append(benchmark(
+            'forecast/' + forecast_type, 1, months,
+            run = lambda state, function = function, kwargs = kwargs: function(time_vector, **kwargs)
+        ))
+
+        decline_type = 'exponential' if forecast_type == 'flat' else forecast_type
+        b = np.ones(BATCH_WELLS) if forecast_type == 'harmonic' else parameters['b']
+        Di, Dt = helpers.parse_declines(parameters['De'], parameters['Dte'], b, decline_type)
+        kwargs = {'qi': parameters['qi'], 'Di': Di, 'b': b, 'Dt': Dt}
+        benchmarks.append(benchmark(
+            'batch_forecast/' + forecast_type, BATCH_WELLS, months,
+            run = lambda state, forecast_type = forecast_type, kwargs = kwargs: dca.calc_batch_forecast(time_vector, forecast_type, **kwargs)
+        ))
+    return benchmarks
+
+def case_benchmarks(months):
+    # generate_timeseries, the economics chain and a full single-case run
+
+    workflow = next(iter(synthetic.synthetic_workflows(1, months).values()))
+    tax = workflow['tax']
+
+    def prepared_case():
+        # Case with forecast, ownership, pricing, opex and capex - everything the
+        # economics chain starts from
+        evaluated = case(forecast_duration = months)
+        for forecast in workflow['forecasts']:
+            evaluated.generate_forecast(**forecast)
+        for ratio in workflow['ratios']:
+            evaluated.ratio_forecast(**ratio)
+        evaluated.shrink(1)
+        for ownership in workflow['ownership']:
+            evaluated.assign_ownership(**ownership)
+        evaluated.flat_pricing(**workflow['pricing'])
+        for opex in workflow['fixed_opex']:
+            evaluated.assign_fixed_opex(**opex)
+        for capex in workflow['capex']:
+            evaluated.assign_capex(**capex)
+        return evaluated
+
+    def economics_chain(evaluated):
+        evaluated.calc_sales_revenue()
+        evaluated.assign_tax(**tax)
+        evaluated.calc_cash_flow()
+        evaluated.impose_end_of_life()
+        evaluated.generate_oneline('well_0')
+
+    return [
+        benchmark('case/generate_timeseries', 1, months,
+                  setup = lambda: case(forecast_duration = months), run = lambda evaluated: evaluated.generate_timeseries()),
+        benchmark('case/economics_chain', 1, months, setup = prepared_case, run = economics_chain),
+        benchmark('case/fullrun', 1, months, run = lambda state: case(forecast_duration = months).fullrun(workflow))
+    ]
+
+def portfolio_benchmark(wells, months):
+    # Full portfolio run, pool size from os.cpu_count()
+
+    workflows = synthetic.synthetic_workflows(wells, months)
+
+    def setup():
+        evaluated = portfolio(forecast_duration = months)
+        evaluated.add_cases(workflows)
+        return evaluated
+
+    return benchmark(
+        'portfolio/run', wells, months, setup = setup,
+        run = lambda evaluated: evaluated.run(processes = 1 if wells == 1 else None, columns = PORTFOLIO_COLUMNS),
+        teardown = lambda evaluated: evaluated.close(),
+        repeat = 1 if wells * months > 1e6 else None
+    )
+
+def run_benchmarks(match = None, repeat = 5, quick = False, report = print):
+    # Measures every benchmark whose key contains match
+    # INPUTS:
+    #   match                   Substring filter on benchmark keys, default all
+    #   repeat                  Timed runs per benchmark
+    #   quick                   Leave out the 10k well portfolio runs
+    #   report                  Called with each result line as it finishes, None for silence
+    # OUTPUTS:
+    #   results                 Dictionary of {benchmark key: result}
+
+    results = {}
+    for bench in build_benchmarks(quick):
+        if match is not None and match not in bench.key:
+            continue
+        results[bench.key] = bench.measure(repeat)
+        if report is not None:
+            report(format_result(results[bench.key]))
+    return results
+
+def format_result(result):
+
+    return '{:<36}{:>7}{:>5}  best {:>10.3f} ms  median {:>10.3f} ms  {:>12.4g} well-months/s  peak {:>10.1f} KiB  retained {:>7}'.format(
+        result['name'], result['wells'], result['months'], result['best_seconds'] * 1e3, result['median_seconds'] * 1e3,
+        result['well_months_per_second'], result['peak_kib'], result['retained_blocks']
+    )
+
+def machine_info():
+
+    return {
+        'platform':     platform.platform(),
+        'processor':    platform.processor(),
+        'cpu_count':    os.cpu_count(),
+        'python':       platform.python_version(),
+        'numpy':        np.__version__
+    }
+
+def save_baselines(results, path = BASELINE_PATH):
+    # Stores results as the new baselines, keeping baselines of benchmarks not in results
+
+    baselines = load_baselines(path)
+    baselines['machine'] = machine_info()
+    baselines.setdefault('benchmarks', {}).update(results)
+    with open(path, 'w') as file:
+        json.dump(baselines, file, indent = 2, sort_keys = True)
+
+def load_baselines(path = BASELINE_PATH):
+
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+def compare_to_baselines(results, baselines, tolerance = 0.25, memory_slack_kib = 64):
+    # Finds benchmarks that got slower or use more memory than their baseline
+    # INPUTS:
+    #   results                 Dictionary from run_benchmarks
+    #   baselines               Dictionary from load_baselines
+    #   tolerance               Allowed relative increase in best time and peak memory
+    #   memory_slack_kib        Allowed absolute increase in peak memory
+    # OUTPUTS:
+    #   regressions             List of (benchmark key, measure, baseline, result)
+
+    regressions = []
+    stored = baselines.get('benchmarks', {})
+    for key, result in results.items():
+        if key not in stored:
+            continue
+        if result['best_seconds'] > stored[key]['best_seconds'] * (1 + tolerance):
+            regressions.append((key, 'best_seconds', stored[key]['best_seconds'], result['best_seconds']))
+        if result['peak_kib'] > stored[key]['peak_kib'] * (1 + tolerance) + memory_slack_kib:
+            regressions.append((key, 'peak_kib', stored[key]['peak_kib'], result['peak_kib']))
+    return regressions
\ No newline at end of file
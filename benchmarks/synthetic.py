@@ -0,0 +1,100 @@
+import numpy as np
+from .. import decline_calculators as dca
+from .. import helper_functions as helpers
+
+# synthetic.py generates reproducible synthetic wells for benchmarking
+#
+# Every generator takes a seed, so the same call always returns the same wells.
+# Parameter ranges are typical of unconventional oil wells. Fixed opex is set per
+# well so that the well reaches its economic limit at a chosen fraction of the
+# forecast duration - every case has a real end of life to find, whatever the
+# number of months
+
+PARAMETER_RANGES = {
+    'qi':               (200.0, 2000.0),
+    'De':               (0.5, 0.85),
+    'b':                (0.6, 1.5),
+    'Dte':              (0.05, 0.10),
+    'gas_ratio':        (1.0, 4.0),
+    'working_int':      (0.5, 1.0),
+    'nri_fraction':     (0.75, 0.85),
+    'capex':            (4e6, 9e6),
+    'life_fraction':    (0.5, 0.9)
+}
+
+PRICING = {
+    'oil_price':        70.0,
+    'oil_diff':         -3.0,
+    'gas_price':        3.0,
+    'gas_diff':         -0.5,
+    'ngl_diff':         0.3
+}
+
+def synthetic_parameters(wells, seed = 0):
+    # Draws decline and ownership parameters for a number of wells
+    # INPUTS:
+    #   wells                   Number of wells
+    #   seed                    Random seed
+    # OUTPUTS:
+    #   parameters              Dictionary of {PARAMETER_RANGES key: vector of size wells}
+
+    rng = np.random.default_rng(seed)
+    return {name: rng.uniform(low, high, wells) for name, (low, high) in PARAMETER_RANGES.items()}
+
+def synthetic_time_vector(months):
+    # Instantaneous time vector (days) for a forecast of months months
+
+    return np.linspace(0, months, months + 1) * helpers.read_settings()['days_in_month']
+
+def synthetic_forecast_kwargs(parameters, well, forecast_type = 'modified hyperbolic'):
+    # Nominal decline kwargs of one synthetic well, as taken by calc_(declinetype)_forecast
+
+    b = 1.0 if forecast_type == 'harmonic' else parameters['b'][well]
+    decline_type = 'hyperbolic' if forecast_type in ('flat', 'harmonic') else forecast_type
+    Di, Dt = helpers.parse_declines(parameters['De'][well], parameters['Dte'][well], b, decline_type)
+    return {'qi': parameters['qi'][well], 'Di': Di, 'b': b, 'Dt': Dt}
+
+def synthetic_workflows(wells, months = None, seed = 0):
+    # Builds case workflows (see case.fullrun) for a number of synthetic wells
+    # INPUTS:
+    #   wells                   Number of wells
+    #   months                  Forecast duration the wells are tuned to, default settings
+    #   seed                    Random seed
+    # OUTPUTS:
+    #   workflows               Dictionary of {well name: workflow}
+
+    settings = helpers.read_settings()
+    months = settings['forecast_duration'] if months is None else months
+    parameters = synthetic_parameters(wells, seed)
+
+    # Fixed opex equal to the net oil and gas revenue of the month the well should die in
+    Di, Dt = helpers.parse_declines(parameters['De'], parameters['Dte'], parameters['b'], 'modified hyperbolic')
+    volumes = dca.calc_mod_hyperbolic_batch(synthetic_time_vector(months), parameters['qi'], Di, parameters['b'], Dt)[..., 2]
+    last_month = (parameters['life_fraction'] * months).astype(int)
+    oil = volumes[np.arange(wells), last_month]
+    revenue = oil * (PRICING['oil_price'] + PRICING['oil_diff'])
+    revenue += oil * parameters['gas_ratio'] * (PRICING['gas_price'] + PRICING['gas_diff'])
+    opex = revenue * parameters['nri_fraction'] / parameters['working_int']
+
+    workflows = {}
+    for well in range(wells):
+        workflows['well_' + str(well)] = {
+            'forecasts':        [{
+                'phase':            'oil',
+                'forecast_type':    'modified hyperbolic',
+                'qi':               float(parameters['qi'][well]),
+                'De':               float(parameters['De'][well]),
+                'b':                float(parameters['b'][well]),
+                'Dte':              float(parameters['Dte'][well])
+            }],
+            'ratios':           [{'ratio_phase': 'gas', 'base_phase': 'oil', 'ratio': float(parameters['gas_ratio'][well])}],
+            'ownership':        [{
+                'working_int':      float(parameters['working_int'][well]),
+                'rev_int':          float(parameters['working_int'][well] * parameters['nri_fraction'][well])
+            }],
+            'pricing':          dict(PRICING),
+            'fixed_opex':       [{'input': float(opex[well]), 'input_type': 'flat'}],
+            'capex':            [{'amount': float(parameters['capex'][well])}],
+            'tax':              {'ad_val_rate': 0.02, 'sev_rate': 0.046}
+        }
+    return workflows
\ No newline at end of file
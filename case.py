@@ -2,80 +2,550 @@ import pandas as pd
 import numpy as np
 from . import decline_calculators as dca
 from . import helper_functions as helpers
+from . import economics as econ
+from . import pricing as price_decks
+from . import costs
+from . import schedule as schedules
+from . import time_grids
+
+# Timeseries values are stored in one float64 array of shape [months, columns]
+# ("case.data"), in column-major order so every column is a contiguous vector.
+# COLUMN_INDEX maps each column name to its offset in that array. The pandas
+# DataFrame form ("case.timeseries") is only built on request, for export
+
+TIMESERIES_COLUMNS = [
+    'month', 'days_start', 'days_end', 'working_int', 'rev_int', 'entry_gas_rate', 'exit_gas_rate', 'gas_volume', 'entry_oil_rate',
+    'exit_oil_rate', 'oil_volume', 'entry_ngl_rate', 'exit_ngl_rate', 'ngl_volume', 'entry_water_rate', 'exit_water_rate', 'water_volume', 'shrink',
+    'oil_price', 'gas_price', 'oil_diff', 'gas_diff', 'ngl_diff', 'oil_price_real', 'gas_price_real', 'ngl_price_real', 'gross_oil_revenue',
+    'gross_gas_revenue', 'gross_ngl_revenue', 'gross_revenue', 'net_oil_volume', 'net_gas_volume', 'net_ngl_volume', 'net_water_volume', 'net_oil_revenue',
+    'net_gas_revenue', 'net_ngl_revenue', 'net_revenue', 'gross_capex', 'net_capex', 'gross_fixed_opex', 'gross_oil_opex', 'gross_gas_opex',
+    'gross_ngl_opex', 'gross_water_opex', 'net_fixed_opex', 'net_oil_opex', 'net_gas_opex', 'net_ngl_opex', 'net_water_opex', 'net_variable_opex',
+    'net_opex', 'gross_overhead', 'net_overhead', 'sev_tax', 'ad_val_tax', 'net_tax', 'operating_profit', 'net_income', 'net_cash_flow', 
+    'cum_cash_flow', 'net_pv10', 'cum_pv10'
+]
+
+COLUMN_INDEX = {column: offset for offset, column in enumerate(TIMESERIES_COLUMNS)}
+
+# Oneline items that are straight sums of the timeseries column of the same name
+ONELINE_SUM_COLUMNS = [
+    'gross_oil_revenue', 'gross_gas_revenue', 'gross_ngl_revenue', 'gross_revenue', 'net_oil_volume', 'net_gas_volume',
+    'net_ngl_volume', 'net_water_volume', 'net_oil_revenue', 'net_gas_revenue', 'net_ngl_revenue', 'net_revenue',
+    'gross_fixed_opex', 'gross_oil_opex', 'gross_gas_opex', 'gross_ngl_opex', 'gross_water_opex', 'net_fixed_opex',
+    'net_oil_opex', 'net_gas_opex', 'net_ngl_opex', 'net_water_opex', 'net_variable_opex', 'net_opex', 'gross_overhead',
+    'net_overhead', 'sev_tax', 'ad_val_tax', 'net_tax', 'operating_profit', 'net_income', 'net_cash_flow', 'net_pv10'
+]
+
+# Every oneline item, in the order calc_oneline_data reports them
+ONELINE_COLUMNS = [
+    'working_int', 'rev_int', 'gross_capex', 'net_capex', 'peak_oil_rate', 'peak_gas_rate', 'peak_ngl_rate', 'peak_water_rate',
+    'gross_oil', 'gross_gas', 'gross_ngl', 'gross_water'
+] + ONELINE_SUM_COLUMNS
+
+def oneline_columns(settings = None):
+    # Every oneline item including the breakevens and cash flow metrics configured
+    # in settings (PV profile, IRR, payout, DCF ROI)
+
+    return ONELINE_COLUMNS + econ.breakeven_columns(settings) + econ.metric_columns(settings)
+
+# Per-month rates stored alongside the timeseries ("case.rates"). They are inputs
+# to the dependency graph below but are not exported with the timeseries
+RATE_COLUMNS = [
+    'sev_rate', 'ad_val_rate', 'ad_val_deductible_rate', 'oil_opex_rate', 'gas_opex_rate', 'ngl_opex_rate', 'water_opex_rate'
+]
+
+RATE_INDEX = {column: offset for offset, column in enumerate(RATE_COLUMNS)}
+
+# Dependency graph of derived timeseries columns, in calculation order
+# Each entry is column: (input columns, function of a column_window). Writing to an
+# input marks its downstream columns dirty for the affected months only, and dirty
+# columns are recalculated the next time results are read (case.recalculate)
+DERIVED_COLUMNS = {
+    'oil_price_real':       (('oil_price', 'oil_diff'),                 lambda v: v['oil_price'] + v['oil_diff']),
+    'gas_price_real':       (('gas_price', 'gas_diff'),                 lambda v: v['gas_price'] + v['gas_diff']),
+    'ngl_price_real':       (('oil_price', 'ngl_diff'),                 lambda v: v['oil_price'] * v['ngl_diff']),
+    'gross_oil_revenue':    (('oil_volume', 'oil_price_real'),          lambda v: v['oil_volume'] * v['oil_price_real']),
+    'gross_gas_revenue':    (('gas_volume', 'gas_price_real', 'shrink'),
+                                                                        lambda v: v['gas_volume'] * v['gas_price_real'] * v['shrink']),
+    'gross_ngl_revenue':    (('ngl_volume', 'ngl_price_real'),          lambda v: v['ngl_volume'] * v['ngl_price_real']),
+    'gross_revenue':        (('gross_oil_revenue', 'gross_gas_revenue', 'gross_ngl_revenue'),
+                                                                        lambda v: v['gross_oil_revenue'] + v['gross_gas_revenue'] + v['gross_ngl_revenue']),
+    'net_oil_revenue':      (('gross_oil_revenue', 'rev_int'),          lambda v: v['gross_oil_revenue'] * v['rev_int']),
+    'net_gas_revenue':      (('gross_gas_revenue', 'rev_int'),          lambda v: v['gross_gas_revenue'] * v['rev_int']),
+    'net_ngl_revenue':      (('gross_ngl_revenue', 'rev_int'),          lambda v: v['gross_ngl_revenue'] * v['rev_int']),
+    'net_revenue':          (('net_oil_revenue', 'net_gas_revenue', 'net_ngl_revenue'),
+                                                                        lambda v: v['net_oil_revenue'] + v['net_gas_revenue'] + v['net_ngl_revenue']),
+    'net_oil_volume':       (('oil_volume', 'rev_int'),                 lambda v: v['oil_volume'] * v['rev_int']),
+    'net_gas_volume':       (('gas_volume', 'rev_int', 'shrink'),       lambda v: v['gas_volume'] * v['rev_int'] * v['shrink']),
+    'net_ngl_volume':       (('ngl_volume', 'rev_int'),                 lambda v: v['ngl_volume'] * v['rev_int']),
+    'net_water_volume':     (('water_volume', 'rev_int'),               lambda v: v['water_volume'] * v['rev_int']),
+    'net_capex':            (('gross_capex', 'working_int'),            lambda v: v['gross_capex'] * v['working_int']),
+    'net_fixed_opex':       (('gross_fixed_opex', 'working_int'),       lambda v: v['gross_fixed_opex'] * v['working_int']),
+    'gross_oil_opex':       (('oil_opex_rate', 'oil_volume'),           lambda v: v['oil_opex_rate'] * v['oil_volume']),
+    'gross_gas_opex':       (('gas_opex_rate', 'gas_volume', 'shrink'), lambda v: v['gas_opex_rate'] * v['gas_volume'] * v['shrink']),
+    'gross_ngl_opex':       (('ngl_opex_rate', 'ngl_volume'),           lambda v: v['ngl_opex_rate'] * v['ngl_volume']),
+    'gross_water_opex':     (('water_opex_rate', 'water_volume'),       lambda v: v['water_opex_rate'] * v['water_volume']),
+    'net_oil_opex':         (('gross_oil_opex', 'working_int'),         lambda v: v['gross_oil_opex'] * v['working_int']),
+    'net_gas_opex':         (('gross_gas_opex', 'working_int'),         lambda v: v['gross_gas_opex'] * v['working_int']),
+    'net_ngl_opex':         (('gross_ngl_opex', 'working_int'),         lambda v: v['gross_ngl_opex'] * v['working_int']),
+    'net_water_opex':       (('gross_water_opex', 'working_int'),       lambda v: v['gross_water_opex'] * v['working_int']),
+    'net_variable_opex':    (('net_oil_opex', 'net_gas_opex', 'net_ngl_opex', 'net_water_opex'),
+                                                                        lambda v: v['net_oil_opex'] + v['net_gas_opex'] + v['net_ngl_opex'] + v['net_water_opex']),
+    'net_opex':             (('net_fixed_opex', 'net_variable_opex'),   lambda v: v['net_fixed_opex'] + v['net_variable_opex']),
+    'net_overhead':         (('rev_int', 'gross_overhead'),             lambda v: v['rev_int'] * v['gross_overhead']),
+    'sev_tax':              (('sev_rate', 'net_revenue'),               lambda v: v['sev_rate'] * v['net_revenue']),
+    'ad_val_tax':           (('ad_val_rate', 'ad_val_deductible_rate', 'net_revenue', 'sev_tax'),
+                                                                        lambda v: v['ad_val_deductible_rate'] * (v['net_revenue'] - v['sev_tax']) + v['ad_val_rate'] * v['net_revenue']),
+    'net_tax':              (('sev_tax', 'ad_val_tax'),                 lambda v: v['sev_tax'] + v['ad_val_tax']),
+    'operating_profit':     (('net_revenue', 'net_opex', 'net_tax'),    lambda v: v['net_revenue'] - v['net_opex'] - v['net_tax']),
+    'net_income':           (('operating_profit', 'net_overhead'),      lambda v: v['operating_profit'] - v['net_overhead']),
+    'net_cash_flow':        (('net_income', 'net_capex'),               lambda v: v['net_income'] - v['net_capex']),
+    'cum_cash_flow':        (('net_cash_flow',),                        lambda v: v.previous('cum_cash_flow') + np.cumsum(v['net_cash_flow'], axis = -1)),
+    'net_pv10':             (('net_cash_flow', 'days_start'),           lambda v: v['net_cash_flow'] / (1.1 ** (v['days_start'] / v.settings['days_in_year']))),
+    'cum_pv10':             (('net_pv10',),                             lambda v: v.previous('cum_pv10') + np.cumsum(v['net_pv10'], axis = -1))
+}
+
+# Monthly input flows scaled down in a partial economic limit month. Capex is
+# spent in full whatever day of the month the case ends
+PARTIAL_MONTH_COLUMNS = ['oil_volume', 'gas_volume', 'ngl_volume', 'water_volume', 'gross_fixed_opex', 'gross_overhead']
+
+# Running totals - a change in any month changes every later month
+CUMULATIVE_COLUMNS = {'cum_cash_flow', 'cum_pv10'}
+
+# Cost inputs each evaluate_scenarios multiplier scales
+SCENARIO_SCALES = {
+    'opex_scale':       ['gross_fixed_opex', 'oil_opex_rate', 'gas_opex_rate', 'ngl_opex_rate', 'water_opex_rate'],
+    'capex_scale':      ['gross_capex'],
+    'overhead_scale':   ['gross_overhead']
+}
+
+def build_downstream(derived_columns):
+    # Maps every column to the derived columns that depend on it, directly or
+    # indirectly, in calculation order. Each entry is (derived, to_end) where
+    # to_end is True if the dependency passes through a running total, so a
+    # change in one month dirties every later month
+
+    downstream = {}
+    for column in list(COLUMN_INDEX) + RATE_COLUMNS:
+        affected = {column: False}
+        for derived, (inputs, function) in derived_columns.items():
+            reached = [affected[name] for name in inputs if name in affected]
+            if reached:
+                affected[derived] = any(reached) or derived in CUMULATIVE_COLUMNS
+        downstream[column] = [(derived, affected[derived]) for derived in derived_columns if derived in affected]
+    return downstream
+
+DOWNSTREAM_COLUMNS = build_downstream(DERIVED_COLUMNS)
+
+class column_window:
+    # Row range of a case's columns, as read by DERIVED_COLUMNS functions
+
+    def __init__(self, case, rows):
+
+        self.case = case
+        self.rows = rows
+        self.settings = case.settings
+
+    def __getitem__(self, column):
+
+        return self.case.column(column)[self.rows]
+
+    def previous(self, column):
+        # Value of column in the month before the window, 0 at the first month
+
+        start = self.rows.start or 0
+        return self.case.column(column)[start - 1] if start > 0 else 0.0
+
+class array_window:
+    # Dictionary of input arrays, as read by DERIVED_COLUMNS functions
+    # Inputs that are not given are zero
+
+    def __init__(self, values, settings):
+
+        self.values = values
+        self.settings = settings
+
+    def __getitem__(self, column):
+
+        return self.values.get(column, 0.0)
+
+    def previous(self, column):
+
+        return 0.0
+
+def calc_derived_columns(inputs, settings = None, columns = None):
+    # Evaluates DERIVED_COLUMNS on arrays instead of a case, so many cases or
+    # realizations can be calculated in one pass. Inputs broadcast together, with
+    # months on the last axis, e.g. volumes [realizations, months] against
+    # prices [realizations, 1] and days_start [months]
+    # INPUTS:
+    #   inputs                  Dictionary of input column arrays, missing inputs are 0
+    #   settings                Settings object, defaults to read_settings()
+    #   columns                 Derived columns to return, default all
+    # OUTPUTS:
+    #   values                  Dictionary of inputs and derived column arrays
+
+    if settings is None:
+        settings = helpers.read_settings()
+    values = dict(inputs)
+    window = array_window(values, settings)
+    for derived, (_, function) in DERIVED_COLUMNS.items():
+        if derived not in inputs:
+            values[derived] = function(window)
+    if columns is not None:
+        values = {column: values[column] for column in columns}
+    return values
+
+def calc_reversion(inputs, reversions, settings = None):
+    # Applies payout reversions to many cases or realizations at once, on the
+    # same inputs as calc_derived_columns. See economics/reversion.py
+    # INPUTS:
+    #   inputs                  Dictionary of input column arrays, months on the last
+    #                           axis, holding the before-payout working_int and rev_int
+    #   reversions              List of assign_reversion kwargs (working_int, rev_int,
+    #                           multiple), values scalars or one per case, applied in order
+    #   settings                Settings object, defaults to read_settings()
+    # OUTPUTS:
+    #   values                  Dictionary of inputs and derived column arrays, after
+    #                           every reversion
+    #   payout                  List of payout month vectors, one per reversion
+
+    values = calc_derived_columns(inputs, settings)
+    payouts = []
+    for reversion in reversions:
+        payout = econ.calc_payout_month(values['net_income'], values['net_capex'], reversion.get('multiple', 1.0))
+        months = np.shape(values['net_income'])[-1]
+        inputs = dict(inputs)
+        for column in ['working_int', 'rev_int']:
+            inputs[column] = econ.reversion_interests(inputs.get(column, 0.0), reversion[column], payout, months)
+        values = calc_derived_columns(inputs, settings)
+        payouts.append(payout)
+    return values, payouts
+
+def breakeven_inputs(inputs, variable, x):
+    # Inputs with a breakeven variable set to x, as economics/breakeven.py defines
+    # it, one case per value of x
+    # INPUTS:
+    #   inputs                  Dictionary of input column arrays of one case, [months]
+    #   variable                One of econ.BREAKEVEN_VARIABLES
+    #   x                       Vector of values of the variable
+    # OUTPUTS:
+    #   inputs                  Dictionary of input column arrays, [len(x), months]
+    #                           where they depend on x
+
+    inputs = dict(inputs)
+    x = np.asarray(x, dtype = float)[:, None]
+    if variable in ('oil_price', 'gas_price'):
+        inputs[variable] = x
+    else:
+        for column in SCENARIO_SCALES[variable]:
+            inputs[column] = inputs[column] * x
+    return inputs
+
+def select_scenario(decks, scenario, source):
+    # Picks one scenario from a dictionary of price decks, default the first
+
+    if scenario is None:
+        return next(iter(decks.values()))
+    if scenario not in decks:
+        raise KeyError("no price scenario '" + str(scenario) + "' in " + str(source))
+    return decks[scenario]
+
+def resolve_price_deck(pricing, settings = None):
+    # Price deck for a workflow 'pricing' entry - 'default', a pricing.price_deck,
+    # {'file': path, 'scenario': name} or flat_pricing kwargs. settings sets the
+    # months text decks are built to, see pricing.read_price_decks
+
+    if isinstance(pricing, price_decks.price_deck):
+        return pricing
+    if isinstance(pricing, str) and pricing == 'default':
+        return price_decks.default_price_deck()
+    if 'file' in pricing:
+        return select_scenario(price_decks.read_price_decks(pricing['file'], settings), pricing.get('scenario'), pricing['file'])
+    return price_decks.flat_deck(**pricing)
+
+def calc_oneline_values(data, settings = None, metrics = True):
+    # Oneline items of many timeseries at once
+    # INPUTS:
+    #   data                    Array of shape [cases, months, len(TIMESERIES_COLUMNS)]
+    #   settings                Settings object, defaults to read_settings()
+    #   metrics                 Include PV profile/IRR/payout metrics, solved on the
+    #                           time grid of the first case
+    # OUTPUTS:
+    #   oneline_data            Dictionary of {item: vector of cases}, in oneline order
+
+    totals = data.sum(axis = 1)
+    maxima = data.max(axis = 1, initial = 0)
+
+    oneline_data = {
+        'working_int':          maxima[:, COLUMN_INDEX['working_int']],
+        'rev_int':              maxima[:, COLUMN_INDEX['rev_int']],
+        'gross_capex':          totals[:, COLUMN_INDEX['gross_capex']],
+        'net_capex':            totals[:, COLUMN_INDEX['net_capex']],
+        'peak_oil_rate':        maxima[:, COLUMN_INDEX['entry_oil_rate']],
+        'peak_gas_rate':        maxima[:, COLUMN_INDEX['entry_gas_rate']],
+        'peak_ngl_rate':        maxima[:, COLUMN_INDEX['entry_ngl_rate']],
+        'peak_water_rate':      maxima[:, COLUMN_INDEX['entry_water_rate']],
+        'gross_oil':            totals[:, COLUMN_INDEX['oil_volume']],
+        'gross_gas':            totals[:, COLUMN_INDEX['gas_volume']],
+        'gross_ngl':            totals[:, COLUMN_INDEX['ngl_volume']],
+        'gross_water':          totals[:, COLUMN_INDEX['water_volume']],
+    }
+
+    for column in ONELINE_SUM_COLUMNS:
+        oneline_data[column] = totals[:, COLUMN_INDEX[column]]
+
+    if metrics:
+        column = lambda name: data[:, :, COLUMN_INDEX[name]]
+        oneline_data.update(econ.calc_cash_flow_metrics(
+            column('net_cash_flow'), column('net_capex'), column('days_start')[0], column('days_end')[0],
+            helpers.read_settings() if settings is None else settings
+        ))
+    return oneline_data
 
 class case:
 
-    def __init__(self, run_on_init = False):
+    def __init__(self, run_on_init = False, workflow = None, **settings_overrides):
 
-        self.settings = helpers.read_settings()
+        # Settings are shared with every other case unless overridden here,
+        # e.g. case(effective_date = '2024-01', loss_function = 'BFIT')
+        self.settings = helpers.read_settings().replace(**settings_overrides)
         self.generate_timeseries()
-        if run_on_init:
-            #insert self.fullrun equivalent here
-            None
-
+        if run_on_init and workflow is not None:
+            self.fullrun(workflow)
+
+    @helpers.instrumented('case/fullrun')
+    def fullrun(self, workflow, name = None, zero = False, metrics = True):
+        # Runs the full case workflow from a dictionary of inputs, in order:
+        # forecast -> ownership -> pricing -> revenue -> opex -> capex -> tax
+        # -> reversions -> cash flow -> (scenarios, breakevens) -> end of life -> oneline
+        # INPUTS:
+        #   workflow                Dictionary of case inputs, every key optional:
+        #                           'forecasts'         list of generate_forecast kwargs
+        #                           'forecast_chains'   list of generate_forecast_chain kwargs
+        #                           'schedules'         list of add_schedule kwargs
+        #                           'ratios'            list of ratio_forecast kwargs
+        #                           'shrink'            gas shrink factor, default 1
+        #                           'ownership'         list of assign_ownership kwargs
+        #                           'pricing'           'default', a pricing.price_deck,
+        #                                               {'file': path, 'scenario': name}
+        #                                               or flat_pricing kwargs
+        #                           'fixed_opex'        list of assign_fixed_opex kwargs
+        #                           'variable_opex'     list of assign_variable_opex kwargs
+        #                           'overhead'          list of assign_overhead kwargs
+        #                           'capex'             list of assign_capex kwargs
+        #                           'escalation'        {cost category: escalate_costs
+        #                                               escalation, or its kwargs}
+        #                           'tax'               assign_tax kwargs
+        #                           'reversions'        list of assign_reversion kwargs
+        #                           'loss_function'     loss function for end of life
+        #                           'scenarios'         evaluate_scenarios scenarios
+        #   name                    Oneline index label, default workflow 'name'
+        #   zero                    Zero months after end of life instead of dropping them
+        #   metrics                 Include PV profile/IRR/payout metrics in the oneline
+        # OUTPUTS:
+        #   None - populates timeseries and oneline
+
+        for forecast in workflow.get('forecasts', []):
+            self.generate_forecast(**forecast)
+        for chain in workflow.get('forecast_chains', []):
+            self.generate_forecast_chain(**chain)
+        for schedule in workflow.get('schedules', []):
+            self.add_schedule(**schedule)
+        for ratio in workflow.get('ratios', []):
+            self.ratio_forecast(**ratio)
+        self.shrink(workflow.get('shrink', 1))
+
+        for ownership in workflow.get('ownership', []):
+            self.assign_ownership(**ownership)
+
+        pricing = workflow.get('pricing', 'default')
+        if isinstance(pricing, price_decks.price_deck):
+            self.apply_price_deck(pricing)
+        elif pricing == 'default':
+            self.import_default_pricing()
+        elif 'file' in pricing:
+            self.apply_price_deck(select_scenario(price_decks.read_price_decks(pricing['file'], self.settings), pricing.get('scenario'), pricing['file']))
+        else:
+            self.flat_pricing(**pricing)
+
+        self.calc_net_production()
+        self.calc_sales_revenue()
+
+        for opex in workflow.get('fixed_opex', []):
+            self.assign_fixed_opex(**opex)
+        for opex in workflow.get('variable_opex', []):
+            self.assign_variable_opex(**opex)
+        for overhead in workflow.get('overhead', []):
+            self.assign_overhead(**overhead)
+        for capex in workflow.get('capex', []):
+            self.assign_capex(**capex)
+        for category, escalation in workflow.get('escalation', {}).items():
+            self.escalate_costs(category, **(escalation if isinstance(escalation, dict) else {'escalation': escalation}))
+        if 'tax' in workflow:
+            self.assign_tax(**workflow['tax'])
+        for reversion in workflow.get('reversions', []):
+            self.assign_reversion(**reversion)
+
+        self.calc_cash_flow()
+        if 'loss_function' in workflow:
+            self.modify_loss_function(workflow['loss_function'])
+        if 'scenarios' in workflow:
+            self.evaluate_scenarios(workflow['scenarios'], metrics)
+        if self.settings['breakeven_variables']:
+            self.breakeven_data = self.calc_breakevens()
+        self.impose_end_of_life(zero = zero)
+        self.generate_oneline(workflow.get('name') if name is None else name, metrics)
+
+    @helpers.instrumented('case/timeseries')
     def generate_timeseries(self):
 
         self.effective_date         = pd.Period(self.settings['effective_date'], 'M')
         self.forecast_duration      = self.settings['forecast_duration']
-        timeseries_index            = pd.period_range(self.effective_date, self.effective_date + self.forecast_duration - 1)
 
-        timeseries_columns = [
-            'month', 'days_start', 'days_end', 'working_int', 'rev_int', 'entry_gas_rate', 'exit_gas_rate', 'gas_volume', 'entry_oil_rate',
-            'exit_oil_rate', 'oil_volume', 'entry_ngl_rate', 'exit_ngl_rate', 'ngl_volume', 'entry_water_rate', 'exit_water_rate', 'water_volume', 'shrink',
-            'oil_price', 'gas_price', 'oil_diff', 'gas_diff', 'ngl_diff', 'oil_price_real', 'gas_price_real', 'ngl_price_real', 'gross_oil_revenue',
-            'gross_gas_revenue', 'gross_ngl_revenue', 'gross_revenue', 'net_oil_volume', 'net_gas_volume', 'net_ngl_volume', 'net_water_volume', 'net_oil_revenue',
-            'net_gas_revenue', 'net_ngl_revenue', 'net_revenue', 'gross_capex', 'net_capex', 'gross_fixed_opex', 'gross_oil_opex', 'gross_gas_opex',
-            'gross_ngl_opex', 'gross_water_opex', 'net_fixed_opex', 'net_oil_opex', 'net_gas_opex', 'net_ngl_opex', 'net_water_opex', 'net_variable_opex',
-            'net_opex', 'gross_overhead', 'net_overhead', 'sev_tax', 'ad_val_tax', 'net_tax', 'operating_profit', 'net_income', 'net_cash_flow', 
-            'cum_cash_flow', 'net_pv10', 'cum_pv10'
-        ]
+        self.data                   = np.zeros((self.forecast_duration, len(TIMESERIES_COLUMNS)), order = 'F')
+        self.rates                  = np.zeros((self.forecast_duration, len(RATE_COLUMNS)), order = 'F')
+        self.dirty                  = {}
+        self.reversions             = []
+        self.before_payout          = None
+        self.column('month')[:]     = np.linspace(1, self.forecast_duration, self.forecast_duration)
+        self.time_vector            = time_grids.calc_month_edges(self.effective_date, self.forecast_duration, self.settings['time_grid'], self.settings)
+
+        self.column('days_start')[:], self.column('days_end')[:] = helpers.vector_to_endpoints(self.time_vector)
+
+    @property
+    def timeseries(self):
+
+        return self.to_dataframe()
+
+    @timeseries.setter
+    def timeseries(self, dataframe):
+
+        # Derived columns in dataframe are taken as already consistent
+        self.data = np.asfortranarray(dataframe.loc[:, TIMESERIES_COLUMNS].to_numpy(dtype = float))
+        self.dirty = {}
+
+    def to_dataframe(self, columns = None):
+        # Builds the monthly timeseries as a pandas DataFrame with a PeriodIndex
+        # INPUTS:
+        #   columns                 Columns to export, default all
+        # OUTPUTS:
+        #   timeseries              DataFrame copy of case data
+
+        self.recalculate()
+        if columns is None:
+            columns = TIMESERIES_COLUMNS
+        index = pd.period_range(self.effective_date, periods = self.data.shape[0], freq = 'M')
+        offsets = [COLUMN_INDEX[column] for column in columns]
+        return pd.DataFrame(self.data[:, offsets], index = index, columns = columns)
+
+    def resample(self, resolution = 'Y', columns = None):
+        # Timeseries aggregated to calendar years ('Y') or months ('M') - flows
+        # summed, rates and levels as in time_grids.resample_columns
+        # INPUTS:
+        #   resolution              'Y' or 'M'
+        #   columns                 Columns to export, default all
+        # OUTPUTS:
+        #   timeseries              DataFrame with a PeriodIndex at resolution
+
+        self.recalculate()
+        columns = TIMESERIES_COLUMNS if columns is None else columns
+        months = self.data.shape[0]
+        grid = time_grids.time_grid(self.effective_date, months, self.settings['time_grid'], settings = self.settings)
+        target = grid.target_edges(resolution)
+        values = time_grids.resample_columns({column: self.column(column) for column in columns}, grid.edges, target)
+
+        first_months = np.searchsorted(grid.month_edges, target[:-1])
+        index = pd.PeriodIndex([(self.effective_date + int(month)).asfreq(resolution) for month in first_months])
+        return pd.DataFrame(values, index = index, columns = columns)
+
+    def column(self, column):
+        # Returns the writable vector for one timeseries or rate column (no copy)
+        # Writing through this vector directly does not mark anything dirty -
+        # use the assign/add methods, or call invalidate afterwards
+
+        if column in COLUMN_INDEX:
+            return self.data[:, COLUMN_INDEX[column]]
+        return self.rates[:, RATE_INDEX[column]]
+
+    def invalidate(self, column, rows = slice(None)):
+        # Marks the derived columns downstream of column as dirty for the given
+        # months. Running totals are dirty from the first changed month onward
+        # INPUTS:
+        #   column                  Input column that was changed
+        #   rows                    Slice of changed rows, default all
+
+        length = self.data.shape[0]
+        start, stop, _ = rows.indices(length)
+        if start >= stop:
+            return
+
+        dirty = self.dirty
+        for derived, to_end in DOWNSTREAM_COLUMNS[column]:
+            last = length if to_end else stop
+            if derived in dirty:
+                previous = dirty[derived]
+                dirty[derived] = (min(start, previous[0]), max(last, previous[1]))
+            else:
+                dirty[derived] = (start, last)
+
+    @helpers.instrumented('case/recalculate')
+    def recalculate(self):
+        # Recalculates dirty derived columns over their dirty months only
+
+        if not self.dirty:
+            return
+        for derived, (inputs, function) in DERIVED_COLUMNS.items():
+            if derived in self.dirty:
+                first, last = self.dirty.pop(derived)
+                rows = slice(first, last)
+                self.column(derived)[rows] = function(column_window(self, rows))
+
+    def month_offset(self, month):
+        # Converts a month ("YYYY-MM", "MM/YYYY", pd.Period...) to a row offset
+        # relative to the effective date
+
+        return (pd.Period(month, 'M') - self.effective_date).n
 
-        self.timeseries             = pd.DataFrame(index = timeseries_index, columns = timeseries_columns).fillna(0)
-        self.timeseries['month']    = np.linspace(1, self.forecast_duration, self.forecast_duration)
-        self.time_vector            = np.linspace(0, self.forecast_duration, self.forecast_duration + 1) * self.settings['days_in_month']
+    def row_slice(self, start = None, stop = None):
+        # Converts start/stop months into a slice of rows. Like the .loc
+        # slicing it replaces, stop is inclusive
 
-        self.timeseries['days_start'], self.timeseries['days_end'] = helpers.vector_to_endpoints(self.time_vector)
+        start = None if start is None else max(self.month_offset(start), 0)
+        stop = None if stop is None else max(self.month_offset(stop) + 1, 0)
+        return slice(start, stop)
 
     def assign_to_timeseries(self, item, column, start = None, stop = None):
 
-        # To-do:    Get rid of if/else by being more intelligent with start/stop
-        #           indices - low priority
-        if start is None and stop is None:
-            self.timeseries.loc[:, column] = item
-        else:
-            self.timeseries.loc[start:stop, column] = item
+        rows = self.row_slice(start, stop)
+        self.column(column)[rows] = item
+        self.invalidate(column, rows)
 
     def add_to_timeseries(self, item, column, start = None, stop = None):
 
-        # To-do:    Get rid of if/else by being more intelligent with start/stop
-        #           indices - low priority
-        if start is None and stop is None:
-            self.timeseries.loc[:, column] += item
-        else:
-            self.timeseries.loc[start:stop, column] += item
+        rows = self.row_slice(start, stop)
+        self.column(column)[rows] += item
+        self.invalidate(column, rows)
     
     def mult_add_timeseries(self, ratio, target_column, base_column, start = None, stop = None):
 
-        # To-do:    Get rid of if/else by being more intelligent with start/stop
-        #           indices - low priority
-        if start is None and stop is None:
-            self.timeseries.loc[:, target_column] += self.timeseries.loc[:, base_column] * ratio
-        else:
-            self.timeseries.loc[start:stop, target_column] += self.timeseries.loc[start:stop, base_column] * ratio
+        rows = self.row_slice(start, stop)
+        self.column(target_column)[rows] += self.column(base_column)[rows] * ratio
+        self.invalidate(target_column, rows)
 
     def mult_add_cols_timeseries(self, mult_column, target_column, base_column, start = None, stop = None):
 
-        # To-do:    Get rid of if/else by being more intelligent with start/stop
-        #           indices - low priority
-        if start is None and stop is None:
-            self.timeseries.loc[:, target_column] += self.timeseries.loc[:, base_column] * self.timeseries.loc[:, mult_column]
-        else:
-            self.timeseries.loc[start:stop, target_column] += self.timeseries.loc[start:stop, base_column] * self.timeseries.loc[start:stop, mult_column]
+        rows = self.row_slice(start, stop)
+        self.column(target_column)[rows] += self.column(base_column)[rows] * self.column(mult_column)[rows]
+        self.invalidate(target_column, rows)
     
+    @helpers.instrumented('case/forecast')
     def generate_forecast(self, phase = None, forecast_type = 'exponential', qi = None, qf = None, De = None, Dte = None, b = None, start = None, stop = None):
         
         Di, Dt = helpers.parse_declines(De, Dte, b, forecast_type)
-        start, stop, time_vector_slice = helpers.slice_time_vector(start, stop, self.time_vector)
+
+        # Time vector from the forecast's first month, so calendar month lengths line up
+        first = 0 if start is None else min(max(self.month_offset(start), 0), self.forecast_duration)
+        start, stop, time_vector_slice = helpers.slice_time_vector(start, stop, self.time_vector[first:] - self.time_vector[first], self.settings)
 
         kwargs = {
             'qi':       qi,
@@ -83,7 +553,8 @@ class case:
             'Di':       Di,
             'Dt':       Dt,
             'b':        b,
-            'phase':    phase
+            'phase':    phase,
+            'settings': self.settings
         }
 
         dispatch_map = {
@@ -97,12 +568,100 @@ class case:
         forecast = dispatch_map[forecast_type](time_vector_slice, **kwargs)
         self.add_forecast(phase, forecast, start = start, stop = stop)
 
-    def add_forecast(self, phase, forecast, start = None, stop = None):
+    @helpers.instrumented('case/forecast')
+    def generate_forecast_chain(self, phase, segments, start = None):
+        # Adds a multi-segment forecast (see decline_calculators/segments.py)
+        # INPUTS:
+        #   phase                   Phase of the forecast
+        #   segments                dca.forecast_chain, or list of forecast_segment kwargs
+        #   start                   First month of the chain, default effective date.
+        #                           An open-ended last segment runs to the last case month
+        # OUTPUTS:
+        #   None - adds to the phase forecast
+
+        chain = segments if isinstance(segments, dca.forecast_chain) else dca.forecast_chain(segments)
+        first = 0 if start is None else self.month_offset(start)
+        months = max(self.forecast_duration - first if chain.months is None else chain.months, 0)
+        time_vector = time_grids.calc_month_edges(self.effective_date + first, months, self.settings['time_grid'], self.settings)
+        self.add_forecast(phase, chain.evaluate(months, self.settings, time_vector), start = start)
+
+    @helpers.instrumented('case/fit')
+    def fit_forecast(self, phase, history, forecast_type = 'hyperbolic', start = None, Dte = None, **fit_options):
+        # Fits decline parameters to monthly production history and adds the fitted
+        # forecast from the first history month. Months before the effective date
+        # are dropped as with any other forecast
+        # INPUTS:
+        #   phase                   Phase of the history
+        #   history                 Monthly volumes - pd.Series indexed by month, or
+        #                           a vector whose first month is start
+        #   forecast_type           Decline type to fit, see dca.fit_decline_batch
+        #   start                   First history month, default taken from a Series index
+        #   Dte                     Terminal decline, needed for modified hyperbolic
+        #   **fit_options           Passed to dca.fit_decline_batch
+        # OUTPUTS:
+        #   fit                     Dictionary of fitted parameters and fit statistics
+
+        if isinstance(history, pd.Series):
+            months = pd.PeriodIndex([pd.Period(month, 'M') for month in history.index])
+            history = pd.Series(history.to_numpy(dtype = float), index = months).sort_index()
+            history = history.reindex(pd.period_range(history.index[0], history.index[-1], freq = 'M'))
+            start = history.index[0] if start is None else start
+        start = self.effective_date if start is None else pd.Period(start, 'M')
+
+        history = np.asarray(history, dtype = float)
+        days = time_grids.calc_month_lengths(start, len(history), self.settings['time_grid'], self.settings)
+        fit = dca.fit_decline_batch(history, forecast_type, Dte = Dte, **{'settings': self.settings, 'days': days, **fit_options})
+        forecast = dca.fit_to_forecasts(fit, phase, forecast_type, start)[0]
+        if forecast is None:
+            raise ValueError('not enough producing months in history to fit a ' + forecast_type + ' decline')
+        self.generate_forecast(**forecast, stop = self.effective_date + self.forecast_duration - 1)
+        return {name: values[0] for name, values in fit.items()}
 
-        self.add_to_timeseries(forecast[:, 0], 'entry_' + phase + '_rate', start, stop)
-        self.add_to_timeseries(forecast[:, 1], 'exit_' + phase + '_rate', start, stop)
-        self.add_to_timeseries(forecast[:, 2], phase + '_volume', start, stop)
+    def add_forecast(self, phase, forecast, start = None, stop = None):
 
+        # Months of the forecast before the effective date or after the last
+        # month of the case are dropped
+        first = 0 if start is None else self.month_offset(start)
+        skip = max(-first, 0)
+        rows = self.row_slice(start, stop)
+        forecast = forecast[skip:skip + len(self.data[rows])]
+        rows = slice(first + skip, first + skip + len(forecast))
+
+        self.column('entry_' + phase + '_rate')[rows]   += forecast[:, 0]
+        self.column('exit_' + phase + '_rate')[rows]    += forecast[:, 1]
+        self.column(phase + '_volume')[rows]            += forecast[:, 2]
+        self.invalidate(phase + '_volume', rows)
+
+    @helpers.instrumented('case/schedule')
+    def add_schedule(self, phase, schedule, type_curve, capex_per_well = None, start = None, risk = 1.0):
+        # Adds the aggregate forecast and gross capex of a drilling schedule of type
+        # wells, by convolution instead of one forecast per location (see schedule.py)
+        # INPUTS:
+        #   phase                   Phase of the type curve
+        #   schedule                Wells coming online each month from start, vector
+        #                           (see schedule.rig_schedule, schedule_from_locations)
+        #   type_curve              Type well forecast array of shape (months, 3), or
+        #                           dictionary of schedule.type_curve kwargs
+        #   capex_per_well          Gross capex of one well, scalar or vector by month
+        #                           from its online month, default none
+        #   start                   Month of the first schedule entry, default effective date
+        #   risk                    Production risk factor
+        # OUTPUTS:
+        #   None - adds to the phase forecast and gross_capex
+
+        # Wells online before the effective date need the type curve past forecast_duration.
+        # Every well shares one type curve, so its months are those from start
+        first = 0 if start is None else self.month_offset(start)
+        if isinstance(type_curve, dict):
+            months = self.forecast_duration + max(-first, 0)
+            time_vector = time_grids.calc_month_edges(self.effective_date + first, months, self.settings['time_grid'], self.settings)
+            type_curve = schedules.type_curve(**{'months': months, 'settings': self.settings, 'time_vector': time_vector, **type_curve})
+        production, capex = schedules.schedule_timeseries(schedule, type_curve, capex_per_well, first, self.forecast_duration, risk)
+        self.add_forecast(phase, production)
+        if capex is not None:
+            self.add_to_timeseries(capex, 'gross_capex')
+
+    @helpers.instrumented('case/forecast')
     def ratio_forecast(self, ratio_phase, base_phase, ratio, start = None, stop = None):
         
         self.mult_add_timeseries(ratio, 'entry_' + ratio_phase + '_rate', 'entry_' + base_phase + '_rate', start, stop)
@@ -111,72 +670,75 @@ class case:
 
     def shrink(self, shrink):
 
-        self.timeseries['shrink'] = shrink
+        self.assign_to_timeseries(shrink, 'shrink')
 
+    @helpers.instrumented('case/pricing')
     def import_default_pricing(self):
 
-        pricing = pd.DataFrame(helpers.read_default_pricing()).to_numpy()
-        self.timeseries.loc[:, ['oil_price', 'gas_price', 'oil_diff', 'gas_diff', 'ngl_diff']] = pricing
-        self.calc_realized_pricing()
+        # The packaged deck is parsed once per process and shared by every case
+        self.apply_price_deck(price_decks.default_price_deck())
 
+    @helpers.instrumented('case/pricing')
+    def apply_price_deck(self, deck):
+        # Copies the case's months of a shared price deck into the price columns
+        # INPUTS:
+        #   deck                    pricing.price_deck
+
+        prices = deck.window(self.effective_date, self.data.shape[0])
+        for offset, column in enumerate(price_decks.PRICE_COLUMNS):
+            self.column(column)[:] = prices[:, offset]
+            self.invalidate(column)
+        self.pricing = deck
+
+    @helpers.instrumented('case/pricing')
     def flat_pricing(self, oil_price, oil_diff, gas_price, gas_diff, ngl_diff):
 
-        self.timeseries['oil_price']            = oil_price
-        self.timeseries['oil_diff']             = oil_diff
-        self.timeseries['gas_price']            = gas_price
-        self.timeseries['gas_diff']             = gas_diff
-        self.timeseries['ngl_diff']             = ngl_diff
-        self.calc_realized_pricing()
+        self.assign_to_timeseries(oil_price, 'oil_price')
+        self.assign_to_timeseries(oil_diff, 'oil_diff')
+        self.assign_to_timeseries(gas_price, 'gas_price')
+        self.assign_to_timeseries(gas_diff, 'gas_diff')
+        self.assign_to_timeseries(ngl_diff, 'ngl_diff')
 
-    def calc_realized_pricing(self):
+    # calc_realized_pricing, calc_sales_revenue, calc_net_production, calc_net_opex
+    # and calc_cash_flow are kept as explicit entry points. The columns they
+    # produce are part of DERIVED_COLUMNS and are kept up to date automatically
 
-        self.timeseries['oil_price_real']       = self.timeseries['oil_price'] + self.timeseries['oil_diff']
-        self.timeseries['gas_price_real']       = self.timeseries['gas_price'] + self.timeseries['gas_diff']
-        self.timeseries['ngl_price_real']       = self.timeseries['oil_price'] * self.timeseries['ngl_diff']
+    def calc_realized_pricing(self):
 
-    def import_pricing(self, format, price_file = None):
+        self.recalculate()
 
-        # To-do:    Decide how many price deck formats to allow as inputs
-        #           Currently allowing dataframe, excel, text
-        #           Flesh out kwargs and dispatch map for different options
-        #           Resolve pathing question - prefer for this and specific 
-        #           imports to be helper functions but pathing is obtuse if
-        #           it's structured that way
+    @helpers.instrumented('case/pricing')
+    def import_pricing(self, format, price_file = None, scenario = None):
+        # Prices the case from a price deck
+        # INPUTS:
+        #   format                  'df', 'xls' or 'txt'
+        #   price_file              DataFrame for 'df', file path otherwise
+        #   scenario                Scenario (sheet) to use, default the first in the file
 
         dispatch_map = {
             'df': self.import_pricing_df,
             'xls': self.import_pricing_xls,
             'txt': self.import_pricing_txt
         }
-        self.pricing = dispatch_map[format](price_file)
-    
-    def import_pricing_df(self, price_file):
-
-        # To-do:    Come up with a format for pricing dataframes
-        #           Come up with a reasonable way for a user to build a price deck into a dataframe
-        #           Should be able to go user DF -> object property DF -> timeseries columns
-        #           What about xls/txt/json/parquet -> DF???
+        dispatch_map[format](price_file, scenario)
 
-        None
-    
-    def import_pricing_xls(self, price_file):
+    def import_pricing_df(self, price_file, scenario = None):
 
-        # To-do:    Come up with a format for pricing spreadsheets
-        #           Try to allow user to input in any format allowed in Aries
-        #           Build parser function
-        #           Include a guide or example in README
+        # The DataFrame is parsed on every call - to price many cases from one
+        # DataFrame, build a deck once with pricing.read_price_table and use apply_price_deck
+        self.apply_price_deck(price_decks.read_price_table(price_file, name = 'default' if scenario is None else scenario))
 
-        None
+    def import_pricing_xls(self, price_file, scenario = None):
 
-    def import_pricing_txt(self, price_file):
+        # One sheet per scenario, parsed once per process and shared
+        self.apply_price_deck(select_scenario(price_decks.read_price_decks(price_file, self.settings), scenario, price_file))
 
-        # To-do:    Come up with a format for pricing .txt docs
-        #           Try to make this similar to Aries format, is limited with .txt
-        #           Build parser function
-        #           Include a guide or example in README
+    def import_pricing_txt(self, price_file, scenario = None):
 
-        None
+        # Aries-style deck, parsed once per process and shared
+        self.apply_price_deck(select_scenario(price_decks.read_price_decks(price_file, self.settings), scenario, price_file))
 
+    @helpers.instrumented('case/ownership')
     def assign_ownership(self, working_int, rev_int, type = 'frac', start = None, stop = None):
        
         if type == 'percent':
@@ -186,191 +748,347 @@ class case:
         self.assign_to_timeseries(working_int, 'working_int', start, stop)
         self.assign_to_timeseries(rev_int, 'rev_int', start, stop)
 
-    def calc_sales_revenue(self):
+    @helpers.instrumented('case/ownership')
+    def assign_reversion(self, working_int, rev_int, multiple = 1.0, type = 'frac'):
+        # Reverts interests at payout, see economics/reversion.py. Payout is tested
+        # on the case as it stands, so revenue, costs, taxes and the before-payout
+        # interests must be assigned first - fullrun applies reversions after tax
+        # INPUTS:
+        #   working_int, rev_int    After-payout interests
+        #   multiple                Capex multiple recovered at payout
+        #   type                    'frac' or 'percent', as assign_ownership
+        # OUTPUTS:
+        #   None - sets payout_month (None if the case never pays out) and the
+        #   interests of every month after it. The reversion and the before-payout
+        #   interests are kept, so evaluate_scenarios can find each scenario's payout
+
+        if type == 'percent':
+            working_int     /= 100
+            rev_int         /= 100
 
-        self.timeseries['gross_oil_revenue']        = self.timeseries['oil_volume'] * self.timeseries['oil_price_real']
-        self.timeseries['gross_gas_revenue']        = self.timeseries['gas_volume'] * self.timeseries['gas_price_real'] * self.timeseries['shrink']
-        self.timeseries['gross_ngl_revenue']        = self.timeseries['ngl_volume'] * self.timeseries['ngl_price_real']
-        self.timeseries['gross_revenue']            = self.timeseries.loc[:, ['gross_oil_revenue', 'gross_gas_revenue', 'gross_ngl_revenue']].sum(axis = 1)
+        if not self.reversions:
+            self.before_payout = {column: self.column(column).copy() for column in ['working_int', 'rev_int']}
+        self.reversions.append({'working_int': working_int, 'rev_int': rev_int, 'multiple': multiple})
 
-        self.timeseries['net_oil_revenue']          = self.timeseries['gross_oil_revenue'] * self.timeseries['rev_int']
-        self.timeseries['net_gas_revenue']          = self.timeseries['gross_gas_revenue'] * self.timeseries['rev_int']
-        self.timeseries['net_ngl_revenue']          = self.timeseries['gross_ngl_revenue'] * self.timeseries['rev_int']
-        self.timeseries['net_revenue']              = self.timeseries.loc[:, ['net_oil_revenue', 'net_gas_revenue', 'net_ngl_revenue']].sum(axis = 1)
+        self.recalculate()
+        payout = int(econ.calc_payout_month(self.column('net_income'), self.column('net_capex'), multiple)[0])
+        months = self.data.shape[0]
+        self.payout_month = self.effective_date + payout if payout < months else None
+        if payout + 1 < months:
+            for column, value in [('working_int', working_int), ('rev_int', rev_int)]:
+                self.column(column)[payout + 1:] = value
+                self.invalidate(column, slice(payout + 1, None))
 
+    @helpers.instrumented('case/revenue')
+    def calc_sales_revenue(self):
+
+        self.recalculate()
+
+    @helpers.instrumented('case/revenue')
     def calc_net_production(self):
 
-        self.timeseries['net_oil_volume']           = self.timeseries['oil_volume'] * self.timeseries['rev_int']
-        self.timeseries['net_gas_volume']           = self.timeseries['gas_volume'] * self.timeseries['rev_int'] * self.timeseries['shrink']
-        self.timeseries['net_ngl_volume']           = self.timeseries['ngl_volume'] * self.timeseries['rev_int']
-        self.timeseries['net_water_volume']         = self.timeseries['water_volume'] * self.timeseries['rev_int']
+        self.recalculate()
 
+    @helpers.instrumented('case/capex')
     def assign_capex(self, amount, type = 'gross', month = None):
 
         if month is None:
             month = self.settings['effective_date']
+        row = self.month_offset(month)
 
-        if type == 'gross':
-            self.timeseries.loc[month, 'gross_capex']    += amount
-            self.timeseries.loc[month, 'net_capex']      += amount * self.timeseries.loc[month, 'working_int']
-        elif type == 'net':
-            self.timeseries.loc[month, 'gross_capex']    += amount / self.timeseries.loc[month, 'working_int']
-            self.timeseries.loc[month, 'net_capex']      += amount
+        # net_capex follows gross_capex and working_int through DERIVED_COLUMNS
+        if type == 'net':
+            amount = amount / self.column('working_int')[row]
+        self.column('gross_capex')[row] += amount
+        self.invalidate('gross_capex', slice(row, row + 1))
 
+    @helpers.instrumented('case/opex')
     def assign_fixed_opex(self, input, input_type, start = None, stop = None):
         
         dispatch_map = {
             'flat': self.flat_fixed_opex,
             'linear': self.linear_fixed_opex,
+            'stepped': self.stepped_fixed_opex,
             'import': self.import_fixed_opex
         }
 
         dispatch_map[input_type](input, start, stop)
-        self.calc_net_opex()
 
     def flat_fixed_opex(self, opex, start = None, stop = None):
 
         self.add_to_timeseries(opex, 'gross_fixed_opex', start, stop)
-        self.mult_add_timeseries(opex, 'net_fixed_opex', 'working_int', start, stop)
     
-    def linear_fixed_opex(self, opex):
-
-        #   To-do:  Actually build this
-        #           Make the fixed cost a linear function
-        #           Maybe add ability to do other functions? Might not be useful...
-
-        None
-
-    def import_fixed_opex(self, opex):
-
-        #   To-do:  Actually build this
-        #           Going to need multiple functions for multiple file types like w/
-        #           pricing
-
-        None
-
+    def linear_fixed_opex(self, opex, start = None, stop = None):
+
+        # opex is (initial, final) monthly cost, a straight line over start to stop
+        rows = self.row_slice(start, stop)
+        months = len(range(*rows.indices(self.data.shape[0])))
+        self.add_to_timeseries(costs.linear_costs(opex[0], opex[1], months), 'gross_fixed_opex', start, stop)
+
+    def stepped_fixed_opex(self, opex, start = None, stop = None):
+
+        # opex is {month: monthly cost}, each cost held until the next step
+        steps = costs.stepped_costs(opex, self.effective_date, self.data.shape[0])
+        self.add_to_timeseries(steps[self.row_slice(start, stop)], 'gross_fixed_opex', start, stop)
+
+    def import_fixed_opex(self, opex, start = None, stop = None):
+
+        # opex is a cost table well ({'file': path, 'well': name}), a costs.cost_schedule
+        # or a monthly pd.Series. Files are parsed once per process and shared
+        schedule = costs.as_cost_schedule(opex).window(self.effective_date, self.data.shape[0])
+        self.add_to_timeseries(schedule[self.row_slice(start, stop)], 'gross_fixed_opex', start, stop)
+
+    @helpers.instrumented('case/opex')
+    def escalate_costs(self, category, escalation, start = None, step = 'annual'):
+        # Escalates every cost of a category assigned so far, see costs.py
+        # INPUTS:
+        #   category                Key of costs.COST_CATEGORIES
+        #   escalation              Annual percent, or annual percents by index year
+        #   start                   Index base month, default the effective date
+        #   step                    'annual' (stepped) or 'monthly'
+
+        if category not in costs.COST_CATEGORIES:
+            raise ValueError('unknown cost category ' + repr(category) + ', expected one of ' + ', '.join(costs.COST_CATEGORIES))
+        factors = costs.escalation_factors(escalation, self.effective_date, self.forecast_duration, start, step)[:self.data.shape[0]]
+        for column in costs.COST_CATEGORIES[category]:
+            self.column(column)[:] *= factors
+            self.invalidate(column)
+
+    @helpers.instrumented('case/opex')
     def assign_overhead(self, amount, start = None, stop = None):
 
         self.add_to_timeseries(amount, 'gross_overhead', start, stop)
-        self.timeseries['net_overhead'] = self.timeseries.loc[:, ['rev_int', 'gross_overhead']].product(axis = 1)
 
+    @helpers.instrumented('case/opex')
     def assign_variable_opex(self, ratio, base_phase, start = None, stop = None):
         
-        self.mult_add_timeseries(ratio, 'gross_' + base_phase + '_opex', base_phase + '_volume', start, stop)
-        self.mult_add_cols_timeseries('working_int', 'net_' + base_phase + '_opex', 'gross_' + base_phase + '_opex', start, stop)
-        self.timeseries['gross_gas_opex'] = self.timeseries['gross_gas_opex'] * self.timeseries['shrink']
-        self.timeseries['net_gas_opex'] = self.timeseries['net_gas_opex'] * self.timeseries['shrink']
-        self.calc_net_opex()
+        # Variable opex is stored as a cost per unit of base_phase volume, gross
+        # and net opex columns follow volumes, shrink and working_int
+        self.add_to_timeseries(ratio, base_phase + '_opex_rate', start, stop)
 
     def calc_net_opex(self):
         
-        self.timeseries['net_variable_opex']        = self.timeseries.loc[:, ['net_oil_opex', 'net_gas_opex', 'net_ngl_opex', 'net_water_opex']].sum(axis = 1)
-        self.timeseries['net_opex']                 = self.timeseries.loc[:, ['net_fixed_opex', 'net_variable_opex']].sum(axis = 1)
+        self.recalculate()
 
+    @helpers.instrumented('case/tax')
     def assign_tax(self, ad_val_rate, sev_rate, deductible = True, start = None, stop = None):
         
-        # To-do:    The two types of tax are inconsistent with each other in how they handle start/stop dates
-        #           Decide whether we need start/stop on tax, and make this method consistent
-        self.mult_add_timeseries(sev_rate, 'sev_tax', 'net_revenue', start, stop)
+        # Taxes are stored as rates against net_revenue. A deductible ad valorem
+        # rate replaces any ad valorem rate already in place over start/stop
+        self.add_to_timeseries(sev_rate, 'sev_rate', start, stop)
 
         if deductible:
-            if start is None and stop is None:
-                self.timeseries.loc[:, 'ad_val_tax'] = ad_val_rate * (self.timeseries.loc[:, 'net_revenue'] - self.timeseries.loc[:, 'sev_tax'])
-            else:
-                self.timeseries.loc[start:stop, 'ad_val_tax'] = ad_val_rate * (self.timeseries.loc[start:stop, 'net_revenue'] - self.timeseries.loc[start:stop, 'sev_tax'])
+            self.assign_to_timeseries(ad_val_rate, 'ad_val_deductible_rate', start, stop)
+            self.assign_to_timeseries(0, 'ad_val_rate', start, stop)
         else:
-            self.mult_add_timeseries(ad_val_rate, 'ad_val_tax', 'net_revenue', start, stop)
-        
-        self.timeseries['net_tax'] = self.timeseries.loc[:, ['sev_tax', 'ad_val_tax']].sum(axis = 1)
+            self.add_to_timeseries(ad_val_rate, 'ad_val_rate', start, stop)
 
+    @helpers.instrumented('case/cash_flow')
     def calc_cash_flow(self):
 
-        self.timeseries['operating_profit']         = self.timeseries['net_revenue'] - self.timeseries['net_opex'] - self.timeseries['net_tax']
-        self.timeseries['net_income']               = self.timeseries['operating_profit'] - self.timeseries['net_overhead']
-        self.timeseries['net_cash_flow']            = self.timeseries['net_income'] - self.timeseries['net_capex']
-        self.timeseries['cum_cash_flow']            = self.timeseries['net_cash_flow'].cumsum()
-        self.timeseries['net_pv10']                 = self.timeseries['net_cash_flow'] / (1.1 ** (self.timeseries['days_start'] / self.settings['days_in_year']))
-        self.timeseries['cum_pv10']                 = self.timeseries['net_pv10'].cumsum()
+        self.recalculate()
+
+    @helpers.instrumented('case/scenarios')
+    def evaluate_scenarios(self, scenarios, metrics = True):
+        # Economics of the case under many price and cost scenarios in one array pass.
+        # Volumes, ownership and everything not given by a scenario are the case's
+        # own, so the forecast is never repeated. Each scenario has its own payout
+        # (reversions are solved again from the before-payout interests) and end of
+        # life - call before impose_end_of_life, as fullrun does
+        # INPUTS:
+        #   scenarios               Dictionary of {name: scenario}, every key optional:
+        #                           'pricing'           as workflow 'pricing', default
+        #                                               the case's own prices
+        #                           'opex_scale'        multiplier of fixed and variable opex
+        #                           'capex_scale'       multiplier of capex
+        #                           'overhead_scale'    multiplier of overhead
+        #   metrics                 Include PV profile/IRR/payout metrics in the onelines
+        # OUTPUTS:
+        #   None - populates scenario_timeseries ([scenarios, months, columns] array,
+        #   zeroed after each end of life), scenario_end_of_life and scenario_oneline
+
+        names = list(scenarios)
+        count, months = len(names), self.data.shape[0]
+
+        inputs = self.array_inputs()
+        prices = np.empty((count, months, len(price_decks.PRICE_COLUMNS)))
+        for index, name in enumerate(names):
+            pricing = scenarios[name].get('pricing')
+            if pricing is None:
+                prices[index] = self.data[:, [COLUMN_INDEX[column] for column in price_decks.PRICE_COLUMNS]]
+            else:
+                prices[index] = resolve_price_deck(pricing, self.settings).window(self.effective_date, months)
+        for offset, column in enumerate(price_decks.PRICE_COLUMNS):
+            inputs[column] = prices[:, :, offset]
+        for key, columns in SCENARIO_SCALES.items():
+            scale = np.array([float(scenarios[name].get(key, 1.0)) for name in names])[:, None]
+            for column in columns:
+                inputs[column] = inputs[column] * scale
+
+        if self.reversions:
+            values = calc_reversion(inputs, self.reversions, self.settings)[0]
+            inputs.update({column: values[column] for column in ['working_int', 'rev_int']})
+        else:
+            values = calc_derived_columns(inputs, self.settings)
+        limit, fraction = econ.calc_economic_limit(values, self.settings['loss_function'], self.settings['partial_month_limit'])
+        if fraction.any():
+            weights = econ.economic_limit_weights(limit, fraction, months)
+            for column in PARTIAL_MONTH_COLUMNS:
+                inputs[column] = inputs[column] * weights
+            values = calc_derived_columns(inputs, self.settings)
+
+        # Months after the end of life are zeroed, as impose_end_of_life(zero = True)
+        data = np.empty((count, months, len(TIMESERIES_COLUMNS)))
+        for offset, column in enumerate(TIMESERIES_COLUMNS):
+            data[:, :, offset] = values[column]
+        kept = limit + (fraction > 0)
+        data[np.arange(months) >= kept[:, None], COLUMN_INDEX['entry_gas_rate']:] = 0
+
+        self.scenario_timeseries = data
+        self.scenario_end_of_life = pd.Series([self.effective_date + int(month) for month in limit], index = names)
+        self.scenario_oneline = pd.DataFrame(calc_oneline_values(data, self.settings, metrics), index = names)
+
+    @helpers.instrumented('case/breakeven')
+    def calc_breakevens(self, variables = None, rate = None, target = 0.0):
+        # Breakeven flat prices and cost multiples, see economics/breakeven.py. Solved
+        # over the whole forecast, so call before impose_end_of_life as fullrun does
+        # INPUTS:
+        #   variables               economics BREAKEVEN_VARIABLES, default settings
+        #                           breakeven_variables
+        #   rate                    Discount rate, default settings primary_discount_rate.
+        #                           The rate is the IRR reached with target 0
+        #   target                  PV to reach at rate
+        # OUTPUTS:
+        #   breakevens              Dictionary of {variable: value}, NaN where there is none
+
+        variables = self.settings['breakeven_variables'] if variables is None else variables
+        if self.reversions:
+            # Payout moves with every variable, so the case is recalculated with its
+            # reversions at each step of the search
+            inputs = self.array_inputs()
+            factors = econ.breakeven_factors(self.column('days_start'), self.column('days_end'), rate, self.settings)
+            breakevens = {
+                variable: econ.solve_breakeven_exact(
+                    lambda x: calc_reversion(breakeven_inputs(inputs, variable, x), self.reversions, self.settings)[0],
+                    1, factors, target, self.settings['loss_function'], econ.BREAKEVEN_BOUNDS[variable]
+                )
+                for variable in variables
+            }
+            return {variable: float(values[0]) for variable, values in breakevens.items()}
+
+        self.recalculate()
+        breakevens = econ.calc_breakevens(
+            {column: self.column(column) for column in econ.SENSITIVITY_COLUMNS}, variables,
+            self.column('days_start'), self.column('days_end'), rate, target, self.settings
+        )
+        return {variable: float(values[0]) for variable, values in breakevens.items()}
+
+    def array_inputs(self):
+        # Input columns of the case for calc_derived_columns, with the before-payout
+        # interests where reversions were assigned
+
+        self.recalculate()
+        inputs = {column: self.column(column) for column in TIMESERIES_COLUMNS if column not in DERIVED_COLUMNS}
+        inputs.update({column: self.rates[:, RATE_INDEX[column]] for column in RATE_COLUMNS})
+        if self.reversions:
+            inputs.update(self.before_payout)
+        return inputs
 
     def modify_loss_function(self, loss_function):
         
-        self.settings['loss_function'] = loss_function
+        self.settings = self.settings.replace(loss_function = loss_function)
 
     def calc_end_of_life(self):
+        # Economic limit under settings['loss_function'], see economics/end_of_life.py
+        # end_of_life is the first month cut off, end_of_life_fraction the part of it
+        # kept with settings['partial_month_limit']
+
+        self.recalculate()
+        limit, fraction = econ.calc_economic_limit(
+            {column: self.column(column) for column in set(econ.ECONOMIC_LIMIT_COLUMNS.values())},
+            self.settings['loss_function'], self.settings['partial_month_limit']
+        )
+        self.end_of_life = self.effective_date + int(limit[0])
+        self.end_of_life_fraction = float(fraction[0])
 
-        if self.settings['loss_function'] == 'NO':
-            self.end_of_life = self.timeseries[self.timeseries['operating_profit'] <= 0].index[0]
-
-        elif self.settings['loss_function'] == 'BFIT':
-            self.end_of_life = self.timeseries[self.timeseries['net_income'] <= 0].index[0]
-
-        elif self.settings['loss_function'] == 'OK':
-            self.end_of_life = self.timeseries.index[-1:]
-
+    @helpers.instrumented('case/end_of_life')
     def impose_end_of_life(self, zero = False):
+        # Cuts the case off at its economic limit in place - dropped months are
+        # zeroed, or sliced off as a view, and the timeseries is never copied
 
         self.calc_end_of_life()
+        row = self.month_offset(self.end_of_life)
+        kept = row + 1 if self.end_of_life_fraction > 0 else row
+
+        # A partial limit month keeps a fraction of its production, fixed opex and
+        # overhead, everything derived from them follows through recalculate. This
+        # runs before the cut so running totals past the limit are zeroed with it
+        if kept > row:
+            for column in PARTIAL_MONTH_COLUMNS:
+                self.column(column)[row] *= self.end_of_life_fraction
+                self.invalidate(column, slice(row, kept))
+            self.recalculate()
+
         if zero:
-            self.timeseries.loc[self.end_of_life:, 'entry_gas_rate':] = 0
+            self.data[kept:, COLUMN_INDEX['entry_gas_rate']:] = 0
+            self.rates[kept:] = 0
         else:
-            self.timeseries = self.timeseries.drop(self.timeseries.loc[self.end_of_life:].index)
+            self.data = self.data[:kept]
+            self.rates = self.rates[:kept]
 
-    def generate_oneline(self, name):
+    @helpers.instrumented('case/oneline')
+    def generate_oneline(self, name, metrics = True):
 
-        self.oneline = pd.DataFrame(
-            index = [name],
-            data = self.calc_oneline_data()
+        self.oneline_name = name
+        self.oneline_data = self.calc_oneline_data(metrics)
+
+    @property
+    def oneline(self):
+
+        # Built on access so batch runs that only need oneline_data skip pandas
+        return pd.DataFrame(
+            index = [self.oneline_name],
+            data = self.oneline_data
         )
 
-    def calc_oneline_data(self):
-
-        oneline_data = {
-            'working_int':          self.timeseries['working_int'].max(),
-            'rev_int':              self.timeseries['rev_int'].max(),
-            'gross_capex':          self.timeseries['gross_capex'].sum(),
-            'net_capex':            self.timeseries['net_capex'].sum(),
-            'peak_oil_rate':        self.timeseries['entry_oil_rate'].max(),
-            'peak_gas_rate':        self.timeseries['entry_gas_rate'].max(),
-            'peak_ngl_rate':        self.timeseries['entry_ngl_rate'].max(),
-            'peak_water_rate':      self.timeseries['entry_water_rate'].max(),
-            'gross_oil':            self.timeseries['oil_volume'].sum(),
-            'gross_gas':            self.timeseries['gas_volume'].sum(),
-            'gross_ngl':            self.timeseries['ngl_volume'].sum(),
-            'gross_water':          self.timeseries['water_volume'].sum(),
-            'gross_oil_revenue':    self.timeseries['gross_oil_revenue'].sum(),
-            'gross_gas_revenue':    self.timeseries['gross_gas_revenue'].sum(),
-            'gross_ngl_revenue':    self.timeseries['gross_ngl_revenue'].sum(),
-            'gross_revenue':        self.timeseries['gross_revenue'].sum(),
-            'net_oil_volume':       self.timeseries['net_oil_volume'].sum(),
-            'net_gas_volume':       self.timeseries['net_gas_volume'].sum(),
-            'net_ngl_volume':       self.timeseries['net_ngl_volume'].sum(),
-            'net_water_volume':     self.timeseries['net_water_volume'].sum(),
-            'net_oil_revenue':      self.timeseries['net_oil_revenue'].sum(),
-            'net_gas_revenue':      self.timeseries['net_gas_revenue'].sum(),
-            'net_ngl_revenue':      self.timeseries['net_ngl_revenue'].sum(),
-            'net_revenue':          self.timeseries['net_revenue'].sum(),
-            'gross_fixed_opex':     self.timeseries['gross_fixed_opex'].sum(),
-            'gross_oil_opex':       self.timeseries['gross_oil_opex'].sum(),
-            'gross_gas_opex':       self.timeseries['gross_gas_opex'].sum(),
-            'gross_ngl_opex':       self.timeseries['gross_ngl_opex'].sum(),
-            'gross_water_opex':     self.timeseries['gross_water_opex'].sum(),
-            'net_fixed_opex':       self.timeseries['net_fixed_opex'].sum(),
-            'net_oil_opex':         self.timeseries['net_oil_opex'].sum(),
-            'net_gas_opex':         self.timeseries['net_gas_opex'].sum(),
-            'net_ngl_opex':         self.timeseries['net_ngl_opex'].sum(),
-            'net_water_opex':       self.timeseries['net_water_opex'].sum(),
-            'net_variable_opex':    self.timeseries['net_variable_opex'].sum(),
-            'net_opex':             self.timeseries['net_opex'].sum(),
-            'gross_overhead':       self.timeseries['gross_overhead'].sum(),
-            'net_overhead':         self.timeseries['net_overhead'].sum(),
-            'sev_tax':              self.timeseries['sev_tax'].sum(),
-            'ad_val_tax':           self.timeseries['ad_val_tax'].sum(),
-            'net_tax':              self.timeseries['net_tax'].sum(),
-            'operating_profit':     self.timeseries['operating_profit'].sum(),
-            'net_income':           self.timeseries['net_income'].sum(),
-            'net_cash_flow':        self.timeseries['net_cash_flow'].sum(),
-            'net_pv10':             self.timeseries['net_pv10'].sum(),
-            #'end_of_life':          self.end_of_life
-        }
+    def calc_oneline_data(self, metrics = True):
+
+        self.recalculate()
+        oneline_data = {item: values[0] for item, values in calc_oneline_values(self.data[None], metrics = False).items()}
+        breakevens = getattr(self, 'breakeven_data', {})
+        for variable in self.settings['breakeven_variables']:
+            oneline_data['breakeven_' + variable] = breakevens.get(variable, np.nan)
+        #oneline_data['end_of_life'] = self.end_of_life
+
+        if metrics:
+            oneline_data.update(self.calc_cash_flow_metrics())
         
         return oneline_data
+
+    def calc_cash_flow_metrics(self):
+        # PV profile at settings['discount_rates'], IRR, payout months and DCF ROI
+
+        self.recalculate()
+        col = self.column
+        metrics = econ.calc_cash_flow_metrics(col('net_cash_flow'), col('net_capex'), col('days_start'), col('days_end'), self.settings)
+        return {name: value[0] for name, value in metrics.items()}
+
+    def calc_pv_profile(self, rates = None, timing = None, compounding = None):
+        # Present value of net cash flow at several discount rates
+        # INPUTS:
+        #   rates                   Annual rates, default settings['discount_rates']
+        #   timing                  'start', 'mid' or 'end', default settings['discount_timing']
+        #   compounding             'annual', 'monthly' or 'continuous',
+        #                           default settings['discount_compounding']
+        # OUTPUTS:
+        #   profile                 pd.Series of PVs indexed by label (pv0, pv10...)
+
+        rates = list(self.settings['discount_rates'] if rates is None else rates)
+        timing = self.settings['discount_timing'] if timing is None else timing
+        compounding = self.settings['discount_compounding'] if compounding is None else compounding
+
+        self.recalculate()
+        days = econ.calc_discount_times(self.column('days_start'), self.column('days_end'), timing)
+        factors = econ.calc_discount_factors(rates, days, compounding, self.settings)
+        profile = econ.calc_npv_profile(self.column('net_cash_flow'), factors)
+        return pd.Series(profile, index = [econ.pv_label(rate) for rate in rates])
\ No newline at end of file
@@ -0,0 +1,205 @@
+import functools
+import glob
+import hashlib
+import json
+import os
+import uuid
+import zipfile
+from collections.abc import Mapping
+import numpy as np
+from . import helper_functions as helpers
+
+# checkpoints.py keeps finished portfolio cases on disk so runs can resume
+#
+# Every case is keyed by a hash of everything its results depend on: the workflow,
+# the settings, the contents of every file the workflow points at ({'file': path}
+# inputs - price files, cost tables) and the packaged default deck when the case
+# uses it. price_deck, forecast_chain and cost_schedule objects are hashed by their
+# contents (deck values, segment parameters, costs and start month). A store is a
+# directory of chunk files, each holding the results of one finished chunk of cases:
+#
+#   <signature>_<id>.npz        keys, timeseries, oneline_values and end_of_life
+#
+# The signature covers the result layout (timeseries columns, oneline items and
+# months), so a run with other columns never reads chunks it cannot use. Chunk
+# files are written under a temporary name (<signature>_<id>.npz.tmp, which the
+# store never reads) and renamed, so a run that dies leaves only whole chunks
+# behind. Chunk files that cannot be read anyway (a full disk, a copy cut short)
+# are deleted when the store is opened. A case whose key is in the store is
+# restored instead of evaluated - a rerun after a crash picks up where it
+# stopped, and a rerun after an edit only evaluates the cases whose inputs changed
+#
+# Cases that raised an error are never stored, so they are retried every run
+
+CHECKPOINT_VERSION = 1
+
+def case_key(workflow, settings = None):
+    # Hash of a case workflow and the settings it runs with
+    # INPUTS:
+    #   workflow                Workflow dictionary, see case.fullrun
+    #   settings                Settings the case runs with, default read_settings()
+    # OUTPUTS:
+    #   key                     Hex digest
+
+    digest = hashlib.blake2b(digest_size = 20)
+    update_hash(digest, CHECKPOINT_VERSION)
+    update_hash(digest, helpers.read_settings() if settings is None else settings)
+    update_hash(digest, workflow)
+    pricing = workflow.get('pricing', 'default')
+    if isinstance(pricing, str) and pricing == 'default':
+        update_hash(digest, default_deck_hash())
+    for path in workflow_files(workflow):
+        update_hash(digest, file_hash(path, os.path.getmtime(path)))
+    return digest.hexdigest()
+
+def workflow_files(value):
+    # Yields the absolute path of every {'file': path} input found in a workflow,
+    # at any depth, in the key order update_hash uses
+
+    if isinstance(value, Mapping):
+        if isinstance(value.get('file'), (str, os.PathLike)):
+            yield os.path.abspath(value['file'])
+        for key in sorted(value, key = str):
+            yield from workflow_files(value[key])
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from workflow_files(item)
+
+def update_hash(digest, value):
+    # Feeds a canonical encoding of value into digest. Dictionaries are hashed in
+    # key order, arrays by dtype, shape and contents
+
+    from .costs import cost_schedule
+    from .decline_calculators import forecast_chain, forecast_segment
+    from .pricing import price_deck
+    if isinstance(value, Mapping):
+        digest.update(b'{')
+        for key in sorted(value, key = str):
+            update_hash(digest, str(key))
+            update_hash(digest, value[key])
+        digest.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'[')
+        for item in value:
+            update_hash(digest, item)
+        digest.update(b']')
+    elif isinstance(value, np.ndarray):
+        digest.update(('array' + str(value.dtype) + str(value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, price_deck):
+        update_hash(digest, {'deck': value.values, 'start': str(value.start), 'name': value.name})
+    elif isinstance(value, forecast_chain):
+        update_hash(digest, {'chain': value.segments})
+    elif isinstance(value, forecast_segment):
+        update_hash(digest, {
+            'segment':      value.forecast_type,
+            'months':       value.months,
+            'qi':           value.qi,
+            'Di':           value.Di,
+            'b':            value.b,
+            'Dt':           value.Dt
+        })
+    elif isinstance(value, cost_schedule):
+        update_hash(digest, {'costs': value.values, 'start': None if value.start is None else str(value.start)})
+    elif hasattr(value, 'to_numpy') and hasattr(value, 'index'):
+        update_hash(digest, {'values': value.to_numpy(), 'index': [str(label) for label in value.index]})
+    elif isinstance(value, (bool, int, float, str, type(None), np.generic)):
+        digest.update((type(value).__name__ + ':' + repr(value.item() if isinstance(value, np.generic) else value) + ';').encode())
+    else:
+        raise TypeError('cannot checkpoint a workflow holding ' + type(value).__name__)
+
+@functools.lru_cache(maxsize = 64)
+def file_hash(path, modified):
+    # Hash of a file's contents, cached until it is modified
+
+    digest = hashlib.blake2b(digest_size = 20)
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+@functools.lru_cache(maxsize = None)
+def default_deck_hash():
+
+    from .pricing import default_price_deck
+    return hashlib.blake2b(default_price_deck().values.tobytes(), digest_size = 20).hexdigest()
+
+class checkpoint_store:
+
+    def __init__(self, path, columns, oneline_columns, months):
+        # INPUTS:
+        #   path                    Store directory, created if missing
+        #   columns                 Timeseries columns of the results
+        #   oneline_columns         Oneline items of the results
+        #   months                  Months per case
+
+        self.path = path
+        os.makedirs(path, exist_ok = True)
+        layout = json.dumps([CHECKPOINT_VERSION, list(columns), list(oneline_columns), months])
+        self.signature = hashlib.blake2b(layout.encode(), digest_size = 8).hexdigest()
+        self.index = {}
+        for file in sorted(glob.glob(os.path.join(path, self.signature + '_*.npz'))):
+            try:
+                with np.load(file) as chunk:
+                    keys = chunk['keys']
+            except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+                os.remove(file)
+                continue
+            for row, key in enumerate(keys):
+                self.index[str(key)] = (file, row)
+
+    def __len__(self):
+
+        return len(self.index)
+
+    def __contains__(self, key):
+
+        return key in self.index
+
+    def restore(self, keys, indices, timeseries, oneline_values, end_of_life, first = 0):
+        # Copies stored results into result arrays
+        # INPUTS:
+        #   keys                    Case keys, one per portfolio index
+        #   indices                 Portfolio indices to restore, all in the store
+        #   timeseries              [batch cases, months, columns] array, row index - first
+        #   oneline_values          [cases, oneline items] array
+        #   end_of_life             [cases] array
+        #   first                   Portfolio index of timeseries row 0
+
+        by_file = {}
+        for index in indices:
+            file, row = self.index[keys[index]]
+            by_file.setdefault(file, []).append((index, row))
+        for file, pairs in by_file.items():
+            targets, rows = (np.array(values) for values in zip(*pairs))
+            with np.load(file) as chunk:
+                timeseries[targets - first] = chunk['timeseries'][rows]
+                oneline_values[targets] = chunk['oneline_values'][rows]
+                end_of_life[targets] = chunk['end_of_life'][rows]
+
+    def save(self, keys, timeseries, oneline_values, end_of_life):
+        # Stores the results of finished cases as one chunk file
+        # INPUTS:
+        #   keys                    Case keys
+        #   timeseries, oneline_values, end_of_life
+        #                           Their results, one row per key
+
+        if not len(keys):
+            return
+        file = os.path.join(self.path, self.signature + '_' + uuid.uuid4().hex + '.npz')
+        temporary = file + '.tmp'
+        with open(temporary, 'wb') as handle:
+            np.savez(handle, keys = np.array(keys), timeseries = timeseries, oneline_values = oneline_values, end_of_life = end_of_life)
+        os.replace(temporary, file)
+        for row, key in enumerate(keys):
+            self.index[key] = (file, row)
+
+    def clear(self):
+        # Deletes every chunk file of this store's layout, and temporary files left
+        # by runs that died while saving
+
+        for file in set(file for file, _ in self.index.values()):
+            os.remove(file)
+        for file in glob.glob(os.path.join(self.path, self.signature + '_*.npz.tmp')):
+            os.remove(file)
+        self.index = {}
\ No newline at end of file
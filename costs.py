@@ -0,0 +1,200 @@
+import os
+import functools
+import numpy as np
+import pandas as pd
+from . import helper_functions as helpers
+
+# costs.py builds cost schedules and escalation factors shared between cases
+#
+# Escalation indices are annual percentages, either one rate or one rate per year
+# from the index base month (the last rate is held). Factors are 1 at the base
+# month and grow by each year's rate:
+#
+#   'annual'                    stepped - constant within each index year, the
+#                               usual convention for LOE and overhead
+#   'monthly'                   compounded monthly, as price deck ESC segments
+#
+# escalation_factors caches every (index, effective date, months) it computes as
+# a read-only array, so thousands of cases with the same assumptions share one
+# vector and escalating a case is one in-place multiply per cost column
+#
+# Cost tables are monthly fixed costs per well, read from files through
+# read_cost_tables and cached (by path and modification time) like price decks:
+#
+#   .csv, .json                 Long table - a well column ('well', 'case' or 'name'),
+#                               a 'month' (or 'date') column and a cost column
+#                               ('fixed_opex', 'loe' or 'cost')
+#   .xls, .xlsx                 The same on the first sheet
+#
+# Each well becomes a cost_schedule. Months after the last row of a well hold its
+# last cost, months before the first have none
+
+# Case columns each escalation category multiplies. Variable opex is escalated
+# through its per-unit rates
+COST_CATEGORIES = {
+    'fixed_opex':       ['gross_fixed_opex'],
+    'variable_opex':    ['oil_opex_rate', 'gas_opex_rate', 'ngl_opex_rate', 'water_opex_rate'],
+    'overhead':         ['gross_overhead'],
+    'capex':            ['gross_capex']
+}
+
+ESCALATION_STEPS = ['annual', 'monthly']
+
+TABLE_COLUMNS = {
+    'well':             ('well', 'case', 'name'),
+    'month':            ('month', 'date'),
+    'cost':             ('fixed_opex', 'loe', 'cost')
+}
+
+class cost_schedule:
+
+    def __init__(self, values, start = None, name = None):
+        # INPUTS:
+        #   values                  Monthly costs
+        #   start                   First month of values, None for relative (row 0 is
+        #                           each case's effective date)
+        #   name                    Well name
+
+        self.values = np.asarray(values, dtype = float)
+        self.start = None if start is None else pd.Period(start, 'M')
+        self.name = name
+
+    def __len__(self):
+
+        return len(self.values)
+
+    def __repr__(self):
+
+        return 'cost_schedule(' + repr(self.name) + ', ' + ('relative' if self.start is None else str(self.start)) + ', ' + str(len(self)) + ' months)'
+
+    def window(self, start, months):
+        # Costs for months months from start - 0 before the schedule, its last cost after
+        # INPUTS:
+        #   start                   First month, e.g. a case's effective date
+        #   months                  Number of months
+        # OUTPUTS:
+        #   costs                   Vector of months costs
+
+        offset = 0 if self.start is None else (pd.Period(start, 'M') - self.start).n
+        rows = np.arange(offset, offset + months)
+        costs = self.values[np.clip(rows, 0, len(self) - 1)] if len(self) else np.zeros(months)
+        return np.where(rows < 0, 0.0, costs)
+
+def escalation_factors(escalation, effective_date, months, start = None, step = 'annual'):
+    # Escalation factor of every month from effective_date, shared between callers
+    # INPUTS:
+    #   escalation              Annual percent, or a sequence of annual percents by index year
+    #   effective_date          First month of the factors
+    #   months                  Number of months
+    #   start                   Index base month (factor 1), default effective_date
+    #   step                    'annual' or 'monthly'
+    # OUTPUTS:
+    #   factors                 Read-only vector of months factors, 1 before the base month
+
+    if step not in ESCALATION_STEPS:
+        raise ValueError('unknown escalation step ' + repr(step) + ', expected one of ' + ', '.join(ESCALATION_STEPS))
+    rates = tuple(float(rate) for rate in np.atleast_1d(escalation))
+    effective_date = pd.Period(effective_date, 'M')
+    offset = 0 if start is None else (effective_date - pd.Period(start, 'M')).n
+    return calc_escalation_factors(rates, offset, int(months), step)
+
+@functools.lru_cache(maxsize = 256)
+def calc_escalation_factors(rates, offset, months, step):
+    # Factors for months months starting offset months after the index base month
+
+    helpers.count_event('escalation_factors')
+    elapsed = np.arange(offset, offset + months)
+    years = np.clip(elapsed, 0, None) // 12
+    growth = 1 + np.array(rates) / 100
+    growth = growth[np.minimum(np.arange(years.max(initial = 0) + 1), len(growth) - 1)]
+    factors = np.concatenate([[1.0], np.cumprod(growth)])[years]
+    if step == 'monthly':
+        factors = factors * growth[years] ** ((np.clip(elapsed, 0, None) % 12) / 12)
+    factors = np.where(elapsed < 0, 1.0, factors)
+    factors.flags.writeable = False
+    return factors
+
+def linear_costs(initial, final, months):
+    # Straight line from initial to final over months months
+
+    return np.linspace(initial, final, months) if months > 1 else np.full(months, float(initial))
+
+def stepped_costs(steps, effective_date, months):
+    # Costs held at each step's value from its month until the next step
+    # INPUTS:
+    #   steps                   Dictionary of {month: cost} or list of (month, cost) pairs,
+    #                           months as strings or pd.Period
+    #   effective_date          Month of row 0
+    #   months                  Number of months
+    # OUTPUTS:
+    #   costs                   Vector of months costs, 0 before the first step
+
+    steps = sorted((pd.Period(month, 'M'), float(cost)) for month, cost in (steps.items() if isinstance(steps, dict) else steps))
+    rows = np.array([(month - pd.Period(effective_date, 'M')).n for month, _ in steps])
+    values = np.concatenate([[0.0], [cost for _, cost in steps]])
+    return values[np.searchsorted(rows, np.arange(months), 'right')]
+
+def read_cost_table(table):
+    # Splits a long per-well cost table into cost schedules
+    # INPUTS:
+    #   table                   DataFrame with well, month and cost columns, see TABLE_COLUMNS
+    # OUTPUTS:
+    #   schedules               Dictionary of {well: cost_schedule}
+
+    table = table.rename(columns = lambda column: str(column).strip().lower())
+    found = {}
+    for role, names in TABLE_COLUMNS.items():
+        matches = [name for name in names if name in table.columns]
+        if not matches:
+            raise ValueError('cost table has no ' + role + ' column, expected one of ' + ', '.join(names))
+        found[role] = matches[0]
+
+    months = pd.PeriodIndex([pd.Period(month, 'M') for month in table[found['month']]])
+    table = pd.DataFrame({'well': table[found['well']].astype(str).to_numpy(), 'month': months, 'cost': table[found['cost']].to_numpy(dtype = float)})
+    schedules = {}
+    for well, rows in table.groupby('well', sort = False):
+        costs = rows.drop_duplicates('month', keep = 'last').set_index('month')['cost'].sort_index()
+        costs = costs.reindex(pd.period_range(costs.index.min(), costs.index.max(), freq = 'M')).ffill()
+        schedules[well] = cost_schedule(costs.to_numpy(), costs.index[0], well)
+    return schedules
+
+def read_cost_tables(path):
+    # Reads every well of a cost file, cached per process until the file changes
+    # INPUTS:
+    #   path                    .csv, .json, .xls or .xlsx cost file
+    # OUTPUTS:
+    #   schedules               Dictionary of {well: cost_schedule}, shared by all callers
+
+    path = os.path.abspath(path)
+    return load_cost_tables(path, os.path.getmtime(path))
+
+@functools.lru_cache(maxsize = 32)
+def load_cost_tables(path, modified):
+    # Parses a cost file. modified is only part of the cache key
+
+    helpers.count_event('cost_file_read')
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return read_cost_table(pd.read_csv(path))
+    elif extension == '.json':
+        return read_cost_table(pd.read_json(path))
+    elif extension in ('.xls', '.xlsx'):
+        return read_cost_table(pd.read_excel(path))
+    raise ValueError("unknown cost file type '" + extension + "'")
+
+def as_cost_schedule(opex):
+    # Cost schedule for a case import_fixed_opex input - a cost_schedule,
+    # {'file': path, 'well': name}, a pd.Series indexed by month or a monthly vector
+    # starting at the effective date
+
+    if isinstance(opex, cost_schedule):
+        return opex
+    if isinstance(opex, dict) and 'file' in opex:
+        schedules = read_cost_tables(opex['file'])
+        if str(opex['well']) not in schedules:
+            raise KeyError("no well '" + str(opex['well']) + "' in " + str(opex['file']))
+        return schedules[str(opex['well'])]
+    if isinstance(opex, pd.Series):
+        frame = pd.DataFrame({'well': opex.name, 'month': opex.index, 'cost': opex.to_numpy()})
+        return next(iter(read_cost_table(frame).values()))
+    return cost_schedule(opex)
\ No newline at end of file
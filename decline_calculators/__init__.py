@@ -3,6 +3,10 @@ from .flat import *
 from .harmonic import *
 from .hyperbolic import *
 from .mod_hyperbolic import *
+from .batch import *
+from .fitting import *
+from .reserves import *
+from .segments import *
 
 # Decline calculators contains canned/pre-formatted functions for dealing with
 # timeseries decline calculations
@@ -29,6 +33,10 @@ from .mod_hyperbolic import *
 #           row (often representing a month) in the case object's "time_vector"
 #           property
 #
+#       calc_(declinetype)_cum, calc_(declinetype)_time_to_rate:
+#           Closed-form cumulative production and time to a rate, for EUR and
+#           economic limit screening without a forecast (see reserves.py)
+#
 #   ***COMMENT ON MOD_HYPERBOLIC***:
 #       "mod_hyperbolic" is a special case that is absolutely necessary for reserves
 #       evaluation, and includes additional functions also found in the "decline_helpers.py"
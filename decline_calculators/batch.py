@@ -0,0 +1,242 @@
+import numpy as np
+from .. import helper_functions as helpers
+
+# batch.py is the multi-well counterpart of the single-well calculators
+#
+# Every parameter (qi, Di, b, Dt) may be a scalar or a vector with one entry per
+# well. Parameters are broadcast against time_vector so that one call returns the
+# full N wells x T months forecast in a single pass:
+#
+#   forecast[well, month, 0]    entry rates
+#   forecast[well, month, 1]    exit rates
+#   forecast[well, month, 2]    volumes
+#
+# forecast[i] matches the output of the single-well calc_(declinetype)_forecast
+# for the i-th set of parameters
+#
+# Volumes are computed as the difference of the analytic cumulative production at
+# each point of time_vector. For hyperbolic declines this is identical to the
+# "moving Di" integral used in hyperbolic.py, and it lets the b = 1 (harmonic)
+# fallback and the modified hyperbolic switch month be handled with masks
+# instead of per-well branches
+
+@helpers.instrumented('decline/batch')
+def calc_batch_forecast(time_vector, forecast_type = 'exponential', **kwargs):
+    # Dispatches a batch forecast to the calculator for forecast_type
+    # INPUTS:
+    #   time_vector             Instantaneous times for forecast, in numpy array
+    #                           Shape (T + 1,) shared by all wells, or (N, T + 1)
+    #   forecast_type           Decline type, same names as case.generate_forecast
+    #   qi                      Initial rates, scalar or vector of size N
+    #   Di                      Nominal initial decline rates, scalar or vector
+    #   b                       b-factors, scalar or vector
+    #   Dt                      Nominal terminal decline rates, scalar or vector
+    #   settings                Settings object, defaults to read_settings()
+    # OUTPUTS:
+    #   forecast                Array of shape (N, T, 3) - entry rates, exit rates
+    #                           and volumes for every well
+
+    dispatch_map = {
+        'exponential':          calc_exponential_batch,
+        'harmonic':             calc_harmonic_batch,
+        'hyperbolic':           calc_hyperbolic_batch,
+        'flat':                 calc_flat_batch,
+        'modified hyperbolic':  calc_mod_hyperbolic_batch
+    }
+
+    return dispatch_map[forecast_type](time_vector, **kwargs)
+
+def calc_exponential_batch(time_vector, qi, Di, settings = None, **kwargs):
+    # Batch form of calc_exponential_forecast
+    # INPUTS:
+    #   time_vector             Instantaneous times for forecast, in numpy array
+    #   qi                      Initial rates, scalar or vector
+    #   Di                      Nominal initial decline rates, scalar or vector
+    # OUTPUTS:
+    #   forecast                Array of shape (N, T, 3)
+
+    t, qi, Di = broadcast_parameters(time_vector, qi, Di)
+    c = helpers.get_setting('days_in_year', settings)
+    rates = qi * np.exp(-Di * t / c)
+    cum = exponential_cum(t, qi, Di, rates, c)
+    return stack_forecast(rates, cum)
+
+def calc_harmonic_batch(time_vector, qi, Di, settings = None, **kwargs):
+    # Batch form of calc_harmonic_forecast
+    # INPUTS:
+    #   time_vector             Instantaneous times for forecast, in numpy array
+    #   qi                      Initial rates, scalar or vector
+    #   Di                      Nominal initial decline rates, scalar or vector
+    # OUTPUTS:
+    #   forecast                Array of shape (N, T, 3)
+
+    t, qi, Di = broadcast_parameters(time_vector, qi, Di)
+    c = helpers.get_setting('days_in_year', settings)
+    rates = qi / (1 + Di * t / c)
+    cum = harmonic_cum(t, qi, Di, rates, c)
+    return stack_forecast(rates, cum)
+
+def calc_hyperbolic_batch(time_vector, qi, Di, b, settings = None, **kwargs):
+    # Batch form of calc_hyperbolic_forecast
+    # Wells with b = 1 use the harmonic solution, wells with b = 0 the
+    # exponential solution, selected per element by mask
+    # INPUTS:
+    #   time_vector             Instantaneous times for forecast, in numpy array
+    #   qi                      Initial rates, scalar or vector
+    #   Di                      Nominal initial decline rates, scalar or vector
+    #   b                       b-factors, scalar or vector
+    # OUTPUTS:
+    #   forecast                Array of shape (N, T, 3)
+
+    t, qi, Di, b = broadcast_parameters(time_vector, qi, Di, b)
+    c = helpers.get_setting('days_in_year', settings)
+    rates = hyperbolic_rates(t, qi, Di, b, c)
+    cum = hyperbolic_cum(t, qi, Di, b, rates, c)
+    return stack_forecast(rates, cum)
+
+def calc_mod_hyperbolic_batch(time_vector, qi, Di, b, Dt, settings = None, **kwargs):
+    # Batch form of calc_mod_hyperbolic_forecast
+    # Each well switches from its hyperbolic stem to its exponential stem at its
+    # own t_switch. Wells whose initial decline is already at or below terminal
+    # decline (t_switch <= 0) are forecast with exponential decline at Dt
+    # INPUTS:
+    #   time_vector             Instantaneous times for forecast, in numpy array
+    #   qi                      Initial rates, scalar or vector
+    #   Di                      Nominal initial decline rates, scalar or vector
+    #   b                       b-factors, scalar or vector
+    #   Dt                      Nominal terminal decline rates, scalar or vector
+    # OUTPUTS:
+    #   forecast                Array of shape (N, T, 3)
+
+    t, qi, Di, b, Dt = broadcast_parameters(time_vector, qi, Di, b, Dt)
+    c = helpers.get_setting('days_in_year', settings)
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        t_switch = np.where(b > 0, (Di / Dt - 1) / (b * Di) * c, np.inf)
+    t_switch = np.maximum(t_switch, 0)
+    q_switch = hyperbolic_rates(np.minimum(t_switch, t.max()), qi, Di, b, c)
+    q_switch = np.where(np.isinf(t_switch), 0, q_switch)
+
+    t_hyp = np.minimum(t, t_switch)
+    t_exp = np.maximum(t - t_switch, 0)
+
+    rates_hyp = hyperbolic_rates(t_hyp, qi, Di, b, c)
+    rates_exp = q_switch * np.exp(-Dt * t_exp / c)
+    rates = np.where(t <= t_switch, rates_hyp, rates_exp)
+
+    cum = hyperbolic_cum(t_hyp, qi, Di, b, rates_hyp, c) + exponential_cum(t_exp, q_switch, Dt, rates_exp, c)
+    return stack_forecast(rates, cum)
+
+def calc_flat_batch(time_vector, qi, **kwargs):
+    # Batch form of calc_flat_forecast
+    # INPUTS:
+    #   time_vector             Instantaneous times for forecast, in numpy array
+    #   qi                      Rates, scalar or vector
+    # OUTPUTS:
+    #   forecast                Array of shape (N, T, 3)
+
+    t, qi = broadcast_parameters(time_vector, qi)
+    rates = qi * np.ones_like(t)
+    cum = qi * t
+    return stack_forecast(rates, cum)
+
+def hyperbolic_rates(t, qi, Di, b, c):
+    # Arps' hyperbolic rate equation with the b = 0 (exponential) limit
+    # resolved by mask. b = 1 needs no special handling for rates
+    # INPUTS:
+    #   t                       Times (days), broadcastable against parameters
+    #   qi, Di, b               Decline parameters, broadcastable arrays
+    #   c                       Days in year
+    # OUTPUTS:
+    #   rates                   Instantaneous rates at t
+
+    is_exp = b == 0
+    b_safe = np.where(is_exp, 1, b)
+    with np.errstate(over = 'ignore'):
+        rates = qi * (1 + b_safe * Di * t / c) ** (-1 / b_safe)
+    if is_exp.any():
+        rates = np.where(is_exp, qi * np.exp(-Di * t / c), rates)
+    return rates
+
+def hyperbolic_cum(t, qi, Di, b, rates, c):
+    # Cumulative production from time zero to t for Arps' hyperbolic decline
+    # b = 1 uses the harmonic integral, b = 0 the exponential integral
+    # INPUTS:
+    #   t                       Times (days), broadcastable against parameters
+    #   qi, Di, b               Decline parameters, broadcastable arrays
+    #   rates                   Rates at t, from hyperbolic_rates
+    #   c                       Days in year
+    # OUTPUTS:
+    #   cum                     Cumulative production at t
+
+    is_har = b == 1
+    is_exp = b == 0
+    b_safe = np.where(is_har | is_exp, 0.5, b)
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        cum = (qi ** b_safe) / ((1 - b_safe) * Di) * (qi ** (1 - b_safe) - rates ** (1 - b_safe)) * c
+        cum = np.where(Di == 0, qi * t, cum)
+    if is_har.any():
+        cum = np.where(is_har, harmonic_cum(t, qi, Di, rates, c), cum)
+    if is_exp.any():
+        cum = np.where(is_exp, exponential_cum(t, qi, Di, rates, c), cum)
+    return cum
+
+def harmonic_cum(t, qi, Di, rates, c):
+    # Cumulative production from time zero to t for Arps' harmonic decline
+    # INPUTS:
+    #   t                       Times (days), broadcastable against parameters
+    #   qi, Di                  Decline parameters, broadcastable arrays
+    #   rates                   Rates at t
+    #   c                       Days in year
+    # OUTPUTS:
+    #   cum                     Cumulative production at t
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        cum = qi / Di * np.log1p(Di * t / c) * c
+    return np.where(Di == 0, qi * t, cum)
+
+def exponential_cum(t, qi, Di, rates, c):
+    # Cumulative production from time zero to t for Arps' exponential decline
+    # INPUTS:
+    #   t                       Times (days), broadcastable against parameters
+    #   qi, Di                  Decline parameters, broadcastable arrays
+    #   rates                   Rates at t
+    #   c                       Days in year
+    # OUTPUTS:
+    #   cum                     Cumulative production at t
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        cum = (qi - rates) / Di * c
+    return np.where(Di == 0, qi * t, cum)
+
+def broadcast_parameters(time_vector, *parameters):
+    # Shapes time_vector and decline parameters for broadcasting
+    # Parameters become column vectors of shape (N, 1), time_vector becomes
+    # a row vector of shape (1, T + 1) unless it is already per-well
+    # INPUTS:
+    #   time_vector             Shape (T + 1,) or (N, T + 1)
+    #   *parameters             Scalars or vectors of size N
+    # OUTPUTS:
+    #   t                       2-D time array
+    #   *parameters             2-D parameter columns
+
+    t = np.atleast_2d(np.asarray(time_vector, dtype = float))
+    columns = [np.asarray(p, dtype = float).reshape(-1, 1) for p in parameters]
+    return (t, *columns)
+
+def stack_forecast(rates, cum):
+    # Converts rates and cumulative production at each time into the
+    # (N, T, 3) forecast array
+    # INPUTS:
+    #   rates                   Rates at each time, shape (N, T + 1)
+    #   cum                     Cumulative production at each time, shape (N, T + 1)
+    # OUTPUTS:
+    #   forecast                Array of shape (N, T, 3)
+
+    rates = np.broadcast_to(rates, np.broadcast_shapes(rates.shape, cum.shape))
+    cum = np.broadcast_to(cum, rates.shape)
+    forecast = np.empty(rates.shape[:-1] + (rates.shape[-1] - 1, 3))
+    forecast[..., 0] = rates[..., :-1]
+    forecast[..., 1] = rates[..., 1:]
+    forecast[..., 2] = np.diff(cum, axis = -1)
+    return forecast
\ No newline at end of file
@@ -6,6 +6,7 @@ from .. import helper_functions as helpers
 # Exponential decline is appropriate for reservoirs experiencing volumetric drainage
 # Will generate a straight-line forecast on a semilog plot of rate vs time (y = log, x = cartesian)
 
+@helpers.instrumented('decline/exponential')
 def calc_exponential_forecast(time_vector, **kwargs):
     # Calculates exponential decline rates and volumes, formatted for timeseries
     # dataframe in case.py
@@ -13,18 +14,19 @@ def calc_exponential_forecast(time_vector, **kwargs):
     #   time_vector             Instantaneous times for forecast, in numpy array
     #   qi                      Initial rate
     #   Di                      Nominal initial decline rate
+    #   settings                Settings object, defaults to read_settings()
     # OUTPUTS:
     #   forecast                Full rate forecast as an array - 1st column contains
     #                           entry rates, 2nd column contains exit rates,
     #                           3rd column contains cumulative production volumes
 
-    qi, Di = kwargs['qi'], kwargs['Di']
-    rate_vector = calc_exponential_rates(time_vector, qi, Di)
+    qi, Di, settings = kwargs['qi'], kwargs['Di'], kwargs.get('settings')
+    rate_vector = calc_exponential_rates(time_vector, qi, Di, settings)
     entry_rates, exit_rates = helpers.vector_to_endpoints(rate_vector)
-    vols_vector = calc_exponential_volumes(rate_vector, Di)
+    vols_vector = calc_exponential_volumes(rate_vector, Di, settings)
     return np.array([entry_rates, exit_rates, vols_vector]).transpose()
 
-def calc_exponential_rates(time_vector, qi, Di):
+def calc_exponential_rates(time_vector, qi, Di, settings = None):
     # Calculates rates along time_vector per inputs qi and Di using Arps' exponential
     # decline
     # INPUTS:
@@ -34,11 +36,11 @@ def calc_exponential_rates(time_vector, qi, Di):
     # OUTPUTS:
     #   rate_vector             Vector of rates
 
-    c = helpers.read_settings()['days_in_year']
+    c = helpers.get_setting('days_in_year', settings)
     rate_vector = qi * np.exp(-Di * time_vector * (1 / c))
     return rate_vector
 
-def calc_exponential_volumes(rate_vector, Di):
+def calc_exponential_volumes(rate_vector, Di, settings = None):
     # Calculates volumes integral for exponential decline between rates in 
     # rate_vector
     # INPUTS:
@@ -47,6 +49,6 @@ def calc_exponential_volumes(rate_vector, Di):
     # OUTPUTS:
     #   vols_vector             Vector of volumes
 
-    c = helpers.read_settings()['days_in_year']
+    c = helpers.get_setting('days_in_year', settings)
     vols_vector = (rate_vector[:-1] - rate_vector[1:]) * c / Di
     return vols_vector
\ No newline at end of file
@@ -0,0 +1,304 @@
+import warnings
+import numpy as np
+from .. import helper_functions as helpers
+
+# fitting.py fits Arps decline parameters to monthly production history for many
+# wells at once
+#
+# Observed rates are monthly volumes divided by days in month, placed at the middle
+# of each month. Residuals are taken in log rate, so the fit weighs early high rates
+# and late low rates alike and qi is fitted as log(qi), which keeps it positive
+#
+# All wells are solved together by one vectorized Levenberg-Marquardt iteration.
+# Each iteration builds every well's normal equations from the analytic Jacobian of
+# the log Arps rate equation and solves them as a stack of small (2x2 or 3x3)
+# systems - there is no per-well optimizer call
+#
+#   PARAMETERS FITTED:
+#       'exponential'           log(qi), Di
+#       'harmonic'              log(qi), Di                 (b = 1)
+#       'hyperbolic'            log(qi), Di, b
+#       'modified hyperbolic'   log(qi), Di, b              (Dt given, not fitted)
+#
+#   For modified hyperbolic the Jacobian is the hyperbolic Jacobian at
+#   min(t, t_switch): at t_switch the hyperbolic decline equals Dt, so moving the
+#   switch point does not change the rate to first order
+#
+# Months with zero, negative or missing production are left out of the fit
+
+# Default parameter bounds, Di as nominal annual decline
+FIT_BOUNDS = {
+    'Di':               (0.0, 50.0),
+    'b':                (0.01, 2.0)
+}
+
+# Robust loss functions of z = (residual / f_scale) ** 2, as (rho(z), rho'(z))
+LOSS_FUNCTIONS = {
+    'linear':           (lambda z: z, lambda z: np.ones_like(z)),
+    'huber':            (lambda z: np.where(z <= 1, z, 2 * np.sqrt(z) - 1), lambda z: np.where(z <= 1, 1, 1 / np.sqrt(np.maximum(z, 1)))),
+    'soft_l1':          (lambda z: 2 * (np.sqrt(1 + z) - 1), lambda z: 1 / np.sqrt(1 + z)),
+    'cauchy':           (lambda z: np.log1p(z), lambda z: 1 / (1 + z))
+}
+
+@helpers.instrumented('decline/fit')
+def fit_decline_batch(history, forecast_type = 'hyperbolic', Dte = None, loss = 'soft_l1', f_scale = 0.25, outlier_threshold = 3.0,
+                      bounds = None, max_iterations = 100, tolerance = 1e-8, settings = None, days = None):
+    # Fits decline parameters to the monthly production history of every well
+    # INPUTS:
+    #   history                 Monthly volumes, shape [months] or [wells, months]
+    #                           Month 0 is the first month of the forecast fitted
+    #   forecast_type           'exponential', 'harmonic', 'hyperbolic' or 'modified hyperbolic'
+    #   Dte                     Terminal decline (secant effective), scalar or vector,
+    #                           required for modified hyperbolic
+    #   loss                    Robust loss, one of LOSS_FUNCTIONS
+    #   f_scale                 Residual (in log rate) where the robust loss starts
+    #                           to down-weight points
+    #   outlier_threshold       Months further than this many robust standard
+    #                           deviations from the first fit are dropped and the
+    #                           well refitted. None disables outlier rejection
+    #   bounds                  Dictionary overriding FIT_BOUNDS
+    #   max_iterations          Iteration limit per fit
+    #   tolerance               Relative change in cost at which a well is converged
+    #   settings                Settings object, defaults to read_settings()
+    #   days                    Day count of every history month, [months], e.g.
+    #                           time_grids.calc_month_lengths for calendar months.
+    #                           Default settings days_in_month
+    # OUTPUTS:
+    #   fit                     Dictionary of vectors, one entry per well:
+    #                           'qi', 'De', 'b', 'Dte'      generate_forecast inputs
+    #                           'Di', 'Dt'                  nominal declines
+    #                           'rmse'                      RMS residual in log rate
+    #                           'points', 'outliers'        months used and dropped
+    #                           'converged'                 bool
+    #                           Wells with too few producing months are NaN
+
+    settings = helpers.read_settings() if settings is None else settings
+    history = np.atleast_2d(np.asarray(history, dtype = float))
+    wells, months = history.shape
+    bounds = {**FIT_BOUNDS, **(bounds or {})}
+
+    days = np.full(months, settings['days_in_month']) if days is None else np.asarray(days, dtype = float)
+    rates = history / days
+    tau = (np.cumsum(days) - days / 2) / settings['days_in_year']
+    mask = np.isfinite(rates) & (rates > 0)
+    log_rates = np.log(np.where(mask, rates, 1))
+
+    if forecast_type == 'modified hyperbolic':
+        if Dte is None:
+            raise ValueError('modified hyperbolic fits need Dte')
+        Dt = np.broadcast_to(helpers.secant_to_nominal(np.asarray(Dte, dtype = float), 'exponential'), (wells,))
+    else:
+        Dt = np.full(wells, np.nan)
+
+    theta, lower, upper = initial_parameters(tau, log_rates, mask, forecast_type, bounds)
+    model = lambda theta, wells = slice(None): log_rate_model(tau, theta, forecast_type, Dt[wells])
+    objective = (LOSS_FUNCTIONS[loss], f_scale)
+
+    theta, converged = levenberg_marquardt(model, theta, lower, upper, log_rates, mask, objective, max_iterations, tolerance)
+    outliers = np.zeros(wells, dtype = int)
+    if outlier_threshold is not None:
+        residuals = model(theta)[0] - log_rates
+        dropped = find_outliers(residuals, mask, outlier_threshold)
+        outliers = dropped.sum(axis = 1)
+        if outliers.any():
+            mask = mask & ~dropped
+            theta, converged = levenberg_marquardt(model, theta, lower, upper, log_rates, mask, objective, max_iterations, tolerance)
+
+    residuals = np.where(mask, model(theta)[0] - log_rates, 0)
+    points = mask.sum(axis = 1)
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        rmse = np.sqrt((residuals ** 2).sum(axis = 1) / points)
+
+    fitted = points >= theta.shape[1]
+    qi, Di = np.exp(theta[:, 0]), theta[:, 1]
+    b = theta[:, 2] if theta.shape[1] > 2 else np.full(wells, 1.0 if forecast_type == 'harmonic' else 0.0)
+    De = helpers.nominal_to_secant(Di, 'exponential' if forecast_type == 'exponential' else 'hyperbolic', b)
+
+    nan = lambda values: np.where(fitted, values, np.nan)
+    return {
+        'qi':           nan(qi),
+        'De':           nan(De),
+        'b':            nan(b),
+        'Dte':          np.asarray(np.broadcast_to(np.nan if Dte is None else Dte, (wells,)), dtype = float),
+        'Di':           nan(Di),
+        'Dt':           Dt.astype(float),
+        'rmse':         nan(rmse),
+        'points':       points,
+        'outliers':     outliers,
+        'converged':    converged & fitted
+    }
+
+def fit_to_forecasts(fit, phase, forecast_type = 'hyperbolic', start = None):
+    # Turns a batch fit into generate_forecast keyword arguments, one dictionary
+    # per well, e.g. for the 'forecasts' list of a case workflow
+    # INPUTS:
+    #   fit                     Dictionary from fit_decline_batch
+    #   phase                   Phase the history belongs to
+    #   forecast_type           Forecast type that was fitted
+    #   start                   First history month (forecast start), scalar or list per well
+    # OUTPUTS:
+    #   forecasts               List of dictionaries, None where a well could not be fitted
+
+    wells = len(fit['qi'])
+    starts = start if isinstance(start, (list, tuple, np.ndarray)) else [start] * wells
+    forecasts = []
+    for well in range(wells):
+        if np.isnan(fit['qi'][well]):
+            forecasts.append(None)
+            continue
+        forecast = {
+            'phase':            phase,
+            'forecast_type':    forecast_type,
+            'qi':               float(fit['qi'][well]),
+            'De':               float(fit['De'][well]),
+            'start':            starts[well]
+        }
+        if forecast_type in ('hyperbolic', 'modified hyperbolic'):
+            forecast['b'] = float(fit['b'][well])
+        if forecast_type == 'modified hyperbolic':
+            forecast['Dte'] = float(fit['Dte'][well])
+        forecasts.append(forecast)
+    return forecasts
+
+def initial_parameters(tau, log_rates, mask, forecast_type, bounds):
+    # Starting point and bounds of the fit from a log-linear (exponential)
+    # regression of every well
+    # OUTPUTS:
+    #   theta                   Starting parameters, [wells, parameters]
+    #   lower, upper            Parameter bounds, [parameters]
+
+    weights = mask.astype(float)
+    count = np.maximum(weights.sum(axis = 1), 1)
+    mean_tau = (weights * tau).sum(axis = 1) / count
+    mean_log = (weights * log_rates).sum(axis = 1) / count
+    spread = (weights * (tau - mean_tau[:, None]) ** 2).sum(axis = 1)
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        slope = np.where(spread > 0, (weights * (tau - mean_tau[:, None]) * (log_rates - mean_log[:, None])).sum(axis = 1) / spread, 0)
+    intercept = mean_log - slope * mean_tau
+
+    Di = np.clip(-slope, *bounds['Di'])
+    lower, upper = [-np.inf, bounds['Di'][0]], [np.inf, bounds['Di'][1]]
+    columns = [intercept, Di]
+    if forecast_type in ('hyperbolic', 'modified hyperbolic'):
+        # Hyperbolic declines start steeper than their average exponential decline
+        columns = [intercept + 0.1, np.clip(1.5 * Di + 0.05, *bounds['Di']), np.full(len(Di), np.clip(1.0, *bounds['b']))]
+        lower.append(bounds['b'][0])
+        upper.append(bounds['b'][1])
+    return np.column_stack(columns), np.array(lower), np.array(upper)
+
+def log_rate_model(tau, theta, forecast_type, Dt):
+    # Log rates and their Jacobian for every well
+    # INPUTS:
+    #   tau                     Times of the observed rates (years), [months]
+    #   theta                   Parameters, [wells, parameters]
+    #   forecast_type           Forecast type fitted
+    #   Dt                      Nominal terminal declines, [wells]
+    # OUTPUTS:
+    #   log_q                   Log rates, [wells, months]
+    #   jacobian                d log_q / d theta, [wells, months, parameters]
+
+    log_qi, Di = theta[:, :1], theta[:, 1:2]
+    jacobian = np.empty(theta.shape[:1] + tau.shape + theta.shape[1:])
+    jacobian[..., 0] = 1
+
+    if forecast_type == 'exponential':
+        jacobian[..., 1] = -tau
+        return log_qi - Di * tau, jacobian
+
+    b = theta[:, 2:3] if theta.shape[1] > 2 else np.ones_like(Di)
+    tau_hyp = tau
+    if forecast_type == 'modified hyperbolic':
+        Dt = Dt[:, None]
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            tau_switch = np.where(Di > Dt, (Di / Dt - 1) / (b * Di), 0)
+        tau_hyp = np.minimum(tau, tau_switch)
+
+    growth = b * Di * tau_hyp
+    log_growth = np.log1p(growth)
+    log_q = log_qi - log_growth / b
+    jacobian[..., 1] = -tau_hyp / (1 + growth)
+    if theta.shape[1] > 2:
+        jacobian[..., 2] = log_growth / b ** 2 - Di * tau_hyp / (b * (1 + growth))
+    if forecast_type == 'modified hyperbolic':
+        log_q = log_q - Dt * (tau - tau_hyp)
+    return log_q, jacobian
+
+def levenberg_marquardt(model, theta, lower, upper, log_rates, mask, objective, max_iterations, tolerance):
+    # Bounded, robust Levenberg-Marquardt iteration run on every well together
+    # Steps are projected onto the bounds and a well only moves when its robust
+    # cost decreases, otherwise its damping is raised. A parameter sitting on a
+    # bound that the gradient pushes against is held there, and the step is solved
+    # for the others only, so fits that end on a bound (e.g. b of a near-linear
+    # decline) still converge
+    # INPUTS:
+    #   model                   Function (theta, wells) -> (log rates, jacobian)
+    #   theta                   Starting parameters, [wells, parameters]
+    #   lower, upper            Parameter bounds, [parameters]
+    #   log_rates               Observed log rates, [wells, months]
+    #   mask                    Months used in the fit, [wells, months]
+    #   objective               (loss function pair, f_scale)
+    #   max_iterations          Iteration limit
+    #   tolerance               Relative change in cost at which a well is converged
+    # OUTPUTS:
+    #   theta                   Fitted parameters
+    #   converged               Bool per well
+
+    (rho, rho_prime), f_scale = objective
+
+    def evaluate(theta, wells):
+        log_q, jacobian = model(theta, wells)
+        residuals = np.where(mask[wells], log_q - log_rates[wells], 0)
+        z = (residuals / f_scale) ** 2
+        return residuals, jacobian, (rho(z) * mask[wells]).sum(axis = 1), rho_prime(z) * mask[wells]
+
+    theta = theta.copy()
+    residuals, jacobian, cost, weights = evaluate(theta, slice(None))
+    damping = np.full(len(theta), 1e-3)
+    converged = mask.sum(axis = 1) < theta.shape[1]
+    identity = np.eye(theta.shape[1])
+
+    # Only wells still iterating are evaluated, converged wells drop out
+    active = np.flatnonzero(~converged)
+    for _ in range(max_iterations):
+        if not len(active):
+            break
+        weighted = jacobian[active] * weights[active, :, None]
+        normal = np.matmul(weighted.transpose(0, 2, 1), jacobian[active])
+        gradient = np.matmul(weighted.transpose(0, 2, 1), residuals[active, :, None])
+        scale = np.diagonal(normal, axis1 = 1, axis2 = 2) + 1e-12
+        damped = normal + damping[active, None, None] * scale[:, :, None] * identity
+
+        pinned = ((theta[active] <= lower) & (gradient[..., 0] > 0)) | ((theta[active] >= upper) & (gradient[..., 0] < 0))
+        free = ~pinned
+        damped = np.where(free[:, :, None] & free[:, None, :], damped, identity)
+        step = -np.linalg.solve(damped, gradient * free[:, :, None])[..., 0]
+
+        trial = np.clip(theta[active] + step, lower, upper)
+        trial_residuals, trial_jacobian, trial_cost, trial_weights = evaluate(trial, active)
+        better = trial_cost < cost[active]
+        change = np.abs(cost[active] - trial_cost) <= tolerance * np.maximum(cost[active], 1e-12)
+        converged[active] = (better & change) | (np.abs(trial - theta[active]).max(axis = 1) < tolerance)
+
+        moved = active[better]
+        theta[moved] = trial[better]
+        residuals[moved] = trial_residuals[better]
+        jacobian[moved] = trial_jacobian[better]
+        weights[moved] = trial_weights[better]
+        cost[moved] = trial_cost[better]
+        damping[active] = np.clip(np.where(better, damping[active] / 3, damping[active] * 4), 1e-10, 1e10)
+        active = active[~converged[active]]
+
+    return theta, converged
+
+def find_outliers(residuals, mask, threshold):
+    # Flags months whose residual is more than threshold robust standard
+    # deviations (1.4826 x median absolute deviation) from the well's median residual
+
+    masked = np.where(mask, residuals, np.nan)
+    with warnings.catch_warnings():
+        # Wells without producing months give all-NaN rows
+        warnings.simplefilter('ignore', RuntimeWarning)
+        median = np.nanmedian(masked, axis = 1, keepdims = True)
+        spread = 1.4826 * np.nanmedian(np.abs(masked - median), axis = 1, keepdims = True)
+    with np.errstate(invalid = 'ignore'):
+        return mask & (spread > 0) & (np.abs(masked - median) > threshold * spread)
\ No newline at end of file
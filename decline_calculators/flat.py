@@ -6,21 +6,23 @@ from .. import helper_functions as helpers
 # Flat forecasts do not represent a particular form of flow or drainage,
 # but are useful when creating custom forecasts
 
+@helpers.instrumented('decline/flat')
 def calc_flat_forecast(time_vector, **kwargs):
     # Calculates flat rates and volumes, formatted for timeseries
     # dataframe in case.py
     # INPUTS:
     #   time_vector             Instantaneous times for forecast, in numpy array\
     #   qi                      Initial rate, will not change
+    #   settings                Settings object, defaults to read_settings()
     # OUTPUTS:
     #   forecast                Full rate forecast as an array - 1st column
     #                           contains entry rates, 2nd column contains exit rates,
     #                           3rd column contains cumulative production volumes
 
-    qi = kwargs['qi']
+    qi, settings = kwargs['qi'], kwargs.get('settings')
     rate_vector = calc_flat_rates(time_vector, qi)
     entry_rates, exit_rates = helpers.vector_to_endpoints(rate_vector)
-    vols_vector = calc_flat_volumes(rate_vector)
+    vols_vector = calc_flat_volumes(rate_vector, settings, time_vector)
     return np.array([entry_rates, exit_rates, vols_vector]).transpose()
 
 def calc_flat_rates(time_vector, qi):
@@ -34,13 +36,17 @@ def calc_flat_rates(time_vector, qi):
     rate_vector = np.array([qi] * (time_vector.size))
     return rate_vector
 
-def calc_flat_volumes(rate_vector):
+def calc_flat_volumes(rate_vector, settings = None, time_vector = None):
     # Calculates volume per timestep at rate = qi
     # INPUTS:
     #   rate_vector             Instantaneous rates for forecast, in numpy array
+    #   time_vector             Instantaneous times for forecast, for timesteps of
+    #                           any length. Default days_in_month timesteps
     # OUTPUTS:
     #   vols_vector             Vector of volumes
 
-    c = helpers.read_settings()['days_in_month']
+    if time_vector is not None:
+        return rate_vector[:-1] * np.diff(time_vector)
+    c = helpers.get_setting('days_in_month', settings)
     vols_vector = rate_vector[:-1] * c
     return vols_vector
\ No newline at end of file
@@ -11,6 +11,7 @@ from . import harmonic as har
 # If b = 1, these functions will instead pass their inputs to their
 # harmonic counterparts in "harmonic.py"
 
+@helpers.instrumented('decline/hyperbolic')
 def calc_hyperbolic_forecast(time_vector, **kwargs):
     # Calculates hyperbolic decline rates and volumes, formatted for timeseries
     # dataframe in case.py
@@ -19,23 +20,24 @@ def calc_hyperbolic_forecast(time_vector, **kwargs):
     #   qi                      Initial rate
     #   Di                      Nominal initial decline rate
     #   b                       b-factor
+    #   settings                Settings object, defaults to read_settings()
     # OUTPUTS:
     #   forecast                Full rate forecast as an array - 1st column
     #                           contains entry rates, 2nd column contains exit rates,
     #                           3rd column contains cumulative production volumes
 
-    qi, Di, b = kwargs['qi'], kwargs['Di'], kwargs['b']
+    qi, Di, b, settings = kwargs['qi'], kwargs['Di'], kwargs['b'], kwargs.get('settings')
 
     if b != 1:
-        rate_vector = calc_hyperbolic_rates(time_vector, qi, Di, b)
+        rate_vector = calc_hyperbolic_rates(time_vector, qi, Di, b, settings)
         entry_rates, exit_rates = helpers.vector_to_endpoints(rate_vector)
-        vols_vector = calc_hyperbolic_volumes(time_vector, rate_vector, Di, b)
+        vols_vector = calc_hyperbolic_volumes(time_vector, rate_vector, Di, b, settings)
         return np.array([entry_rates, exit_rates, vols_vector]).transpose()
     else:
-        return har.calc_harmonic_forecast(time_vector, qi, Di)
+        return har.calc_harmonic_forecast(time_vector, qi = qi, Di = Di, settings = settings)
     
 
-def calc_hyperbolic_rates(time_vector, qi, Di, b):
+def calc_hyperbolic_rates(time_vector, qi, Di, b, settings = None):
     # Calculates rates along time_vector per inputs qi and Di using Arps'
     # hyperbolic decline
     # INPUTS:
@@ -47,13 +49,13 @@ def calc_hyperbolic_rates(time_vector, qi, Di, b):
     #   rate_vector             Vector of rates
 
     if b != 1:
-        c = helpers.read_settings()['days_in_year']
+        c = helpers.get_setting('days_in_year', settings)
         rate_vector = qi / (1 + b * Di * time_vector / c) ** (1 / b)
         return rate_vector
     else:
-        return har.calc_harmonic_rates(time_vector, qi, Di)
+        return har.calc_harmonic_rates(time_vector, qi, Di, settings)
 
-def calc_hyperbolic_volumes(time_vector, rate_vector, Di, b):
+def calc_hyperbolic_volumes(time_vector, rate_vector, Di, b, settings = None):
     # Calculates volumes integral for hyperbolic decline between rates in 
     # rate_vector
     # INPUTS:
@@ -64,9 +66,9 @@ def calc_hyperbolic_volumes(time_vector, rate_vector, Di, b):
     #   vols_vector             Vector of volumes
 
     if b != 1:
-        c = helpers.read_settings()['days_in_year']
+        c = helpers.get_setting('days_in_year', settings)
         Di_moving = Di / (1 + b * Di * time_vector[:-1] / c)
         vols_vector = ((rate_vector[:-1] ** b) / ((1 - b) * Di_moving)) * (rate_vector[:-1] ** (1 - b) - rate_vector[1:] ** (1 - b)) * c
         return vols_vector
     else:
-        return har.calc_harmonic_volumes(time_vector, rate_vector, Di)
\ No newline at end of file
+        return har.calc_harmonic_volumes(time_vector, rate_vector, Di, settings)
\ No newline at end of file
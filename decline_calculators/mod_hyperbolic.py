@@ -9,6 +9,7 @@ from .. import helper_functions as helpers
 #   decline until the time where "terminal" decline rate is reached. At this point they carry
 #   forward in time with Arps' exponential decline
 
+@helpers.instrumented('decline/modified hyperbolic')
 def calc_mod_hyperbolic_forecast(time_vector, **kwargs):
     # Calculates modified hyperbolic decline rates and volumes, formatted for timeseries
     # dataframe in case.py
@@ -18,24 +19,31 @@ def calc_mod_hyperbolic_forecast(time_vector, **kwargs):
     #   Di                      Nominal initial decline rate
     #   b                       b-factor
     #   Dt                      Terminal decline rate
+    #   settings                Settings object, defaults to read_settings()
     # OUTPUTS:
     #   forecast                Full rate forecast as an array - 1st column
     #                           contains entry rates, 2nd column contains exit rates,
     #                           3rd column contains cumulative production volumes
 
-    qi, Di, b, Dt = kwargs['qi'], kwargs['Di'], kwargs['b'], kwargs['Dt']
-    t_switch, q_switch = terminal_switch(qi, Di, b, Dt)
+    qi, Di, b, Dt, settings = kwargs['qi'], kwargs['Di'], kwargs['b'], kwargs['Dt'], kwargs.get('settings')
+    t_switch, q_switch = terminal_switch(qi, Di, b, Dt, settings = settings)
 
-    rate_vector_hyp = hyp.calc_hyperbolic_rates(time_vector[time_vector <= t_switch], qi, Di, b)
-    rate_vector_exp = exp.calc_exponential_rates(time_vector[time_vector > t_switch] - t_switch, q_switch, Dt)
+    # Switch after the last time - the whole forecast is on the hyperbolic stem
+    if t_switch >= time_vector[-1]:
+        return hyp.calc_hyperbolic_forecast(time_vector, qi = qi, Di = Di, b = b, settings = settings)
+
+    rate_vector_hyp = hyp.calc_hyperbolic_rates(time_vector[time_vector <= t_switch], qi, Di, b, settings)
+    rate_vector_exp = exp.calc_exponential_rates(time_vector[time_vector > t_switch] - t_switch, q_switch, Dt, settings)
     rate_vector = np.concatenate([rate_vector_hyp, rate_vector_exp])
     entry_rates, exit_rates = helpers.vector_to_endpoints(rate_vector)
 
-    vols_vector = calc_mod_hyperbolic_volumes(time_vector[time_vector <= t_switch], rate_vector_hyp, rate_vector_exp, Di, Dt, b, t_switch, q_switch)
+    vols_vector = calc_mod_hyperbolic_volumes(
+        time_vector[time_vector <= t_switch], rate_vector_hyp, rate_vector_exp, Di, Dt, b, t_switch, q_switch, settings
+    )
 
     return np.array([entry_rates, exit_rates, vols_vector]).transpose()
 
-def calc_mod_hyperbolic_rates(time_vector, qi, Di, Dt, b, t_switch, q_switch):
+def calc_mod_hyperbolic_rates(time_vector, qi, Di, Dt, b, t_switch, q_switch, settings = None):
     # Calculates rates along time_vector per inputs qi and Di using Arps'
     # hyperbolic decline
     # INPUTS:
@@ -48,11 +56,11 @@ def calc_mod_hyperbolic_rates(time_vector, qi, Di, Dt, b, t_switch, q_switch):
     # OUTPUTS:
     #   rate_vector             Vector of rates
 
-    rate_vector_hyp = hyp.calc_hyperbolic_rates(time_vector[time_vector <= t_switch], qi, Di, b)
-    rate_vector_exp = exp.calc_exponential_rates(time_vector[time_vector > t_switch] - t_switch, q_switch, Dt)
+    rate_vector_hyp = hyp.calc_hyperbolic_rates(time_vector[time_vector <= t_switch], qi, Di, b, settings)
+    rate_vector_exp = exp.calc_exponential_rates(time_vector[time_vector > t_switch] - t_switch, q_switch, Dt, settings)
     return np.concatenate([rate_vector_hyp, rate_vector_exp])
 
-def calc_mod_hyperbolic_volumes(time_vector_hyp, rate_vector_hyp, rate_vector_exp, Di, Dt, b, t_switch, q_switch):
+def calc_mod_hyperbolic_volumes(time_vector_hyp, rate_vector_hyp, rate_vector_exp, Di, Dt, b, t_switch, q_switch, settings = None):
     # Calculates volume integral for hyperbolic decline between rates in rate_vector_hyp and rate_vector_exp
     # This function bridges the forecasts during the month where the switch occurs, calculating the sum
     # of both the hyperbolic and exponential leg in that one month
@@ -67,21 +75,21 @@ def calc_mod_hyperbolic_volumes(time_vector_hyp, rate_vector_hyp, rate_vector_ex
     # OUTPUTS:
     #   vols_vector             Vector of volumes
 
-    vols_vector_hyperbolic = hyp.calc_hyperbolic_volumes(time_vector_hyp, rate_vector_hyp, Di, b)
+    vols_vector_hyperbolic = hyp.calc_hyperbolic_volumes(time_vector_hyp, rate_vector_hyp, Di, b, settings)
 
     switch_month_hyp_time = np.array([time_vector_hyp[-1], t_switch])
     switch_month_hyp_rates = np.array([rate_vector_hyp[-1], q_switch])
-    switch_month_hyp_vols = hyp.calc_hyperbolic_volumes(switch_month_hyp_time, switch_month_hyp_rates, Di, b)
+    switch_month_hyp_vols = hyp.calc_hyperbolic_volumes(switch_month_hyp_time, switch_month_hyp_rates, Di, b, settings)
 
     switch_month_exp_rates = np.array([q_switch, rate_vector_exp[0]])
-    switch_month_exp_vols = exp.calc_exponential_volumes(switch_month_exp_rates, Dt)
+    switch_month_exp_vols = exp.calc_exponential_volumes(switch_month_exp_rates, Dt, settings)
 
     vol_switch = switch_month_hyp_vols + switch_month_exp_vols
 
-    vols_vector_exponential = exp.calc_exponential_volumes(rate_vector_exp, Dt)
+    vols_vector_exponential = exp.calc_exponential_volumes(rate_vector_exp, Dt, settings)
     return np.concatenate([vols_vector_hyperbolic, vol_switch, vols_vector_exponential])
 
-def calc_t_switch(Di, b, Dt):
+def calc_t_switch(Di, b, Dt, settings = None):
     # Calculates point in time when the switch from hyperbolic to exponential decline occurs
     # Applicable only for modified hyperbolic declines
     # INPUTS:
@@ -92,10 +100,10 @@ def calc_t_switch(Di, b, Dt):
     #   t_switch                Time to switch from hyperbolic to exponential (years)
     # UPDATE IN DECLINE_HELPERS.PY IF CHANGED
 
-    c = helpers.read_settings()['days_in_year']
+    c = helpers.get_setting('days_in_year', settings)
     return (Di / Dt - 1) / (b * Di) * c
 
-def calc_q_switch(qi, Di, b, t_switch):
+def calc_q_switch(qi, Di, b, t_switch, settings = None):
     # Calculates rate when the switch from hyperbolic to exponential decline occurs
     # Applicable only for modified hyperbolic declines
     # INPUTS:
@@ -107,10 +115,10 @@ def calc_q_switch(qi, Di, b, t_switch):
     #   q_switch                Rate when switch from hyperbolic to exponential occurs
     # UPDATE IN DECLINE_HELPERS.PY IF CHANGED
 
-    c = helpers.read_settings()['days_in_year']
+    c = helpers.get_setting('days_in_year', settings)
     return qi * (1 + b * Di * t_switch * (1 / c)) ** (-1 / b)
 
-def terminal_switch(qi, Di, b, Dt, Di_type = 'nominal', Dt_type = 'nominal'):
+def terminal_switch(qi, Di, b, Dt, Di_type = 'nominal', Dt_type = 'nominal', settings = None):
     # Packages calculations for hyperbolic to exponential transition
     # Applicable only for modified hyperbolic declines
     # INPUTS:
@@ -121,6 +129,7 @@ def terminal_switch(qi, Di, b, Dt, Di_type = 'nominal', Dt_type = 'nominal'):
     #   b                       b-factor
     #   Dt                      Terminal decline rate
     #   Di_type                 Initial decline rate type, default 'nominal'
+    #   settings                Settings object, defaults to read_settings()
     # OUTPUTS:
     #   t_switch                Time to switch from hyperbolic to exponential (years)
     #   q_switch                Rate when switch from hyperbolic to exponential occurs
@@ -132,7 +141,7 @@ def terminal_switch(qi, Di, b, Dt, Di_type = 'nominal', Dt_type = 'nominal'):
     if Dt_type == 'secant':
         Dt = helpers.secant_to_nominal(Dt, 'exponential')
     
-    t_switch = calc_t_switch(Di, b, Dt)
-    q_switch = calc_q_switch(qi, Di, b, t_switch)
+    t_switch = calc_t_switch(Di, b, Dt, settings)
+    q_switch = calc_q_switch(qi, Di, b, t_switch, settings)
 
     return t_switch, q_switch
\ No newline at end of file
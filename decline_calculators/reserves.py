@@ -0,0 +1,163 @@
+import numpy as np
+from .. import helper_functions as helpers
+from .batch import hyperbolic_rates, hyperbolic_cum, exponential_cum
+
+# reserves.py answers reserves questions in closed form, without building a forecast
+#
+#   calc_(declinetype)_cum:
+#       Cumulative production from time zero to time t
+#
+#   calc_(declinetype)_time_to_rate:
+#       Time at which the rate falls to a given rate. 0 if the well starts at or
+#       below it, inf if it never gets there (flat forecasts, zero decline, or a
+#       rate of zero)
+#
+#   calc_cum, calc_time_to_rate, calc_eur:
+#       Dispatch on forecast_type, same names as case.generate_forecast
+#
+# Every parameter (qi, Di, b, Dt, t, rate) may be a scalar or an array, and all
+# of them broadcast together element by element - one value per well, not a
+# wells x months grid. Times are in days and declines nominal, as in batch.py
+#
+# Volumes match the sum of the forecast volumes up to the same time
+
+def calc_exponential_cum(t, qi, Di, settings = None, **kwargs):
+
+    qi, Di, t = np.broadcast_arrays(*[np.asarray(value, dtype = float) for value in (qi, Di, t)])
+    c = helpers.get_setting('days_in_year', settings)
+    return exponential_cum(t, qi, Di, qi * np.exp(-Di * t / c), c)
+
+def calc_exponential_time_to_rate(rate, qi, Di, settings = None, **kwargs):
+
+    return calc_hyperbolic_time_to_rate(rate, qi, Di, b = 0, settings = settings)
+
+def calc_harmonic_cum(t, qi, Di, settings = None, **kwargs):
+
+    return calc_hyperbolic_cum(t, qi, Di, b = 1, settings = settings)
+
+def calc_harmonic_time_to_rate(rate, qi, Di, settings = None, **kwargs):
+
+    return calc_hyperbolic_time_to_rate(rate, qi, Di, b = 1, settings = settings)
+
+def calc_hyperbolic_cum(t, qi, Di, b, settings = None, **kwargs):
+    # b = 1 and b = 0 fall back to the harmonic and exponential integrals per element
+
+    qi, Di, b, t = np.broadcast_arrays(*[np.asarray(value, dtype = float) for value in (qi, Di, b, t)])
+    c = helpers.get_setting('days_in_year', settings)
+    return hyperbolic_cum(t, qi, Di, b, hyperbolic_rates(t, qi, Di, b, c), c)
+
+def calc_hyperbolic_time_to_rate(rate, qi, Di, b, settings = None, **kwargs):
+    # Inverse of the hyperbolic rate equation, t = c / (b * Di) * ((qi / q) ** b - 1)
+
+    qi, Di, b, rate = np.broadcast_arrays(*[np.asarray(value, dtype = float) for value in (qi, Di, b, rate)])
+    c = helpers.get_setting('days_in_year', settings)
+    with np.errstate(divide = 'ignore', invalid = 'ignore', over = 'ignore'):
+        ratio = qi / rate
+        time = np.where(b == 0, np.log(ratio), np.expm1(b * np.log(ratio)) / b) * c / Di
+    time = np.where((rate <= 0) | (Di <= 0), np.inf, time)
+    return np.where(qi <= rate, 0.0, time)
+
+def calc_mod_hyperbolic_cum(t, qi, Di, b, Dt, settings = None, **kwargs):
+    # Hyperbolic stem to t_switch, exponential stem at Dt from q_switch after it
+
+    qi, Di, b, Dt, t = np.broadcast_arrays(*[np.asarray(value, dtype = float) for value in (qi, Di, b, Dt, t)])
+    c = helpers.get_setting('days_in_year', settings)
+    t_switch, q_switch = calc_terminal_switch(qi, Di, b, Dt, c)
+
+    t_hyp = np.minimum(t, t_switch)
+    t_exp = np.where(t > t_switch, t - t_switch, 0)
+    cum_hyp = hyperbolic_cum(t_hyp, qi, Di, b, hyperbolic_rates(t_hyp, qi, Di, b, c), c)
+    return cum_hyp + exponential_cum(t_exp, q_switch, Dt, q_switch * np.exp(-Dt * t_exp / c), c)
+
+def calc_mod_hyperbolic_time_to_rate(rate, qi, Di, b, Dt, settings = None, **kwargs):
+    # Rates above q_switch are reached on the hyperbolic stem, lower rates on the
+    # exponential stem after t_switch
+
+    qi, Di, b, Dt, rate = np.broadcast_arrays(*[np.asarray(value, dtype = float) for value in (qi, Di, b, Dt, rate)])
+    c = helpers.get_setting('days_in_year', settings)
+    t_switch, q_switch = calc_terminal_switch(qi, Di, b, Dt, c)
+
+    time_hyp = calc_hyperbolic_time_to_rate(rate, qi, Di, b, settings)
+    time_exp = t_switch + calc_hyperbolic_time_to_rate(rate, q_switch, Dt, 0, settings)
+    return np.where(rate >= q_switch, time_hyp, time_exp)
+
+def calc_flat_cum(t, qi, **kwargs):
+
+    qi, t = np.broadcast_arrays(np.asarray(qi, dtype = float), np.asarray(t, dtype = float))
+    return qi * t
+
+def calc_flat_time_to_rate(rate, qi, **kwargs):
+
+    qi, rate = np.broadcast_arrays(np.asarray(qi, dtype = float), np.asarray(rate, dtype = float))
+    return np.where(qi <= rate, 0.0, np.inf)
+
+def calc_terminal_switch(qi, Di, b, Dt, c):
+    # Vectorized terminal_switch (mod_hyperbolic.py), as used by calc_mod_hyperbolic_batch
+    # Wells already at or below terminal decline switch at time zero, and b = 0 wells
+    # never switch
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        t_switch = np.where(b > 0, (Di / Dt - 1) / (b * Di) * c, np.inf)
+    t_switch = np.maximum(t_switch, 0)
+    q_switch = np.where(np.isinf(t_switch), 0, hyperbolic_rates(np.where(np.isinf(t_switch), 0, t_switch), qi, Di, b, c))
+    return t_switch, q_switch
+
+CUM_FUNCTIONS = {
+    'exponential':          calc_exponential_cum,
+    'harmonic':             calc_harmonic_cum,
+    'hyperbolic':           calc_hyperbolic_cum,
+    'flat':                 calc_flat_cum,
+    'modified hyperbolic':  calc_mod_hyperbolic_cum
+}
+
+TIME_TO_RATE_FUNCTIONS = {
+    'exponential':          calc_exponential_time_to_rate,
+    'harmonic':             calc_harmonic_time_to_rate,
+    'hyperbolic':           calc_hyperbolic_time_to_rate,
+    'flat':                 calc_flat_time_to_rate,
+    'modified hyperbolic':  calc_mod_hyperbolic_time_to_rate
+}
+
+def calc_cum(t, forecast_type = 'exponential', **kwargs):
+    # Cumulative production from time zero to t
+    # INPUTS:
+    #   t                       Times (days), scalar or array
+    #   forecast_type           Decline type, same names as case.generate_forecast
+    #   qi, Di, b, Dt           Decline parameters as in calc_batch_forecast
+    #   settings                Settings object, defaults to read_settings()
+    # OUTPUTS:
+    #   cum                     Cumulative production, broadcast shape of the inputs
+
+    return CUM_FUNCTIONS[forecast_type](t, **kwargs)
+
+def calc_time_to_rate(rate, forecast_type = 'exponential', **kwargs):
+    # Time at which the rate falls to rate
+    # INPUTS:
+    #   rate                    Rate, scalar or array
+    #   forecast_type           Decline type, same names as case.generate_forecast
+    #   qi, Di, b, Dt           Decline parameters as in calc_batch_forecast
+    # OUTPUTS:
+    #   time                    Days, 0 if qi <= rate, inf if the rate is never reached
+
+    return TIME_TO_RATE_FUNCTIONS[forecast_type](rate, **kwargs)
+
+def calc_eur(forecast_type = 'exponential', rate_limit = 0.0, max_time = None, **kwargs):
+    # Estimated ultimate recovery - cumulative production to the rate limit, or to
+    # max_time if the limit is reached later
+    # INPUTS:
+    #   forecast_type           Decline type, same names as case.generate_forecast
+    #   rate_limit              Economic limit rate, scalar or array
+    #   max_time                Time cap (days), e.g. the forecast duration, default none
+    #   qi, Di, b, Dt           Decline parameters as in calc_batch_forecast
+    # OUTPUTS:
+    #   eur                     EUR per element. Finite to a zero rate limit for
+    #                           exponential, b < 1 and modified hyperbolic declines,
+    #                           inf for flat and b >= 1 without max_time
+    #   time                    Days to the end of production, inf as for eur
+
+    time = calc_time_to_rate(rate_limit, forecast_type, **kwargs)
+    if max_time is not None:
+        time = np.minimum(time, max_time)
+    with np.errstate(invalid = 'ignore', over = 'ignore', divide = 'ignore'):
+        eur = calc_cum(time, forecast_type, **kwargs)
+    return eur, time
\ No newline at end of file
@@ -0,0 +1,147 @@
+import functools
+import numpy as np
+from .. import helper_functions as helpers
+from .batch import calc_batch_forecast
+
+# segments.py builds multi-segment forecasts as one ordered chain
+#
+# A chain is a list of segments, each a decline (any calc_batch_forecast type) or a
+# shut-in over a number of months. Segments follow each other without gaps:
+#
+#   continuity                  A segment without qi starts at the exit rate of the
+#                               last producing segment before it, so a decline picks
+#                               up where the previous one left off, and production
+#                               resumes after a shut-in at the rate it stopped at
+#   jumps                       A segment with qi starts at that rate (workovers,
+#                               refracs, flush production after a shut-in)
+#
+# Each segment is evaluated on its own time grid starting at zero, through
+# evaluate_segment. That function is memoized on the segment parameters and the
+# month lengths of the grid, so a type curve segment shared by many wells is
+# computed once per process (once per start month on a calendar grid).
+# Cached forecasts are read-only and shared - evaluate copies them into its output
+
+SHUT_IN = 'shut-in'
+
+class forecast_segment:
+
+    def __init__(self, forecast_type = 'exponential', months = None, qi = None, De = None, Dte = None, b = None):
+        # INPUTS:
+        #   forecast_type           Decline type as in case.generate_forecast, or 'shut-in'
+        #   months                  Segment length, None for the rest of the forecast
+        #                           (last segment only)
+        #   qi                      Initial rate, None to continue from the previous segment
+        #   De                      Initial decline rate, secant effective
+        #   Dte                     Terminal decline rate, secant effective
+        #   b                       b-factor
+
+        self.forecast_type = forecast_type
+        self.months = months
+        self.qi = qi
+        self.b = b
+        self.Di, self.Dt = (None, None) if forecast_type == SHUT_IN else helpers.parse_declines(De, Dte, b, forecast_type)
+
+    def __repr__(self):
+
+        return 'forecast_segment(' + self.forecast_type + ', months = ' + str(self.months) + ', qi = ' + str(self.qi) + ')'
+
+class forecast_chain:
+
+    def __init__(self, segments = None):
+        # INPUTS:
+        #   segments                List of forecast_segment objects or of their kwargs
+
+        self.segments = []
+        for segment in segments or []:
+            if isinstance(segment, dict):
+                self.add_segment(**segment)
+            else:
+                self.segments.append(segment)
+
+    def add_segment(self, forecast_type = 'exponential', months = None, qi = None, De = None, Dte = None, b = None):
+        # Appends a decline segment, see forecast_segment. Returns the chain
+
+        if self.segments and self.segments[-1].months is None:
+            raise ValueError('only the last segment of a forecast chain may run to the end of the forecast')
+        self.segments.append(forecast_segment(forecast_type, months, qi, De, Dte, b))
+        return self
+
+    def shut_in(self, months):
+        # Appends months of zero production. Returns the chain
+
+        return self.add_segment(SHUT_IN, months)
+
+    @property
+    def months(self):
+        # Length of the chain, None if the last segment runs to the end of the forecast
+
+        if self.segments and self.segments[-1].months is None:
+            return None
+        return sum(segment.months for segment in self.segments)
+
+    def evaluate(self, months = None, settings = None, time_vector = None):
+        # Forecast of the whole chain
+        # INPUTS:
+        #   months                  Forecast length. Cuts the chain short, and sets the
+        #                           length of an open-ended last segment. Default the
+        #                           chain length
+        #   settings                Settings object, defaults to read_settings()
+        #   time_vector             Month boundaries (days) from the chain start, at
+        #                           least months + 1 long, as case.time_vector. Default
+        #                           uniform settings days_in_month months
+        # OUTPUTS:
+        #   forecast                Array of shape (months, 3), as calc_(declinetype)_forecast
+
+        if months is None:
+            months = self.months
+            if months is None:
+                raise ValueError('forecast chain has an open-ended last segment, give months to evaluate')
+
+        settings = helpers.read_settings() if settings is None else settings
+        if time_vector is None:
+            month_lengths = np.full(months, settings['days_in_month'])
+        else:
+            month_lengths = np.diff(np.asarray(time_vector, dtype = float))
+            if len(month_lengths) < months:
+                raise ValueError('time_vector covers ' + str(len(month_lengths)) + ' months, the chain needs ' + str(months))
+        forecast = np.zeros((months, 3))
+        row, rate = 0, None
+        for segment in self.segments:
+            if row >= months:
+                break
+            length = months - row if segment.months is None else min(segment.months, months - row)
+            if segment.forecast_type == SHUT_IN:
+                row += length
+                continue
+
+            qi = rate if segment.qi is None else segment.qi
+            if qi is None:
+                raise ValueError('the first producing segment of a forecast chain needs qi')
+            values = evaluate_segment(
+                segment.forecast_type, float(qi), as_key(segment.Di), as_key(segment.b), as_key(segment.Dt),
+                tuple(month_lengths[row:row + length].tolist()), settings['days_in_year']
+            )
+            forecast[row:row + length] = values
+            row += length
+            rate = float(values[-1, 1]) if length else qi
+        return forecast
+
+def as_key(value):
+    # Parameter as a hashable cache key
+
+    return None if value is None else float(value)
+
+@functools.lru_cache(maxsize = 4096)
+def evaluate_segment(forecast_type, qi, Di, b, Dt, month_lengths, days_in_year):
+    # One segment on a time grid starting at zero, cached per process
+    # INPUTS:
+    #   month_lengths           Tuple of the day count of every month of the segment
+    # OUTPUTS:
+    #   forecast                Read-only array of shape (months, 3)
+
+    helpers.count_event('segment_cache_miss')
+    time_vector = np.concatenate([[0.0], np.cumsum(month_lengths)])
+    settings = {'days_in_year': days_in_year}
+    forecast = calc_batch_forecast(time_vector, forecast_type, qi = qi, Di = Di, b = b, Dt = Dt, settings = settings)[0]
+    forecast.flags.writeable = False
+    return forecast
\ No newline at end of file
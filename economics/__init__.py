@@ -0,0 +1,14 @@
+from .discounting import *
+from .metrics import *
+from .end_of_life import *
+from .reversion import *
+from .breakeven import *
+
+# Economics contains array functions that work on many cases at once
+#
+#   FORMAT:
+#       Cash flow inputs are arrays with months on the last axis, so a single
+#       case [months] and a portfolio [cases, months] go through the same code
+#
+#       Discount factors are matrices of shape [rates, months], so a full PV
+#       profile for every case is a single matrix product
\ No newline at end of file
@@ -0,0 +1,229 @@
+import numpy as np
+from .. import helper_functions as helpers
+from . import discounting as disc
+from .end_of_life import calc_economic_limit
+
+# breakeven.py solves breakeven prices and cost multiples for many cases at once
+#
+# Cash flow is linear in each breakeven variable x. Every month of operating
+# profit, net income and net cash flow is intercept + x * slope:
+#
+#   oil_price                   flat oil price replacing the deck. Slope is the net
+#                               oil and NGL volume after taxes, rev_int * (1 - tax
+#                               rate) * (oil_volume + ngl_volume * ngl_diff)
+#   gas_price                   flat gas price, rev_int * (1 - tax rate) * gas_volume * shrink
+#   opex_scale                  multiplier of net opex, slope -net_opex
+#   capex_scale                 multiplier of net capex, slope -net_capex (net cash
+#                               flow only)
+#
+# Taxes are proportional to net revenue, so the tax rate of each month is read
+# back as net_tax / net_revenue. The present value at any rate is then linear in
+# x too, and x for a target PV is one division per case. An IRR target is the
+# same solve - IRR = r exactly where PV at r is 0
+#
+# The economic limit also moves with x. The closed form is solved over the
+# limit the first estimate gives, and only cases whose limit differs at the
+# solution fall back to a bisection within BREAKEVEN_BOUNDS on the exact,
+# limit-aware PV. Limit months are taken whole (no partial months)
+#
+# Reversions break the linearity - payout, and with it the interests of every
+# later month, moves with x. Cases with reversions are solved by
+# solve_breakeven_exact instead, a bisection on the columns recalculated at
+# every step, see case.calc_breakevens
+
+BREAKEVEN_VARIABLES = ['oil_price', 'gas_price', 'opex_scale', 'capex_scale']
+
+# Search range of the fallback bisection
+BREAKEVEN_BOUNDS = {
+    'oil_price':        (0.0, 1000.0),
+    'gas_price':        (0.0, 100.0),
+    'opex_scale':       (0.0, 100.0),
+    'capex_scale':      (0.0, 100.0)
+}
+
+# Columns calc_sensitivities reads
+SENSITIVITY_COLUMNS = [
+    'oil_volume', 'gas_volume', 'ngl_volume', 'shrink', 'rev_int', 'oil_price', 'gas_price', 'ngl_diff',
+    'net_revenue', 'net_tax', 'net_opex', 'net_capex', 'operating_profit', 'net_income', 'net_cash_flow'
+]
+
+def calc_sensitivities(values, variable):
+    # Intercept and slope of the columns the economic limit and PV depend on
+    # INPUTS:
+    #   values                  Dictionary of SENSITIVITY_COLUMNS arrays, [months] or
+    #                           [cases, months], e.g. from calc_derived_columns
+    #   variable                One of BREAKEVEN_VARIABLES
+    # OUTPUTS:
+    #   sensitivities           Dictionary of {column: (intercept, slope)} for
+    #                           operating_profit, net_income and net_cash_flow
+
+    if variable not in BREAKEVEN_VARIABLES:
+        raise ValueError('unknown breakeven variable ' + repr(variable) + ', expected one of ' + ', '.join(BREAKEVEN_VARIABLES))
+    column = lambda name: np.asarray(values[name], dtype = float)
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        kept = 1 - np.where(column('net_revenue') != 0, column('net_tax') / column('net_revenue'), 0)
+    if variable == 'oil_price':
+        profit = column('rev_int') * kept * (column('oil_volume') + column('ngl_volume') * column('ngl_diff'))
+        cash, level = profit, column('oil_price')
+    elif variable == 'gas_price':
+        profit = column('rev_int') * kept * column('gas_volume') * column('shrink')
+        cash, level = profit, column('gas_price')
+    elif variable == 'opex_scale':
+        profit = -column('net_opex')
+        cash, level = profit, 1.0
+    else:
+        profit = np.zeros_like(column('net_capex'))
+        cash, level = -column('net_capex'), 1.0
+
+    return {
+        'operating_profit': (column('operating_profit') - level * profit, profit),
+        'net_income':       (column('net_income') - level * profit, profit),
+        'net_cash_flow':    (column('net_cash_flow') - level * cash, cash)
+    }
+
+def evaluate_sensitivities(sensitivities, x):
+    # Columns at x, one value per case
+
+    x = np.asarray(x, dtype = float)[:, None]
+    return {name: intercept + x * slope for name, (intercept, slope) in sensitivities.items()}
+
+def solve_breakeven(sensitivities, factors, target = 0.0, loss_function = 'NO', bounds = None, iterations = 60):
+    # Value of the variable that brings the PV of net cash flow to target
+    # INPUTS:
+    #   sensitivities           From calc_sensitivities
+    #   factors                 Discount factors for one rate, [months]
+    #   target                  PV to reach, scalar or one per case
+    #   loss_function           Economic limit mode, see ECONOMIC_LIMIT_COLUMNS
+    #   bounds                  (low, high) of the fallback search
+    #   iterations              Bisection steps of the fallback search
+    # OUTPUTS:
+    #   x                       Breakeven per case, NaN where there is none
+
+    intercept, slope = (np.atleast_2d(array) for array in np.broadcast_arrays(*sensitivities['net_cash_flow']))
+    sensitivities = {name: tuple(np.broadcast_to(array, intercept.shape) for array in pair) for name, pair in sensitivities.items()}
+    cases, months = intercept.shape
+    factors = np.asarray(factors, dtype = float).reshape(-1)
+    target = np.broadcast_to(np.asarray(target, dtype = float), (cases,))
+    offsets = np.arange(months)
+
+    def limit_at(x):
+        return calc_economic_limit(evaluate_sensitivities(sensitivities, x), loss_function)[0]
+
+    def closed_form(limit):
+        weighted = np.where(offsets < limit[:, None], factors, 0)
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            return (target - (intercept * weighted).sum(axis = 1)) / (slope * weighted).sum(axis = 1)
+
+    def excess(x):
+        weighted = np.where(offsets < limit_at(x)[:, None], factors, 0)
+        return ((intercept + x[:, None] * slope) * weighted).sum(axis = 1) - target
+
+    limit = limit_at(closed_form(np.full(cases, months)))
+    x = closed_form(limit)
+    shifted = np.flatnonzero(~np.isfinite(x) | (limit_at(np.nan_to_num(x)) != limit))
+    if not len(shifted):
+        return x
+
+    # Bisection on the cases whose limit moved, all at once
+    intercept, slope, target = intercept[shifted], slope[shifted], target[shifted]
+    sensitivities = {name: (pair[0][shifted], pair[1][shifted]) for name, pair in sensitivities.items()}
+    x[shifted] = bisect_breakeven(excess, len(shifted), bounds, iterations)
+    return x
+
+def solve_breakeven_exact(evaluate, cases, factors, target = 0.0, loss_function = 'NO', bounds = None, iterations = 60):
+    # Value of the variable that brings the PV of net cash flow to target, for cash
+    # flows that are not linear in it. Every step recalculates the columns. As in
+    # solve_breakeven, the PV is solved over the whole forecast, then over the limit
+    # that solution gives, and only cases whose limit still moves are searched on
+    # the limit-aware PV
+    # INPUTS:
+    #   evaluate                evaluate(x) -> dictionary of column arrays [cases, months]
+    #                           at one value of the variable per case, holding
+    #                           net_cash_flow and the loss function's column
+    #   cases                   Number of cases
+    #   factors                 Discount factors for one rate, [months]
+    #   target                  PV to reach, scalar or one per case
+    #   loss_function           Economic limit mode, see ECONOMIC_LIMIT_COLUMNS
+    #   bounds                  (low, high) of the search
+    #   iterations              Bisection steps
+    # OUTPUTS:
+    #   x                       Breakeven per case, NaN where there is none in bounds
+
+    factors = np.asarray(factors, dtype = float).reshape(-1)
+    target = np.broadcast_to(np.asarray(target, dtype = float), (cases,))
+
+    offsets = np.arange(len(factors))
+
+    def limit_at(x):
+        return calc_economic_limit(evaluate(x), loss_function)[0]
+
+    def excess(x, limit = None):
+        columns = evaluate(x)
+        cash = np.broadcast_to(columns['net_cash_flow'], (cases, len(factors)))
+        limit = calc_economic_limit(columns, loss_function)[0] if limit is None else limit
+        weighted = np.where(offsets < limit[:, None], factors, 0)
+        return (cash * weighted).sum(axis = 1) - target
+
+    whole = np.full(cases, len(factors))
+    limit = limit_at(np.nan_to_num(bisect_breakeven(lambda x: excess(x, whole), cases, bounds, iterations)))
+    x = bisect_breakeven(lambda x: excess(x, limit), cases, bounds, iterations)
+    moved = ~np.isfinite(x) | (limit_at(np.nan_to_num(x)) != limit)
+    if moved.any():
+        x = np.where(moved, bisect_breakeven(excess, cases, bounds, iterations), x)
+    return x
+
+def bisect_breakeven(excess, cases, bounds, iterations = 60):
+    # Bisection of excess(x) = 0 for many cases at once
+    # OUTPUTS:
+    #   x                       Root per case, NaN where excess has the same sign at
+    #                           both bounds
+
+    low, high = (np.full(cases, bound, dtype = float) for bound in bounds)
+    excess_low, excess_high = excess(low), excess(high)
+    valid = np.sign(excess_low) * np.sign(excess_high) <= 0
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        excess_middle = excess(middle)
+        lower = np.sign(excess_middle) == np.sign(excess_low)
+        low, excess_low = np.where(lower, middle, low), np.where(lower, excess_middle, excess_low)
+        high = np.where(lower, high, middle)
+    return np.where(valid, (low + high) / 2, np.nan)
+
+def calc_breakevens(values, variables, days_start, days_end = None, rate = None, target = 0.0, settings = None):
+    # Breakeven of each variable at one discount rate for every case
+    # INPUTS:
+    #   values                  Dictionary of SENSITIVITY_COLUMNS arrays before the economic
+    #                           limit is imposed, [months] or [cases, months]
+    #   variables               List of BREAKEVEN_VARIABLES
+    #   days_start, days_end    Month endpoints (days)
+    #   rate                    Discount rate, default settings primary_discount_rate. For an
+    #                           IRR target, the IRR with target 0
+    #   target                  PV to reach
+    #   settings                Settings object, defaults to read_settings()
+    # OUTPUTS:
+    #   breakevens              Dictionary of {variable: vector of cases}
+
+    if settings is None:
+        settings = helpers.read_settings()
+    factors = breakeven_factors(days_start, days_end, rate, settings)
+    return {
+        variable: solve_breakeven(calc_sensitivities(values, variable), factors, target, settings['loss_function'], BREAKEVEN_BOUNDS[variable])
+        for variable in variables
+    }
+
+def breakeven_factors(days_start, days_end = None, rate = None, settings = None):
+    # Discount factors of the breakeven rate, default settings primary_discount_rate
+
+    if settings is None:
+        settings = helpers.read_settings()
+    rate = settings['primary_discount_rate'] if rate is None else rate
+    days = disc.calc_discount_times(days_start, days_end, settings['discount_timing'])
+    return disc.calc_discount_factors(rate, days, settings['discount_compounding'], settings)[0]
+
+def breakeven_columns(settings = None):
+    # Oneline items of the breakevens configured in settings ('breakeven_variables')
+
+    if settings is None:
+        settings = helpers.read_settings()
+    return ['breakeven_' + variable for variable in settings.get('breakeven_variables', ())]
\ No newline at end of file
@@ -0,0 +1,72 @@
+import numpy as np
+from .. import helper_functions as helpers
+
+# discounting.py builds discount factors and present values for any set of rates
+#
+#   timing                      When cash flows are assumed to occur in each month
+#                               'start'     days_start (same as case net_pv10)
+#                               'mid'       middle of the month
+#                               'end'       days_end
+#   compounding                 How the annual rate compounds
+#                               'annual'    (1 + r) ** years
+#                               'monthly'   (1 + r / 12) ** (12 * years)
+#                               'continuous' exp(r * years)
+
+def calc_discount_times(days_start, days_end = None, timing = 'start'):
+    # Converts month endpoints into the time (days) at which each month's cash flow
+    # is discounted
+    # INPUTS:
+    #   days_start              Days from effective date to start of each month
+    #   days_end                Days from effective date to end of each month
+    #   timing                  'start', 'mid' or 'end'
+    # OUTPUTS:
+    #   days                    Discounting time of each month (days)
+
+    days_start = np.asarray(days_start, dtype = float)
+    if timing == 'start':
+        return days_start
+    if days_end is None:
+        raise ValueError("timing '" + timing + "' needs days_end")
+    days_end = np.asarray(days_end, dtype = float)
+    if timing == 'mid':
+        return (days_start + days_end) / 2
+    elif timing == 'end':
+        return days_end
+    raise ValueError("unknown timing '" + timing + "'")
+
+def calc_discount_factors(rates, days, compounding = 'annual', settings = None):
+    # Discount factor matrix for a set of annual rates
+    # INPUTS:
+    #   rates                   Annual discount rates as fractions (0.1 = 10%)
+    #   days                    Discounting time of each month (days)
+    #   compounding             'annual', 'monthly' or 'continuous'
+    #   settings                Settings object for days_in_year, defaults to read_settings()
+    # OUTPUTS:
+    #   factors                 Array of shape [rates, months]
+
+    c = helpers.get_setting('days_in_year', settings)
+    rates = np.atleast_1d(np.asarray(rates, dtype = float))[:, None]
+    years = np.asarray(days, dtype = float)[None, :] / c
+
+    if compounding == 'annual':
+        return np.exp(-np.log1p(rates) * years)
+    elif compounding == 'monthly':
+        return np.exp(-np.log1p(rates / 12) * 12 * years)
+    elif compounding == 'continuous':
+        return np.exp(-rates * years)
+    raise ValueError("unknown compounding '" + compounding + "'")
+
+def calc_npv_profile(cash_flow, factors):
+    # Present value of every cash flow row at every rate in one matrix product
+    # INPUTS:
+    #   cash_flow               Monthly cash flow, shape [months] or [cases, months]
+    #   factors                 Discount factors from calc_discount_factors, [rates, months]
+    # OUTPUTS:
+    #   npv                     Shape [rates] or [cases, rates]
+
+    return np.asarray(cash_flow, dtype = float) @ factors.T
+
+def pv_label(rate):
+    # Column label for a discount rate, e.g. 0.1 -> 'pv10', 0.125 -> 'pv12.5'
+
+    return 'pv' + format(round(rate * 100, 6), 'g')
\ No newline at end of file
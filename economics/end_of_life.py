@@ -0,0 +1,78 @@
+import numpy as np
+
+# end_of_life.py finds the economic limit of many cases at once
+#
+# The limit is the month offset from which a case is cut off. Every month before
+# it is kept, every month from it on is dropped - except with partial months, where
+# a fraction of the limit month itself is kept. Loss function modes:
+#
+#   NO                          first month with operating profit <= 0
+#   BFIT                        first month with net income (after overhead) <= 0
+#   OK                          no limit, every month is kept
+#   LAST                        month after cumulative net cash flow peaks, i.e. the
+#                               last month that adds value. Unlike NO and BFIT, a case
+#                               with months of capex and no production before first
+#                               sales is not cut off at month 0
+#
+# Partial months assume the monthly value changes linearly between month midpoints,
+# and keep the part of the limit month before it crosses zero. They apply to NO and
+# BFIT only
+
+# Column each mode tests (OK only reads its shape)
+ECONOMIC_LIMIT_COLUMNS = {
+    'NO':       'operating_profit',
+    'BFIT':     'net_income',
+    'OK':       'net_cash_flow',
+    'LAST':     'net_cash_flow'
+}
+
+def calc_economic_limit(values, loss_function = 'NO', partial = False):
+    # Economic limit month of every case in one pass
+    # INPUTS:
+    #   values                  Dictionary of column arrays [months] or [cases, months],
+    #                           holding the column the loss function tests
+    #   loss_function           Mode, see ECONOMIC_LIMIT_COLUMNS
+    #   partial                 Return the economic fraction of the limit month
+    # OUTPUTS:
+    #   limit                   Month offset of the limit per case, months if the case
+    #                           is economic to the end
+    #   fraction                Fraction of the limit month kept per case, 0 unless partial
+
+    if loss_function not in ECONOMIC_LIMIT_COLUMNS:
+        raise ValueError('unknown loss function ' + repr(loss_function) + ', expected one of ' + ', '.join(ECONOMIC_LIMIT_COLUMNS))
+    profit = np.atleast_2d(np.asarray(values[ECONOMIC_LIMIT_COLUMNS[loss_function]], dtype = float))
+    cases, months = profit.shape
+    if loss_function == 'OK':
+        return np.full(cases, months, dtype = np.int64), np.zeros(cases)
+    if not months:
+        return np.zeros(cases, dtype = np.int64), np.zeros(cases)
+
+    if loss_function == 'LAST':
+        limit = np.argmax(np.cumsum(profit, axis = 1), axis = 1) + 1
+        return limit.astype(np.int64), np.zeros(cases)
+
+    uneconomic = profit <= 0
+    limit = np.where(uneconomic.any(axis = 1), uneconomic.argmax(axis = 1), months)
+    fraction = np.zeros(cases)
+    if partial:
+        crossing = (limit > 0) & (limit < months)
+        rows = np.flatnonzero(crossing)
+        before = profit[rows, limit[rows] - 1]
+        after = profit[rows, limit[rows]]
+        fraction[rows] = np.clip(before / (before - after) - 0.5, 0, 1)
+    return limit.astype(np.int64), fraction
+
+def economic_limit_weights(limit, fraction, months):
+    # Weight of every month after the limit is imposed - 1 before the limit, the
+    # kept fraction at the limit month and 0 after it
+    # INPUTS:
+    #   limit, fraction         Per-case outputs of calc_economic_limit
+    #   months                  Number of months
+    # OUTPUTS:
+    #   weights                 Array of shape [cases, months]
+
+    offsets = np.arange(months)
+    limit = np.asarray(limit)[:, None]
+    weights = (offsets < limit).astype(float)
+    weights += np.where(offsets == limit, np.asarray(fraction)[:, None], 0)
+    return weights
\ No newline at end of file
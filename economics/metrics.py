@@ -0,0 +1,136 @@
+import numpy as np
+from .. import helper_functions as helpers
+from . import discounting as disc
+
+# metrics.py solves cash flow metrics for many cases at once
+#
+# Every function takes cash flows as [months] or [cases, months] and returns one
+# value per case. Root finding (IRR) runs a safeguarded Newton iteration on all
+# cases together instead of one scalar solve per case
+
+def calc_irr(cash_flow, days, low = -0.99, high = 1000.0, tolerance = 1e-10, max_iterations = 100, settings = None):
+    # Internal rate of return, annually compounded, for every cash flow row
+    # Cases whose NPV does not change sign between low and high return NaN
+    # INPUTS:
+    #   cash_flow               Monthly cash flow, shape [months] or [cases, months]
+    #   days                    Discounting time of each month (days)
+    #   low, high               Bracket of annual rates searched
+    #   tolerance               Convergence tolerance on log(1 + rate)
+    #   max_iterations          Iteration limit
+    #   settings                Settings object for days_in_year, defaults to read_settings()
+    # OUTPUTS:
+    #   irr                     Annual rate per case, NaN where undefined
+
+    cash_flow = np.atleast_2d(np.asarray(cash_flow, dtype = float))
+    years = np.asarray(days, dtype = float) / helpers.get_setting('days_in_year', settings)
+
+    # Solved in x = log(1 + rate), where NPV is a smooth sum of exponentials
+    def npv_and_slope(x):
+        discounted = cash_flow * np.exp(-x[:, None] * years)
+        return discounted.sum(axis = 1), -(discounted * years).sum(axis = 1)
+
+    lower = np.full(len(cash_flow), np.log1p(low))
+    upper = np.full(len(cash_flow), np.log1p(high))
+    npv_lower, _ = npv_and_slope(lower)
+    npv_upper, _ = npv_and_slope(upper)
+    valid = np.sign(npv_lower) * np.sign(npv_upper) < 0
+
+    # Orient every bracket so npv(lower) < 0 < npv(upper)
+    flip = npv_lower > 0
+    lower, upper = np.where(flip, upper, lower), np.where(flip, lower, upper)
+
+    x = np.where((np.log1p(0.1) - lower) * (np.log1p(0.1) - upper) > 0, (lower + upper) / 2, np.log1p(0.1))
+    last_step = np.abs(upper - lower)
+    for _ in range(max_iterations):
+        npv, slope = npv_and_slope(x)
+        lower = np.where(npv < 0, x, lower)
+        upper = np.where(npv >= 0, x, upper)
+
+        # Newton step, replaced by bisection when it leaves the bracket or does
+        # not at least halve the previous step
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            step = npv / slope
+        target = x - step
+        bisect = ~np.isfinite(step) | ((target - lower) * (target - upper) > 0) | (np.abs(2 * step) > last_step)
+        step = np.where(bisect, x - (lower + upper) / 2, step)
+        x, last_step = x - step, np.abs(step)
+        if np.all(~valid | (last_step < tolerance) | (npv == 0)):
+            break
+
+    return np.where(valid, np.expm1(x), np.nan)
+
+def calc_payout(cash_flow, factors = None):
+    # Month offset at which cumulative cash flow first recovers to zero or above
+    # after going negative. With discount factors, returns discounted payout
+    # INPUTS:
+    #   cash_flow               Monthly cash flow, shape [months] or [cases, months]
+    #   factors                 Optional discount factors for one rate, [months]
+    # OUTPUTS:
+    #   payout                  Month offset per case, NaN if never paid out,
+    #                           0 if cumulative cash flow is never negative
+
+    cash_flow = np.atleast_2d(np.asarray(cash_flow, dtype = float))
+    if factors is not None:
+        cash_flow = cash_flow * np.asarray(factors).reshape(-1)
+    cum = np.cumsum(cash_flow, axis = 1)
+    if not cum.shape[1]:
+        return np.zeros(len(cum))
+
+    negative = cum < 0
+    first_negative = np.argmax(negative, axis = 1)
+    recovered = ~negative & (np.arange(cum.shape[1]) > first_negative[:, None])
+    payout = np.where(recovered.any(axis = 1), np.argmax(recovered, axis = 1), np.nan)
+    return np.where(negative.any(axis = 1), payout, 0)
+
+@helpers.instrumented('economics/metrics')
+def calc_cash_flow_metrics(cash_flow, capex, days_start, days_end, settings = None):
+    # PV profile, IRR, payout and DCF ROI for every case, as configured in settings
+    # ('discount_rates', 'discount_timing', 'discount_compounding', 'primary_discount_rate')
+    # INPUTS:
+    #   cash_flow               Monthly net cash flow, [months] or [cases, months]
+    #   capex                   Monthly net capex, same shape as cash_flow
+    #   days_start, days_end    Month endpoints (days)
+    #   settings                Settings object, defaults to read_settings()
+    # OUTPUTS:
+    #   metrics                 Dictionary of {metric name: vector, one value per case}
+
+    if settings is None:
+        settings = helpers.read_settings()
+    cash_flow = np.atleast_2d(np.asarray(cash_flow, dtype = float))
+    capex = np.atleast_2d(np.asarray(capex, dtype = float))
+
+    days = disc.calc_discount_times(days_start, days_end, settings['discount_timing'])
+    rates = list(settings['discount_rates'])
+    factors = disc.calc_discount_factors(rates, days, settings['discount_compounding'], settings)
+    profile = disc.calc_npv_profile(cash_flow, factors)
+
+    metrics = {disc.pv_label(rate): profile[:, k] for k, rate in enumerate(rates)}
+    primary = disc.calc_discount_factors(settings['primary_discount_rate'], days, settings['discount_compounding'], settings)[0]
+    metrics['irr'] = calc_irr(cash_flow, days, settings = settings)
+    metrics['payout_month'] = calc_payout(cash_flow)
+    metrics['discounted_payout_month'] = calc_payout(cash_flow, primary)
+    metrics['dcf_roi'] = calc_dcf_roi(cash_flow, capex, primary)
+    return metrics
+
+def metric_columns(settings = None):
+    # Names of the metrics calc_cash_flow_metrics returns, in order
+
+    if settings is None:
+        settings = helpers.read_settings()
+    return [disc.pv_label(rate) for rate in settings['discount_rates']] + ['irr', 'payout_month', 'discounted_payout_month', 'dcf_roi']
+
+def calc_dcf_roi(cash_flow, capex, factors):
+    # Discounted return on investment - NPV of net cash flow divided by the
+    # present value of capital
+    # INPUTS:
+    #   cash_flow               Monthly net cash flow (after capex), [months] or [cases, months]
+    #   capex                   Monthly net capex, same shape as cash_flow
+    #   factors                 Discount factors for one rate, [months]
+    # OUTPUTS:
+    #   dcf_roi                 Ratio per case, NaN where there is no capex
+
+    factors = np.asarray(factors).reshape(-1)
+    npv = np.atleast_2d(cash_flow) @ factors
+    pv_capex = np.atleast_2d(capex) @ factors
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        return np.where(pv_capex != 0, npv / pv_capex, np.nan)
\ No newline at end of file
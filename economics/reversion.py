@@ -0,0 +1,48 @@
+import numpy as np
+
+# reversion.py finds payout and reverts interests for many cases at once
+#
+# A reversionary interest changes working and revenue interest once the owner's
+# investment has paid out. Payout is the first month in which cumulative net
+# income (after opex, taxes and overhead) reaches multiple times cumulative net
+# capex, both under the before-payout interests:
+#
+#   multiple = 1                cumulative net cash flow recovers to zero
+#   multiple = 2                the investment is returned twice over
+#
+# After-payout interests apply from the month after payout. Every month up to
+# and including payout is a before-payout month, so the payout month follows
+# from one cumulative sum of the before-payout cash flow - the after-payout
+# interests cannot move it and no iteration is needed. Tiered reversions are
+# applied one after another, each tested on the interests left by the last
+
+def calc_payout_month(net_income, net_capex, multiple = 1.0):
+    # Payout month of every case in one pass
+    # INPUTS:
+    #   net_income              Monthly net income, [months] or [cases, months]
+    #   net_capex               Monthly net capex, broadcasts against net_income
+    #   multiple                Capex multiple to recover, scalar or one per case
+    # OUTPUTS:
+    #   payout                  Month offset of payout per case, months if the case
+    #                           never pays out or has no capex
+
+    cum_income = np.cumsum(np.atleast_2d(np.asarray(net_income, dtype = float)), axis = 1)
+    cum_capex = np.cumsum(np.atleast_2d(np.asarray(net_capex, dtype = float)), axis = 1)
+    multiple = np.atleast_1d(np.asarray(multiple, dtype = float))[:, None]
+
+    # Cases come from whichever input has them, e.g. one cash flow against many multiples
+    paid = (cum_capex > 0) & (cum_income >= multiple * cum_capex)
+    return np.where(paid.any(axis = 1), paid.argmax(axis = 1), paid.shape[1]).astype(np.int64)
+
+def reversion_interests(before, after, payout, months):
+    # Interest of every month once a reversion is applied
+    # INPUTS:
+    #   before                  Before-payout interest, scalar, [months] or [cases, months]
+    #   after                   After-payout interest, scalar or one per case
+    #   payout                  Payout months from calc_payout_month
+    #   months                  Number of months
+    # OUTPUTS:
+    #   interests               Array of shape [cases, months]
+
+    payout, after = np.broadcast_arrays(np.atleast_1d(payout), np.atleast_1d(np.asarray(after, dtype = float)))
+    return np.where(np.arange(months) > payout[:, None], after[:, None], before)
\ No newline at end of file
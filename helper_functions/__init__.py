@@ -1,2 +1,3 @@
 from .decline_helpers import *
-from .general_helpers import *
\ No newline at end of file
+from .general_helpers import *
+from .instrumentation import *
\ No newline at end of file
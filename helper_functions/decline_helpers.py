@@ -1,5 +1,4 @@
 import numpy as np
-import pandas as pd
 from . import general_helpers as helpers
 
 def secant_to_nominal(De, decline_type, b = None):
@@ -36,7 +35,7 @@ def nominal_to_secant(Di, decline_type, b = None):
         De = 1 - 1 / (1 + b * Di) ** (1 / b)
     return De
 
-def calc_t_switch(Di, b, Dt):
+def calc_t_switch(Di, b, Dt, settings = None):
     # Calculates point in time when the switch from hyperbolic to exponential decline occurs
     # Applicable only for modified hyperbolic declines
     # INPUTS:
@@ -47,10 +46,10 @@ def calc_t_switch(Di, b, Dt):
     #   t_switch                Time to switch from hyperbolic to exponential (years)
     # UPDATE IN MOD_HYPERBOLIC.PY IF CHANGED
 
-    c = helpers.read_settings()['days_in_year']
+    c = helpers.get_setting('days_in_year', settings)
     return (Di / Dt - 1) / (b * Di) * c
 
-def calc_q_switch(qi, Di, b, t_switch):
+def calc_q_switch(qi, Di, b, t_switch, settings = None):
     # Calculates rate when the switch from hyperbolic to exponential decline occurs
     # Applicable only for modified hyperbolic declines
     # INPUTS:
@@ -62,10 +61,10 @@ def calc_q_switch(qi, Di, b, t_switch):
     #   q_switch                Rate when switch from hyperbolic to exponential occurs
     # UPDATE IN MOD_HYPERBOLIC.PY IF CHANGED
 
-    c = helpers.read_settings()['days_in_year']
+    c = helpers.get_setting('days_in_year', settings)
     return qi * (1 + b * Di * t_switch * (1 / c)) ** (-1 / b)
 
-def terminal_switch(qi, Di, b, Dt, Di_type = 'nominal', Dt_type = 'nominal'):
+def terminal_switch(qi, Di, b, Dt, Di_type = 'nominal', Dt_type = 'nominal', settings = None):
     # Packages calculations for hyperbolic to exponential transition
     # Applicable only for modified hyperbolic declines
     # INPUTS:
@@ -76,6 +75,7 @@ def terminal_switch(qi, Di, b, Dt, Di_type = 'nominal', Dt_type = 'nominal'):
     #   b                       b-factor
     #   Dt                      Terminal decline rate
     #   Di_type                 Initial decline rate type, default 'nominal'
+    #   settings                Settings object, defaults to read_settings()
     # OUTPUTS:
     #   t_switch                Time to switch from hyperbolic to exponential (years)
     #   q_switch                Rate when switch from hyperbolic to exponential occurs
@@ -87,8 +87,8 @@ def terminal_switch(qi, Di, b, Dt, Di_type = 'nominal', Dt_type = 'nominal'):
     if Dt_type == 'secant':
         Dt = secant_to_nominal(Dt, 'exponential')
     
-    t_switch = calc_t_switch(Di, b, Dt)
-    q_switch = calc_q_switch(qi, Di, b, t_switch)
+    t_switch = calc_t_switch(Di, b, Dt, settings)
+    q_switch = calc_q_switch(qi, Di, b, t_switch, settings)
 
     return t_switch, q_switch
 
@@ -1,19 +1,119 @@
 import json
 import importlib.resources
-import pandas as pd
+from collections.abc import Mapping
 import numpy as np
+from .instrumentation import count_event
+
+class frozen_settings(Mapping):
+    # Read-only view of user settings. Behaves like the dictionary that
+    # read_settings used to return, but cannot be modified in place - use
+    # replace() to derive a new object with some values overridden
+
+    __slots__ = ('_values',)
+
+    def __init__(self, values):
+        # Lists (e.g. discount_rates) are stored as tuples so the object stays
+        # immutable and hashable
+        self._values = {key: tuple(value) if isinstance(value, list) else value for key, value in dict(values).items()}
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __hash__(self):
+        return hash(tuple(sorted(self._values.items())))
+
+    def __eq__(self, other):
+        if isinstance(other, Mapping):
+            return self._values == dict(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return 'frozen_settings(' + repr(self._values) + ')'
+
+    def replace(self, **overrides):
+        # Returns a new frozen_settings object with values in overrides
+        # replacing those of this object
+        # INPUTS:
+        #   **overrides             Settings keys and their new values
+        # OUTPUTS:
+        #   settings                New frozen_settings object
+
+        if not overrides:
+            return self
+        return frozen_settings({**self._values, **overrides})
+
+_settings_cache = None
+
+def load_settings():
+    # Parses settings json file (settings.json) without touching the cache
+    # INPUTS:
+    #   None
+    # OUTPUTS:
+    #   settings                frozen_settings object of user settings
+
+    count_event('settings_read')
+    with importlib.resources.open_text('pumper.helper_functions', 'settings.json') as file:
+        return frozen_settings(json.load(file))
 
 def read_settings():
-    # Reads settings json file (settings.json)
+    # Returns the process-wide settings object (settings.json)
     # Settings contains unit conversion constants, other user preferences
+    # The file is parsed on first call only, every later call returns the
+    # same cached, read-only object
     # INPUTS:
     #   None
     # OUTPUTS:
-    #   settings                Dictionary of user settings
+    #   settings                frozen_settings object of user settings
 
-    with importlib.resources.open_text('pumper.helper_functions', 'settings.json') as file:
-        return json.load(file)
+    global _settings_cache
+    if _settings_cache is None:
+        _settings_cache = load_settings()
+    return _settings_cache
+
+def get_setting(name, settings = None):
+    # Value of one setting from a case's settings object, or from the
+    # process-wide settings when none is given
+    # INPUTS:
+    #   name                    Settings key
+    #   settings                Settings object to use, defaults to read_settings()
+    # OUTPUTS:
+    #   value                   Setting value
 
+    return (read_settings() if settings is None else settings)[name]
+
+def reload_settings():
+    # Discards the cached settings and re-reads settings.json
+    # INPUTS:
+    #   None
+    # OUTPUTS:
+    #   settings                frozen_settings object of user settings
+
+    global _settings_cache
+    _settings_cache = load_settings()
+    return _settings_cache
+
+def override_settings(**overrides):
+    # Replaces values in the process-wide settings object. Affects every
+    # case and decline calculator that reads settings afterwards. Keys must
+    # already be in settings.json, a misspelt name raises KeyError like a read
+    # INPUTS:
+    #   **overrides             Settings keys and their new values
+    # OUTPUTS:
+    #   settings                frozen_settings object of user settings
+
+    global _settings_cache
+    settings = read_settings()
+    unknown = [name for name in overrides if name not in settings]
+    if unknown:
+        raise KeyError(', '.join(unknown))
+    _settings_cache = settings.replace(**overrides)
+    return _settings_cache
 
 def vector_to_endpoints(vector):
     # Function for assisting with endpoint definition in timeseries calculations
@@ -38,12 +138,13 @@ def read_default_pricing():
     # OUTPUTS:
     #   pricing                 Price table for econ run, formatted as json
 
+    count_event('pricing_read')
     with importlib.resources.open_text('pumper.helper_functions', 'pricing.json') as file:
         price_json = json.load(file)
 
     return price_json
 
-def slice_time_vector(start, stop, time_vector):
+def slice_time_vector(start, stop, time_vector, settings = None):
     # Returns a vector smaller or equal to time_vector in size, that
     # includes a number of months equal to stop - start. If neither
     # are defined, simply returns time_vector with define start and stop
@@ -54,12 +155,18 @@ def slice_time_vector(start, stop, time_vector):
     #                           Valid formatting for start and stop are:
     #                           "MM/YYYY", "MM-YYYY", "YYYY-MM", "YYYY/MM"
     #   time_vector             Vector of days in each month
+    #   settings                Settings object to use, defaults to read_settings()
     # OUTPUTS:
     #   start                   Start month as pd.Period object
     #   stop                    Stop month as pd.Period object
     #   time_vector_slice       Slice of time_vector from start to stop (inclusive)
 
-    settings = read_settings()
+    # pandas is imported here, not at module level, so the decline calculators
+    # import without it
+    import pandas as pd
+
+    if settings is None:
+        settings = read_settings()
 
     if start is None and stop is None:
         start = pd.Period(settings['effective_date'], 'M')
@@ -67,7 +174,7 @@ def slice_time_vector(start, stop, time_vector):
         return start, stop, time_vector
     else:
         if start is None:
-            start = settings['effective_date']
+            start = pd.Period(settings['effective_date'], 'M')
         else:
             start = pd.Period(start, 'M')
 
@@ -77,4 +184,9 @@ def slice_time_vector(start, stop, time_vector):
             stop = pd.Period(stop, 'M')
 
         interval = (stop - start).n + 2
+        if interval > len(time_vector):
+            # Forecasts that start before the effective date or run past the case need more
+            # months than the case has, extended with uniform months
+            extra = np.arange(1, interval - len(time_vector) + 1) * settings['days_in_month']
+            time_vector = np.concatenate([time_vector, time_vector[-1] + extra])
         return start, stop, time_vector[:interval]
\ No newline at end of file
@@ -0,0 +1,172 @@
+import functools
+import time
+import tracemalloc
+
+# instrumentation.py times pipeline stages and counts events, off by default
+#
+# Stages are functions wrapped with @instrumented(stage). Every call adds to the
+# stage's call count and wall time, and with memory tracking records the peak
+# bytes allocated above the start of the call (tracemalloc, much slower - for
+# diagnosis only). A stage's bytes are the largest peak of any of its calls.
+# Nested stages are inclusive: 'case/fullrun' includes 'case/forecast'.
+# Events (file reads, cache misses) are counted with count_event.
+#
+# While disabled a stage wrapper costs one flag check and an extra function call,
+# and count_event returns at once. Hooks are called with every finished stage
+# record in the process that recorded it. Portfolio pool workers send their
+# totals back to the parent with each chunk, see portfolio.run_chunk
+#
+# Typical use:
+#   helpers.enable_instrumentation()
+#   portfolio.run()
+#   print(helpers.instrumentation_report())
+
+_state = {
+    'enabled':      False,
+    'memory':       False,
+    'stages':       {},
+    'events':       {},
+    'hooks':        [],
+    'peak':         0,
+    'tracing':      False
+}
+
+def enable_instrumentation(memory = False, reset = True):
+    # INPUTS:
+    #   memory                  Also track peak bytes allocated per stage with tracemalloc
+    #   reset                   Discard earlier records
+
+    if reset:
+        reset_instrumentation()
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _state['tracing'] = True
+    _state['enabled'], _state['memory'] = True, memory
+
+def disable_instrumentation():
+    # Stops tracemalloc only if enable_instrumentation started it, a caller
+    # tracing allocations of its own keeps its trace
+
+    if _state['tracing'] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state['enabled'], _state['memory'], _state['tracing'] = False, False, False
+
+def reset_instrumentation():
+
+    _state['stages'], _state['events'] = {}, {}
+
+def instrumentation_enabled():
+
+    return _state['enabled']
+
+def instrumentation_options():
+    # Flags to hand to another process, see portfolio.init_worker
+
+    return {'enabled': _state['enabled'], 'memory': _state['memory']}
+
+def add_instrumentation_hook(hook):
+    # hook(record) is called after every stage with a dictionary of stage,
+    # seconds and bytes (None without memory tracking)
+
+    _state['hooks'].append(hook)
+
+def remove_instrumentation_hook(hook):
+
+    _state['hooks'].remove(hook)
+
+def instrumented(stage):
+    # Decorator recording every call of a function as stage
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _state['enabled']:
+                return function(*args, **kwargs)
+            memory = _state['memory']
+            if memory:
+                before, outer_peak = start_peak()
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                allocated = stop_peak(outer_peak) - before if memory else None
+                record_stage(stage, seconds, allocated)
+
+        return wrapper
+
+    return decorator
+
+def start_peak():
+    # Resets the tracemalloc peak for a stage. The peak of the enclosing stages so
+    # far is held in _state['peak'] and returned, as resetting loses it
+    # OUTPUTS:
+    #   before                  Traced bytes at the start of the stage
+    #   outer_peak              Peak of the enclosing stages so far
+
+    before, peak = tracemalloc.get_traced_memory()
+    outer_peak = max(_state['peak'], peak)
+    tracemalloc.reset_peak()
+    _state['peak'] = 0
+    return before, outer_peak
+
+def stop_peak(outer_peak):
+    # Peak traced bytes since start_peak, handing the enclosing stages their peak back
+
+    peak = max(_state['peak'], tracemalloc.get_traced_memory()[1])
+    _state['peak'] = max(outer_peak, peak)
+    return peak
+
+def record_stage(stage, seconds, allocated = None, calls = 1):
+
+    totals = _state['stages'].setdefault(stage, [0, 0.0, 0])
+    totals[0] += calls
+    totals[1] += seconds
+    totals[2] = max(totals[2], allocated or 0)
+    if _state['hooks'] and calls == 1:
+        record = {'stage': stage, 'seconds': seconds, 'bytes': allocated}
+        for hook in _state['hooks']:
+            hook(record)
+
+def count_event(event, count = 1):
+    # Adds to an event counter while instrumentation is enabled
+
+    if _state['enabled']:
+        _state['events'][event] = _state['events'].get(event, 0) + count
+
+def collect_instrumentation():
+    # Returns this process's records and clears them, for sending to another process
+    # OUTPUTS:
+    #   records                 Dictionary of stages and events, empty when disabled
+
+    if not _state['enabled']:
+        return {}
+    records = {'stages': _state['stages'], 'events': _state['events']}
+    reset_instrumentation()
+    return records
+
+def merge_instrumentation(records):
+    # Adds records from collect_instrumentation (another process) to this process's
+
+    for stage, (calls, seconds, allocated) in records.get('stages', {}).items():
+        record_stage(stage, seconds, allocated, calls)
+    for event, count in records.get('events', {}).items():
+        _state['events'][event] = _state['events'].get(event, 0) + count
+
+def instrumentation_report():
+    # Stage timings and event counts recorded so far
+    # OUTPUTS:
+    #   report                  DataFrame indexed by stage (sorted by total time) with
+    #                           calls, seconds, mean_ms and bytes; events are rows
+    #                           'event/<name>' with only calls filled in
+
+    import pandas as pd
+
+    rows = {
+        stage: {'calls': calls, 'seconds': seconds, 'mean_ms': seconds / calls * 1e3, 'bytes': allocated if _state['memory'] else None}
+        for stage, (calls, seconds, allocated) in sorted(_state['stages'].items(), key = lambda item: -item[1][1])
+    }
+    for event, count in sorted(_state['events'].items()):
+        rows['event/' + event] = {'calls': count, 'seconds': None, 'mean_ms': None, 'bytes': None}
+    return pd.DataFrame.from_dict(rows, orient = 'index', columns = ['calls', 'seconds', 'mean_ms', 'bytes'])
\ No newline at end of file
@@ -0,0 +1,521 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from . import helper_functions as helpers
+from . import economics as econ
+from .checkpoints import case_key, checkpoint_store
+from .results_cube import results_cube, create_cube
+from .rollups import rollup
+from .case import case, oneline_columns, TIMESERIES_COLUMNS, COLUMN_INDEX, ONELINE_COLUMNS
+
+# portfolio.py holds many cases and evaluates them together
+#
+# Cases are stored as workflows (see case.fullrun) rather than as case objects, so
+# only small dictionaries are sent to worker processes. Workers write their results
+# straight into shared memory blocks owned by the portfolio:
+#
+#   timeseries                  [cases, months, columns] float64
+#   oneline_values              [cases, oneline items] float64
+#   end_of_life                 [cases] int64, month offset of end of life
+#
+# Nothing is pickled on the way back except error messages. Cash flow metrics
+# (PV profile, IRR, payout, DCF ROI) are solved afterwards for all cases at once
+# from the shared net cash flow, not case by case in the workers
+#
+# With a results_writer (see writers.py) the cases are run in batches through a
+# timeseries block of only batch_size cases. Each batch is written out and added
+# to the aggregate before the block is reused for the next one
+#
+# With a checkpoint store (see checkpoints.py) every finished chunk is saved to
+# disk, and cases whose inputs are already in the store are restored rather than
+# evaluated, so an interrupted or repeated run only evaluates what is missing
+#
+# With a results cube (see results_cube.py) the timeseries block is a memory-mapped
+# file holding every case instead of shared memory, and workers write into it
+#
+# Cases added with groups (e.g. {'pad': ..., 'field': ..., 'asset': ...}) are also
+# rolled up by every level as each batch finishes, see rollups.py. update_case
+# re-runs one case and moves only its contribution in the rollup and aggregate
+
+# Columns that cannot be summed across cases when building the aggregate
+# timeseries. Each is averaged across cases, weighted by the column given here
+AGGREGATE_WEIGHTS = {
+    'working_int':          'gross_revenue',
+    'rev_int':              'gross_revenue',
+    'shrink':               'gas_volume',
+    'oil_price':            'oil_volume',
+    'gas_price':            'gas_volume',
+    'oil_diff':             'oil_volume',
+    'gas_diff':             'gas_volume',
+    'ngl_diff':             'ngl_volume',
+    'oil_price_real':       'oil_volume',
+    'gas_price_real':       'gas_volume',
+    'ngl_price_real':       'ngl_volume'
+}
+
+# Columns that describe the time grid and are identical in every case
+TIME_COLUMNS = ['month', 'days_start', 'days_end']
+
+# Timeseries columns needed to solve cash flow metrics for the whole portfolio
+METRIC_INPUT_COLUMNS = ['days_start', 'days_end', 'net_cash_flow', 'net_capex']
+
+# Default size of the shared timeseries block when streaming to a writer
+STREAM_BLOCK_BYTES = 2 ** 28
+
+class portfolio:
+
+    def __init__(self, **settings_overrides):
+
+        self.settings = helpers.read_settings().replace(**settings_overrides)
+        self.names = []
+        self.workflows = []
+        self.groups = []
+        self.blocks = []
+
+    def __len__(self):
+
+        return len(self.names)
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *args):
+
+        self.close()
+
+    def add_case(self, name, workflow, groups = None):
+        # Adds one case to the portfolio
+        # INPUTS:
+        #   name                    Case name, used as oneline index
+        #   workflow                Dictionary of case inputs, see case.fullrun
+        #   groups                  Optional dictionary of {level: label}, e.g.
+        #                           {'pad': 'P-12', 'field': 'North'}, see rollups.py
+
+        self.names.append(name)
+        self.workflows.append(workflow)
+        self.groups.append(dict(groups or {}))
+
+    def add_cases(self, workflows, groups = None):
+        # Adds many cases at once
+        # INPUTS:
+        #   workflows               Dictionary of {name: workflow}
+        #   groups                  Optional dictionary of {name: {level: label}}
+
+        groups = {} if groups is None else groups
+        for name, workflow in workflows.items():
+            self.add_case(name, workflow, groups.get(name))
+
+    def run(self, processes = None, chunksize = None, columns = None, writer = None, batch_size = None, checkpoint = None, cube = None):
+        # Evaluates every case through case.fullrun, in a process pool
+        # INPUTS:
+        #   processes               Worker processes, default os.cpu_count()
+        #                           processes = 1 runs in this process, no pool
+        #   chunksize               Cases sent to a worker at a time, default
+        #                           splits each batch into ~4 chunks per worker
+        #   columns                 Timeseries columns to keep, default all
+        #   writer                  Optional results_writer - every batch of timeseries
+        #                           and onelines is written as soon as it is finished
+        #   batch_size              Cases held in memory at a time when streaming to a
+        #                           writer, default fills STREAM_BLOCK_BYTES
+        #   checkpoint              Optional checkpoint_store or store directory - finished
+        #                           chunks are saved to it and stored cases are restored
+        #   cube                    Optional results_cube or cube directory - timeseries are
+        #                           written into it instead of shared memory. A directory
+        #                           gets a new cube of the portfolio's cases and columns
+        # OUTPUTS:
+        #   None - populates timeseries, oneline_values, end_of_life, errors, oneline,
+        #   aggregate, rollup (None if no case has groups) and restored (cases taken
+        #   from the checkpoint store). When streaming, timeseries only holds the last
+        #   batch unless it is a cube
+
+        self.close()
+        cases, months = len(self.names), self.settings['forecast_duration']
+        if isinstance(cube, results_cube):
+            if cube.shape[:2] != (cases, months):
+                raise ValueError('cube holds ' + str(cube.shape[:2]) + ' cases and months, portfolio has ' + str((cases, months)))
+            if columns is not None and list(columns) != cube.columns:
+                raise ValueError('columns differ from the columns of the cube')
+            columns = cube.columns
+        self.columns = list(TIMESERIES_COLUMNS if columns is None else columns)
+        if cube is not None and not isinstance(cube, results_cube):
+            cube = create_cube(cube, self.names, self.columns, months, settings = self.settings)
+        self.cube = cube
+
+        if writer is None:
+            batch_size = cases
+        elif batch_size is None:
+            batch_size = STREAM_BLOCK_BYTES // (months * len(self.columns) * 8)
+        batch_size = max(1, min(batch_size, cases))
+
+        # Metrics are solved from the shared timeseries when it keeps the columns they need
+        self.metrics_from_timeseries = set(METRIC_INPUT_COLUMNS).issubset(self.columns)
+
+        if cube is None:
+            self.timeseries = self.allocate((batch_size, months, len(self.columns)), np.float64)
+            timeseries_layout = (self.blocks[-1].name, self.timeseries.shape, np.float64)
+        else:
+            timeseries_layout = cube.path
+        self.oneline_values = self.allocate((cases, len(self.oneline_columns())), np.float64)
+        self.end_of_life = self.allocate((cases,), np.int64)
+        self.end_of_life[:] = months
+
+        self.checkpoint, self.keys, self.restored = None, None, 0
+        if checkpoint is not None:
+            if not isinstance(checkpoint, checkpoint_store):
+                checkpoint = checkpoint_store(checkpoint, self.columns, self.oneline_columns(), months)
+            self.checkpoint = checkpoint
+            self.keys = [case_key(workflow, self.settings) for workflow in self.workflows]
+
+        layout = {
+            'timeseries':       timeseries_layout,
+            'oneline_values':   (self.blocks[-2].name, self.oneline_values.shape, np.float64),
+            'end_of_life':      (self.blocks[-1].name, self.end_of_life.shape, np.int64),
+            'cube':             cube is not None,
+            'offsets':          [COLUMN_INDEX[column] for column in self.columns],
+            'settings':         self.settings,
+            'metrics':          not self.metrics_from_timeseries,
+            'first_case':       0
+        }
+
+        if processes is None:
+            processes = os.cpu_count() or 1
+
+        self.errors = {}
+        self.rollup = rollup(self.groups, self.columns, self.oneline_columns(), months, self.settings) if any(self.groups) else None
+        totals = None
+        pool = None
+        if processes > 1:
+            pool = ProcessPoolExecutor(processes, initializer = init_worker, initargs = (helpers.read_settings(), helpers.instrumentation_options()))
+        try:
+            for first in range(0, cases, batch_size):
+                last = min(first + batch_size, cases)
+                layout['first_case'] = first
+                if cube is not None:
+                    self.timeseries = cube.values[first:last]
+                self.run_batch(pool, processes, chunksize, layout, first, last)
+
+                batch = self.timeseries[:last - first]
+                if self.metrics_from_timeseries:
+                    self.calc_cash_flow_metrics(first, last)
+                totals = accumulate_aggregate(totals, batch, self.columns)
+                if self.rollup is not None:
+                    self.rollup.add(np.arange(first, last), batch, self.oneline_values[first:last])
+                if writer is not None:
+                    writer.write_timeseries(self.names[first:last], batch, self.columns)
+                    writer.write_oneline(self.names[first:last], self.oneline_values[first:last], self.oneline_columns())
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if cube is not None:
+            cube.flush()
+            self.timeseries = cube.values
+        self.totals = totals
+        self.generate_oneline()
+        self.generate_aggregate(totals)
+
+    def update_case(self, name, workflow):
+        # Re-runs one case after its inputs change and updates the onelines, aggregate
+        # and rollup by moving only that case's contribution. Needs every case's
+        # timeseries at hand - a run without a writer, or with a cube. With a checkpoint
+        # store the new result is saved under the new workflow's key
+        # INPUTS:
+        #   name                    Case name
+        #   workflow                New workflow of the case
+
+        index = self.names.index(name)
+        if self.timeseries.shape[0] != len(self.names):
+            raise ValueError('update_case needs the timeseries of every case, run without a writer or with a cube')
+        old_timeseries, old_oneline = np.array(self.timeseries[index:index + 1]), self.oneline_values[index:index + 1].copy()
+
+        self.workflows[index] = workflow
+        self.timeseries[index], self.oneline_values[index], self.end_of_life[index] = 0, 0, self.timeseries.shape[1]
+        self.errors.pop(name, None)
+        layout = {
+            'offsets':          [COLUMN_INDEX[column] for column in self.columns],
+            'settings':         self.settings,
+            'metrics':          not self.metrics_from_timeseries,
+            'first_case':       0
+        }
+        arrays = {'timeseries': self.timeseries, 'oneline_values': self.oneline_values, 'end_of_life': self.end_of_life}
+        errors = evaluate_chunk(arrays, layout, [index], [workflow])
+        self.collect_errors(errors)
+        if self.checkpoint is not None:
+            self.keys[index] = case_key(workflow, self.settings)
+            self.save_checkpoint([index], errors, 0)
+        if self.metrics_from_timeseries:
+            self.calc_cash_flow_metrics(index, index + 1, 0)
+        if self.cube is not None:
+            self.cube.flush()
+
+        new_timeseries, new_oneline = self.timeseries[index:index + 1], self.oneline_values[index:index + 1]
+        self.totals = accumulate_aggregate(self.totals, old_timeseries, self.columns, sign = -1)
+        self.totals = accumulate_aggregate(self.totals, new_timeseries, self.columns)
+        if self.rollup is not None:
+            self.rollup.remove([index], old_timeseries, old_oneline)
+            self.rollup.add([index], new_timeseries, new_oneline)
+        self.generate_oneline()
+        self.generate_aggregate(self.totals)
+
+    @helpers.instrumented('portfolio/batch')
+    def run_batch(self, pool, processes, chunksize, layout, first, last):
+        # Evaluates cases first to last into the shared timeseries block
+
+        self.timeseries[...] = 0
+        pending = list(range(first, last))
+        if self.checkpoint is not None:
+            stored = [index for index in pending if self.keys[index] in self.checkpoint]
+            self.checkpoint.restore(self.keys, stored, self.timeseries, self.oneline_values, self.end_of_life, first)
+            self.restored += len(stored)
+            pending = [index for index in pending if self.keys[index] not in self.checkpoint]
+        if chunksize is None:
+            chunksize = max(1, -(-len(pending) // (processes * 4)))
+        chunks = [pending[start:start + chunksize] for start in range(0, len(pending), chunksize)]
+
+        if pool is None:
+            arrays = {'timeseries': self.timeseries, 'oneline_values': self.oneline_values, 'end_of_life': self.end_of_life}
+            for indices in chunks:
+                errors = evaluate_chunk(arrays, layout, indices, [self.workflows[index] for index in indices])
+                self.collect_errors(errors)
+                self.save_checkpoint(indices, errors, first)
+        else:
+            futures = [pool.submit(run_chunk, layout, indices, [self.workflows[index] for index in indices]) for indices in chunks]
+            for indices, future in zip(chunks, futures):
+                errors, records = future.result()
+                self.collect_errors(errors)
+                self.save_checkpoint(indices, errors, first)
+                helpers.merge_instrumentation(records)
+
+    def save_checkpoint(self, indices, errors, first):
+        # Saves the cases of a finished chunk that ran without error to the checkpoint store
+
+        if self.checkpoint is None:
+            return
+        indices = np.array([index for index in indices if index not in errors], dtype = np.int64)
+        self.checkpoint.save(
+            [self.keys[index] for index in indices], self.timeseries[indices - first],
+            self.oneline_values[indices], self.end_of_life[indices]
+        )
+
+    def oneline_columns(self):
+
+        return oneline_columns(self.settings)
+
+    def calc_cash_flow_metrics(self, first = 0, last = None, block_first = None):
+        # Fills the metric part of oneline_values for cases first to last in one
+        # pass over the shared net cash flow (the timeseries block starts at
+        # block_first, default first)
+
+        last = len(self.names) if last is None else last
+        block_first = first if block_first is None else block_first
+        column = lambda name: self.timeseries[first - block_first:last - block_first, :, self.columns.index(name)]
+        metrics = econ.calc_cash_flow_metrics(
+            column('net_cash_flow'), column('net_capex'), column('days_start')[0], column('days_end')[0], self.settings
+        )
+        for name, values in metrics.items():
+            self.oneline_values[first:last, self.oneline_columns().index(name)] = values
+
+    def collect_errors(self, errors):
+
+        for index, message in errors.items():
+            self.errors[self.names[index]] = message
+
+    def allocate(self, shape, dtype):
+        # Creates a zeroed shared memory block and returns an array view of it
+
+        size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        block = shared_memory.SharedMemory(create = True, size = size)
+        self.blocks.append(block)
+        array = np.ndarray(shape, dtype = dtype, buffer = block.buf)
+        array[...] = 0
+        return array
+
+    def close(self):
+        # Releases shared memory blocks. Result arrays are unusable afterwards
+
+        for attribute in ['timeseries', 'oneline_values', 'end_of_life', 'cube']:
+            self.__dict__.pop(attribute, None)
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def generate_oneline(self):
+        # Combines the oneline of every case into one DataFrame
+
+        self.oneline = pd.DataFrame(self.oneline_values, index = self.names, columns = self.oneline_columns())
+
+    def generate_aggregate(self, totals = None):
+        # Rolls up all cases into one monthly timeseries DataFrame
+        # INPUTS:
+        #   totals                  Running totals from accumulate_aggregate, default
+        #                           taken from the timeseries block
+
+        if totals is None:
+            totals = accumulate_aggregate(None, self.timeseries, self.columns)
+        effective_date = pd.Period(self.settings['effective_date'], 'M')
+        index = pd.period_range(effective_date, periods = self.timeseries.shape[1], freq = 'M')
+        self.aggregate = pd.DataFrame(finish_aggregate(totals, self.columns), index = index, columns = self.columns)
+
+def aggregate_timeseries(timeseries, columns):
+    # Sums a [cases, months, columns] array over cases. Time grid columns are
+    # taken from the first case that ran and the AGGREGATE_WEIGHTS columns are weighted
+    # averages rather than sums
+    # INPUTS:
+    #   timeseries              Array of shape [cases, months, columns]
+    #   columns                 Column names of the last axis
+    # OUTPUTS:
+    #   aggregate               Array of shape [months, columns]
+
+    return finish_aggregate(accumulate_aggregate(None, timeseries, columns), columns)
+
+def accumulate_aggregate(totals, timeseries, columns, sign = 1):
+    # Adds a block of cases to running aggregate totals, so a portfolio can be
+    # aggregated one batch at a time
+    # INPUTS:
+    #   totals                  Totals from a previous call, None to start
+    #   timeseries              Array of shape [cases, months, columns]
+    #   columns                 Column names of the last axis
+    #   sign                    -1 to take out a block added earlier
+    # OUTPUTS:
+    #   totals                  Dictionary of running sums, see finish_aggregate
+
+    offsets = {column: offset for offset, column in enumerate(columns)}
+    if totals is None:
+        totals = {
+            'cases':        0,
+            'sum':          np.zeros(timeseries.shape[1:]),
+            'weighted':     {column: np.zeros(timeseries.shape[1]) for column in AGGREGATE_WEIGHTS},
+            'weights':      {column: np.zeros(timeseries.shape[1]) for column in AGGREGATE_WEIGHTS},
+            'time':         None
+        }
+    if not len(timeseries):
+        return totals
+
+    totals['sum'] += sign * timeseries.sum(axis = 0)
+    if totals['time'] is None:
+        totals['time'] = first_time_values(timeseries, columns)
+    for column, weight in AGGREGATE_WEIGHTS.items():
+        if column in offsets and weight in offsets:
+            weights = timeseries[:, :, offsets[weight]]
+            totals['weighted'][column] += sign * np.einsum('cm,cm->m', timeseries[:, :, offsets[column]], weights)
+            totals['weights'][column] += sign * weights.sum(axis = 0)
+    totals['cases'] += sign * len(timeseries)
+    return totals
+
+def first_time_values(timeseries, columns):
+    # Timeseries of the first case of a block that ran, for its TIME_COLUMNS. Cases
+    # that raised an error are rows of zeros, time columns included
+    # INPUTS:
+    #   timeseries              Array of shape [cases, months, columns]
+    #   columns                 Column names of the last axis
+    # OUTPUTS:
+    #   time                    Array of shape [months, columns], None if no case of
+    #                           the block ran
+
+    offsets = [offset for offset, column in enumerate(columns) if column in TIME_COLUMNS]
+    if not offsets:
+        return np.array(timeseries[0])
+    ran = np.flatnonzero(np.asarray(timeseries[:, :, offsets]).any(axis = (1, 2)))
+    return np.array(timeseries[ran[0]]) if len(ran) else None
+
+def finish_aggregate(totals, columns):
+    # Turns running totals into the aggregate timeseries
+    # INPUTS:
+    #   totals                  Dictionary from accumulate_aggregate
+    #   columns                 Column names of the last axis
+    # OUTPUTS:
+    #   aggregate               Array of shape [months, columns]
+
+    aggregate = totals['sum'].copy()
+    offsets = {column: offset for offset, column in enumerate(columns)}
+
+    for column in TIME_COLUMNS:
+        if column in offsets and totals['time'] is not None:
+            aggregate[:, offsets[column]] = totals['time'][:, offsets[column]]
+
+    for column, weight in AGGREGATE_WEIGHTS.items():
+        if column not in offsets:
+            continue
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            mean = totals['sum'][:, offsets[column]] / totals['cases']
+            if weight in offsets:
+                total = totals['weights'][column]
+                aggregate[:, offsets[column]] = np.where(total != 0, totals['weighted'][column] / total, mean)
+            else:
+                aggregate[:, offsets[column]] = mean
+
+    return aggregate
+
+def init_worker(settings, instrumentation = None):
+    # Gives pool workers the same process-wide settings and instrumentation as the
+    # parent process
+
+    helpers.override_settings(**settings)
+    if instrumentation and instrumentation['enabled']:
+        helpers.enable_instrumentation(memory = instrumentation['memory'])
+
+def attach_block(name, shape, dtype):
+    # Attaches to a shared memory block created by the parent process. Pool
+    # workers share the parent's resource tracker, so attaching does not hand
+    # ownership of the block to the worker
+
+    block = shared_memory.SharedMemory(name = name)
+    return block, np.ndarray(shape, dtype = dtype, buffer = block.buf)
+
+def run_chunk(layout, indices, workflows):
+    # Pool worker entry point - attaches to the portfolio's shared memory and
+    # evaluates a chunk of cases into it
+    # INPUTS:
+    #   layout                  Shared memory names/shapes, column offsets and settings
+    #   indices                 Portfolio index of each case in workflows
+    #   workflows               List of case workflows
+    # OUTPUTS:
+    #   errors                  Dictionary of {portfolio index: error message}
+    #   records                 Instrumentation records of the chunk, empty when disabled
+
+    blocks, arrays, cube = [], {}, None
+    for key in ['timeseries', 'oneline_values', 'end_of_life']:
+        if key == 'timeseries' and layout['cube']:
+            cube = results_cube(layout[key], 'r+')
+            arrays[key] = cube.values[layout['first_case']:]
+            continue
+        block, arrays[key] = attach_block(*layout[key])
+        blocks.append(block)
+
+    errors = evaluate_chunk(arrays, layout, indices, workflows)
+    if cube is not None:
+        cube.flush()
+
+    del arrays, cube
+    for block in blocks:
+        block.close()
+    return errors, helpers.collect_instrumentation()
+
+def evaluate_chunk(arrays, layout, indices, workflows):
+    # Runs case.fullrun for each workflow and writes the results into arrays
+    # INPUTS:
+    #   arrays                  Dictionary of timeseries, oneline_values and end_of_life arrays
+    #   layout                  Column offsets, settings, metrics flag and the first
+    #                           case held in the timeseries block, from portfolio.run
+    #   indices                 Portfolio index of each case in workflows
+    #   workflows               List of case workflows
+    # OUTPUTS:
+    #   errors                  Dictionary of {portfolio index: error message}
+
+    offsets, settings, metrics = layout['offsets'], layout['settings'], layout['metrics']
+    items = oneline_columns(settings) if metrics else ONELINE_COLUMNS + econ.breakeven_columns(settings)
+    errors = {}
+    for index, workflow in zip(indices, workflows):
+        try:
+            evaluated = case(**settings)
+            evaluated.fullrun(workflow, zero = True, metrics = metrics)
+            arrays['timeseries'][index - layout['first_case']] = evaluated.data[:, offsets]
+            arrays['oneline_values'][index, :len(items)] = [evaluated.oneline_data[item] for item in items]
+            arrays['end_of_life'][index] = evaluated.month_offset(evaluated.end_of_life)
+        except Exception as error:
+            errors[index] = repr(error)
+    return errors
\ No newline at end of file
@@ -0,0 +1,355 @@
+import os
+import functools
+import numpy as np
+import pandas as pd
+from . import helper_functions as helpers
+
+# pricing.py parses price decks once and shares them between cases
+#
+# A price_deck is one price scenario stored as a single float64 array of shape
+# [months, len(PRICE_COLUMNS)] starting at deck.start. Cases take a view of the
+# months they need with deck.window(effective_date, months) - slicing is O(1) and
+# no case holds its own copy of the deck. Past the last month of a deck, its last
+# prices are held flat
+#
+# A deck without a start month is relative: its row 0 is the effective date of
+# whichever case uses it. The packaged default deck is relative
+#
+# Decks are read from files through read_price_decks, which caches every file
+# (by path, modification time, and the effective date and forecast duration text
+# decks are built to), so 20k cases against 5 scenarios parse each file once per
+# process:
+#
+#   .txt                        Aries-style deck, see parse_price_text
+#   .xls, .xlsx                 One sheet per scenario, PRICE_COLUMNS as headers
+#   .csv                        One scenario, PRICE_COLUMNS as headers
+#   .json                       Same layout as helper_functions/pricing.json
+#
+# Tabular decks may have a 'month' (or 'date') column giving each row's month;
+# without one the deck is relative
+#
+#   ARIES-STYLE TEXT DECKS:
+#       SCENARIO strip                      starts a scenario, default 'default'
+#       START 01/2023                       first month of the scenario, relative deck if missing
+#       OIL  94.78  X  $/B  12  MOS  FLAT   price segments, one per line:
+#       "    86.59  X  $/B  12  MOS  FLAT       keyword value1 value2 [units] duration method [method value]
+#       "    70.29  X  $/B  TO  LIFE ESC 2      " repeats the keyword of the line above
+#       GAS  3.00   4.00 $/M  24  MOS  LIN
+#
+#       value2                  End value for LIN, X when not used
+#       duration                <n> MOS | <n> YRS | TO <month> | TO LIFE
+#       method                  FLAT    value1 for every month
+#                               LIN     straight line from value1 to value2
+#                               ESC     value1 escalated by method value % per year
+#                               STEP    value1 held, then stepping by method value
+#                                       (absolute) every 12 months
+#       Keywords are listed in DECK_KEYWORDS. Lines after # are comments. In a
+#       relative deck, TO <month> counts from the effective date of the settings
+#       the deck is read with
+
+PRICE_COLUMNS = ['oil_price', 'gas_price', 'oil_diff', 'gas_diff', 'ngl_diff']
+
+DECK_KEYWORDS = {
+    'OIL':              'oil_price',
+    'PRI/OIL':          'oil_price',
+    'GAS':              'gas_price',
+    'PRI/GAS':          'gas_price',
+    'OIL_DIFF':         'oil_diff',
+    'DIF/OIL':          'oil_diff',
+    'GAS_DIFF':         'gas_diff',
+    'DIF/GAS':          'gas_diff',
+    'NGL_DIFF':         'ngl_diff',
+    'DIF/NGL':          'ngl_diff'
+}
+
+DURATION_UNITS = {
+    'MO':               1,
+    'MOS':              1,
+    'M':                1,
+    'YR':               12,
+    'YRS':              12,
+    'Y':                12
+}
+
+class price_deck:
+
+    def __init__(self, values, start = None, name = 'default'):
+        # INPUTS:
+        #   values                  Prices, array of shape [months, len(PRICE_COLUMNS)]
+        #                           or dictionary of {price column: vector}
+        #   start                   First month of values, None for a relative deck
+        #   name                    Scenario name
+
+        if isinstance(values, dict):
+            months = max(len(np.atleast_1d(vector)) for vector in values.values())
+            array = np.zeros((months, len(PRICE_COLUMNS)))
+            for offset, column in enumerate(PRICE_COLUMNS):
+                if column in values:
+                    array[:, offset] = extend_vector(np.atleast_1d(np.asarray(values[column], dtype = float)), months)
+            values = array
+
+        self.values = np.asfortranarray(np.asarray(values, dtype = float))
+        self.start = None if start is None else pd.Period(start, 'M')
+        self.name = name
+
+    def __len__(self):
+
+        return self.values.shape[0]
+
+    def __repr__(self):
+
+        return 'price_deck(' + repr(self.name) + ', ' + ('relative' if self.start is None else str(self.start)) + ', ' + str(len(self)) + ' months)'
+
+    def window(self, start, months):
+        # Prices for months months from start, as a read-only view of the deck
+        # INPUTS:
+        #   start                   First month, e.g. a case's effective date
+        #   months                  Number of months
+        # OUTPUTS:
+        #   prices                  Array of shape [months, len(PRICE_COLUMNS)]
+
+        offset = 0 if self.start is None else (pd.Period(start, 'M') - self.start).n
+        if offset < 0:
+            raise ValueError('price deck ' + repr(self.name) + ' starts ' + str(self.start) + ', after ' + str(pd.Period(start, 'M')))
+        if offset + months > len(self):
+            # Extended once for the longest request, later windows are views again
+            self.values = np.asfortranarray(np.concatenate([self.values, np.repeat(self.values[-1:], offset + months - len(self), axis = 0)]))
+        prices = self.values[offset:offset + months]
+        prices.flags.writeable = False
+        return prices
+
+    def to_dataframe(self):
+
+        start = pd.Period(helpers.read_settings()['effective_date'], 'M') if self.start is None else self.start
+        index = pd.period_range(start, periods = len(self), freq = 'M')
+        return pd.DataFrame(self.values, index = index, columns = PRICE_COLUMNS)
+
+def extend_vector(vector, months):
+    # Holds the last value of vector flat out to months entries
+
+    if len(vector) >= months:
+        return vector[:months]
+    return np.concatenate([vector, np.full(months - len(vector), vector[-1])])
+
+def flat_deck(start = None, name = 'flat', **prices):
+    # One-month deck of constant prices, held flat for any window
+    # INPUTS:
+    #   start                   First month, default None (relative deck)
+    #   name                    Scenario name
+    #   **prices                Price column values, missing columns are 0
+
+    return price_deck({column: [prices.get(column, 0.0)] for column in PRICE_COLUMNS}, start, name)
+
+def escalated_deck(escalation, months = None, start = None, name = 'escalated', escalate = ('oil_price', 'gas_price'), **prices):
+    # Deck of prices escalated by a constant annual percentage, compounded monthly
+    # INPUTS:
+    #   escalation              Annual escalation in percent
+    #   months                  Deck length, default settings forecast_duration
+    #   start                   First month, default None (relative deck)
+    #   name                    Scenario name
+    #   escalate                Columns escalated, the rest are held flat
+    #   **prices                Starting price column values
+
+    months = helpers.read_settings()['forecast_duration'] if months is None else months
+    values = {}
+    for column in PRICE_COLUMNS:
+        method = 'ESC' if column in escalate else 'FLAT'
+        values[column] = price_segment(prices.get(column, 0.0), None, months, method, escalation)
+    return price_deck(values, start, name)
+
+def price_segment(value1, value2, months, method, method_value = None):
+    # Monthly prices of one deck segment
+    # INPUTS:
+    #   value1, value2          Start and end values (value2 used by LIN only)
+    #   months                  Segment length
+    #   method                  'FLAT', 'LIN', 'ESC' or 'STEP'
+    #   method_value            Annual % for ESC, step size for STEP
+    # OUTPUTS:
+    #   prices                  Vector of months prices
+
+    month = np.arange(months)
+    if method == 'FLAT':
+        return np.full(months, float(value1))
+    elif method == 'LIN':
+        end = value1 if value2 is None else value2
+        return value1 + (end - value1) * month / max(months - 1, 1)
+    elif method == 'ESC':
+        return value1 * (1 + float(method_value) / 100) ** (month / 12)
+    elif method == 'STEP':
+        return value1 + float(method_value) * (month // 12)
+    raise ValueError("unknown price method '" + method + "'")
+
+def parse_price_text(text, start = None, horizon = None):
+    # Parses an Aries-style price deck (see the top of this file)
+    # INPUTS:
+    #   text                    Deck text
+    #   start                   First month of decks without START, default settings effective_date
+    #   horizon                 Months TO LIFE runs to, default settings forecast_duration
+    # OUTPUTS:
+    #   decks                   Dictionary of {scenario name: price_deck}
+
+    settings = helpers.read_settings()
+    start = pd.Period(settings['effective_date'] if start is None else start, 'M')
+    horizon = settings['forecast_duration'] if horizon is None else horizon
+    scenarios, order = {}, []
+    scenario, keyword = None, None
+
+    def begin(name):
+        scenarios[name] = {'start': None, 'segments': {column: [] for column in PRICE_COLUMNS}}
+        order.append(name)
+        return name
+
+    for number, line in enumerate(text.splitlines(), 1):
+        tokens = line.split('#')[0].split()
+        if not tokens:
+            continue
+        head = tokens[0].upper()
+        if head == 'SCENARIO':
+            scenario = begin(' '.join(tokens[1:]))
+            continue
+        if scenario is None:
+            scenario = begin('default')
+        if head == 'START':
+            scenarios[scenario]['start'] = pd.Period(tokens[1], 'M')
+            continue
+
+        if head == '"':
+            if keyword is None:
+                raise ValueError('line ' + str(number) + ': " without a keyword above it')
+        elif head in DECK_KEYWORDS:
+            keyword = head
+        else:
+            raise ValueError('line ' + str(number) + ": unknown keyword '" + tokens[0] + "'")
+
+        try:
+            scenarios[scenario]['segments'][DECK_KEYWORDS[keyword]].append(parse_segment(tokens[1:]))
+        except (IndexError, ValueError) as error:
+            raise ValueError('line ' + str(number) + ': ' + str(error)) from None
+
+    decks = {}
+    for name in order:
+        deck_start = scenarios[name]['start']
+        first = start if deck_start is None else deck_start
+        values = {}
+        for column, segments in scenarios[name]['segments'].items():
+            if segments:
+                values[column] = build_segments(segments, first, horizon)
+        decks[name] = price_deck(values if values else {PRICE_COLUMNS[0]: [0.0]}, deck_start, name)
+    return decks
+
+def parse_segment(tokens):
+    # Splits the tokens after a deck keyword into a segment dictionary
+
+    upper = [token.upper() for token in tokens]
+    value1 = float(tokens[0])
+    value2 = None if upper[1] == 'X' else float(tokens[1])
+    position = 2
+    if position < len(tokens) and ('$' in tokens[position] or '/' in tokens[position]):
+        position += 1
+
+    if upper[position] == 'TO':
+        until = None if upper[position + 1] == 'LIFE' else pd.Period(tokens[position + 1], 'M')
+        months = None
+        position += 2
+    else:
+        months = int(float(tokens[position]) * DURATION_UNITS[upper[position + 1]])
+        until = None
+        position += 2
+
+    method = upper[position] if position < len(tokens) else 'FLAT'
+    method_value = float(tokens[position + 1]) if position + 1 < len(tokens) else None
+    if method in ('ESC', 'STEP') and method_value is None:
+        raise ValueError(method + ' needs a value')
+    return {'value1': value1, 'value2': value2, 'months': months, 'until': until, 'method': method, 'method_value': method_value}
+
+def build_segments(segments, start, horizon):
+    # Joins a column's segments into one monthly vector from start. TO LIFE runs
+    # to the forecast horizon
+
+    vectors, month = [], start
+    for segment in segments:
+        if segment['months'] is not None:
+            months = segment['months']
+        elif segment['until'] is not None:
+            months = (segment['until'] - month).n + 1
+        else:
+            months = max((start + horizon - month).n, 1)
+        if months <= 0:
+            raise ValueError('price segment ending ' + str(segment['until']) + ' ends before ' + str(month))
+        vectors.append(price_segment(segment['value1'], segment['value2'], months, segment['method'], segment['method_value']))
+        month += months
+    return np.concatenate(vectors)
+
+def read_price_table(table, start = None, name = 'default'):
+    # Builds a deck from a tabular price table
+    # INPUTS:
+    #   table                   DataFrame with PRICE_COLUMNS, indexed by month (PeriodIndex or
+    #                           dates), with a 'month'/'date' column, or with a plain row index
+    #   start                   First month when the table has no months, default None (relative)
+    #   name                    Scenario name
+    # OUTPUTS:
+    #   deck                    price_deck
+
+    table = table.rename(columns = lambda column: str(column).strip().lower())
+    for column in ('month', 'date'):
+        if column in table.columns:
+            table = table.set_index(column)
+            break
+
+    if isinstance(table.index, (pd.PeriodIndex, pd.DatetimeIndex)) or (len(table) and not is_row_index(table.index)):
+        months = pd.PeriodIndex([pd.Period(month, 'M') for month in table.index])
+        table = pd.DataFrame(table.to_numpy(), index = months, columns = table.columns).sort_index()
+        table = table[~table.index.duplicated(keep = 'last')]
+        table = table.reindex(pd.period_range(months.min(), months.max(), freq = 'M')).ffill()
+        start = table.index[0]
+
+    missing = [column for column in PRICE_COLUMNS if column not in table.columns]
+    if missing:
+        raise ValueError('price table is missing ' + ', '.join(missing))
+    return price_deck(table.loc[:, PRICE_COLUMNS].to_numpy(dtype = float), start, name)
+
+def is_row_index(index):
+    # True for a plain 0, 1, 2... index, i.e. a table without month labels
+
+    return pd.api.types.is_integer_dtype(index) and (index == np.arange(len(index))).all()
+
+def read_price_decks(path, settings = None):
+    # Reads every scenario of a price file, cached per process until the file changes
+    # INPUTS:
+    #   path                    .txt, .xls, .xlsx, .csv or .json price file
+    #   settings                Settings object for the effective date and forecast
+    #                           duration text decks are built to, defaults to read_settings()
+    # OUTPUTS:
+    #   decks                   Dictionary of {scenario name: price_deck}, shared by all callers
+
+    settings = helpers.read_settings() if settings is None else settings
+    path = os.path.abspath(path)
+    return load_price_decks(path, os.path.getmtime(path), str(pd.Period(settings['effective_date'], 'M')), settings['forecast_duration'])
+
+@functools.lru_cache(maxsize = 32)
+def load_price_decks(path, modified, effective_date, horizon):
+    # Parses a price file. modified is only part of the cache key, effective_date
+    # and horizon are only used by text decks
+
+    helpers.count_event('price_file_read')
+    extension = os.path.splitext(path)[1].lower()
+    name = os.path.splitext(os.path.basename(path))[0]
+    if extension == '.txt':
+        with open(path) as file:
+            return parse_price_text(file.read(), effective_date, horizon)
+    elif extension in ('.xls', '.xlsx'):
+        sheets = pd.read_excel(path, sheet_name = None)
+        return {sheet: read_price_table(table, name = sheet) for sheet, table in sheets.items()}
+    elif extension == '.csv':
+        return {name: read_price_table(pd.read_csv(path), name = name)}
+    elif extension == '.json':
+        return {name: read_price_table(pd.read_json(path), name = name)}
+    raise ValueError("unknown price file type '" + extension + "'")
+
+@functools.lru_cache(maxsize = None)
+def default_price_deck():
+    # The packaged default deck (helper_functions/pricing.json), parsed once per
+    # process. Relative - row 0 is each case's effective date
+
+    price_json = helpers.read_default_pricing()
+    return price_deck({column: list(price_json[column].values()) for column in PRICE_COLUMNS}, name = 'default')
\ No newline at end of file
@@ -0,0 +1,235 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from .case import TIMESERIES_COLUMNS
+
+# results_cube.py keeps portfolio timeseries in a memory-mapped file on disk
+#
+# A cube is a directory with two files:
+#
+#   cube.npy                    [columns, cases, months] array in .npy format,
+#                               opened with a memory map
+#   cube.json                   case names, columns, months, effective date, dtype
+#
+# The file is column-major, so one column of every case is one contiguous run
+# of the file and the per-column reductions (totals, rollups, finals) page in
+# only that column. values is a [cases, months, columns] view of the same map,
+# as portfolio.timeseries, which the workers write through - a chunk of cases
+# is one contiguous run per column. Cubes written before the layout changed are
+# case-major and still open, with the same views.
+#
+# portfolio.run(cube = ...) has its workers write their results straight into the
+# mapped file, so a portfolio larger than memory needs no batching and nothing is
+# concatenated afterwards. Slices of a case, a column or a month range are views
+# of the map - no data is read until it is used. Totals and rollups reduce the
+# mapped array a block of cases at a time, so they read each page once and never
+# hold more than CUBE_BLOCK_BYTES of it in memory
+
+# Bytes of the cube reduced at a time by totals and rollups
+CUBE_BLOCK_BYTES = 2 ** 26
+
+# Axis order of cube.npy
+CUBE_AXES = ['columns', 'cases', 'months']
+
+class results_cube:
+
+    def __init__(self, path, mode = 'r'):
+        # Opens an existing cube
+        # INPUTS:
+        #   path                    Cube directory, see create_cube
+        #   mode                    'r' read-only or 'r+' writable
+
+        self.path = path
+        with open(os.path.join(path, 'cube.json')) as file:
+            metadata = json.load(file)
+        self.names = metadata['names']
+        self.columns = metadata['columns']
+        self.effective_date = pd.Period(metadata['effective_date'], 'M')
+        # stored is [columns, cases, months] and values [cases, months, columns],
+        # both views of the one map
+        stored = np.load(self.file_path(), mmap_mode = mode)
+        if metadata.get('axes') == CUBE_AXES:
+            self.stored, self.values = stored, stored.transpose(1, 2, 0)
+        else:
+            self.stored, self.values = stored.transpose(2, 0, 1), stored
+        self.case_index = {name: index for index, name in enumerate(self.names)}
+        self.column_index = {column: index for index, column in enumerate(self.columns)}
+
+    def __len__(self):
+
+        return len(self.names)
+
+    @property
+    def shape(self):
+
+        return self.values.shape
+
+    @property
+    def months(self):
+
+        return self.values.shape[1]
+
+    @property
+    def index(self):
+        # Monthly pd.PeriodIndex of the months axis
+
+        return pd.period_range(self.effective_date, periods = self.months, freq = 'M')
+
+    def file_path(self):
+
+        return os.path.join(self.path, 'cube.npy')
+
+    def flush(self):
+        # Writes changed pages of a writable cube to disk
+
+        if isinstance(self.stored, np.memmap):
+            self.stored.flush()
+
+    def month_offset(self, month):
+        # Converts a month ("YYYY-MM", pd.Period...) or an integer row to a row offset
+
+        if isinstance(month, (int, np.integer)):
+            return int(month)
+        return (pd.Period(month, 'M') - self.effective_date).n
+
+    def row_slice(self, start = None, stop = None):
+        # Converts start/stop months into a slice of rows, stop inclusive as case.row_slice
+
+        start = None if start is None else max(self.month_offset(start), 0)
+        stop = None if stop is None else max(self.month_offset(stop) + 1, 0)
+        return slice(start, stop)
+
+    def case(self, name):
+        # [months, columns] view of one case, by name or position
+
+        return self.values[self.case_index[name] if isinstance(name, str) else name]
+
+    def column(self, column, start = None, stop = None):
+        # [cases, months] view of one column for every case, optionally a month range
+
+        return self.stored[self.column_index[column], :, self.row_slice(start, stop)]
+
+    def window(self, start = None, stop = None):
+        # [cases, months, columns] view of a month range for every case
+
+        return self.values[:, self.row_slice(start, stop)]
+
+    def frame(self, name):
+        # One case as a monthly DataFrame, as case.timeseries
+
+        return pd.DataFrame(self.case(name), index = self.index, columns = self.columns)
+
+    def blocks(self, cases = None, columns = None):
+        # Yields (first, last) ranges of cases holding about CUBE_BLOCK_BYTES each
+        # INPUTS:
+        #   cases                   Cases to cover, default all
+        #   columns                 Columns read per case, default all
+
+        cases = len(self) if cases is None else cases
+        columns = len(self.columns) if columns is None else columns
+        size = max(1, CUBE_BLOCK_BYTES // max(self.months * columns * self.values.itemsize, 1))
+        for first in range(0, cases, size):
+            yield first, min(first + size, cases)
+
+    def total(self, column, start = None, stop = None):
+        # Monthly sum of a column over all cases
+        # OUTPUTS:
+        #   total                   pd.Series indexed by month
+
+        rows = self.row_slice(start, stop)
+        values = self.stored[self.column_index[column]]
+        total = np.zeros(len(range(*rows.indices(self.months))))
+        for first, last in self.blocks(columns = 1):
+            total += values[first:last, rows].sum(axis = 0)
+        return pd.Series(total, index = self.index[rows], name = column)
+
+    def rollup(self, column, groups, start = None, stop = None):
+        # Monthly sums of a column over groups of cases, e.g. by asset or area
+        # INPUTS:
+        #   column                  Timeseries column
+        #   groups                  Group label of every case - a sequence in case order
+        #                           or a dictionary of {case name: label}. Cases without
+        #                           a label are left out
+        #   start, stop             Optional month range, stop inclusive
+        # OUTPUTS:
+        #   rollup                  DataFrame indexed by month with one column per group
+
+        if isinstance(groups, dict):
+            groups = [groups.get(name) for name in self.names]
+        labels = np.array(groups, dtype = object)
+        present = np.flatnonzero(pd.notna(labels))
+        keys, inverse = np.unique(labels[present].astype(str), return_inverse = True)
+
+        # Group sums are one indicator matrix product per block of cases
+        indicator = np.zeros((len(keys), len(self)))
+        indicator[inverse, present] = 1.0
+        rows = self.row_slice(start, stop)
+        values = self.stored[self.column_index[column]]
+        sums = np.zeros((len(keys), len(range(*rows.indices(self.months)))))
+        for first, last in self.blocks(columns = 1):
+            sums += indicator[:, first:last] @ values[first:last, rows]
+        original = {str(label): label for label in labels[present]}
+        return pd.DataFrame(sums.T, index = self.index[rows], columns = [original[key] for key in keys])
+
+    def final(self, column):
+        # Last nonzero value of a column for every case, e.g. cum_pv10 at end of
+        # life (months after end of life are zeroed)
+        # OUTPUTS:
+        #   values                  pd.Series indexed by case name
+
+        stored = self.stored[self.column_index[column]]
+        final = np.zeros(len(self))
+        for first, last in self.blocks(columns = 1):
+            values = stored[first:last]
+            row = self.months - 1 - np.argmax(values[:, ::-1] != 0, axis = 1)
+            final[first:last] = values[np.arange(last - first), row]
+        return pd.Series(final, index = self.names, name = column)
+
+    def aggregate(self):
+        # Rolls up all cases into one monthly timeseries DataFrame, as portfolio.aggregate
+
+        from .portfolio import accumulate_aggregate, finish_aggregate
+        totals = None
+        for first, last in self.blocks():
+            totals = accumulate_aggregate(totals, self.values[first:last], self.columns)
+        return pd.DataFrame(finish_aggregate(totals, self.columns), index = self.index, columns = self.columns)
+
+def create_cube(path, names, columns = None, months = None, effective_date = None, dtype = np.float64, settings = None):
+    # Creates an empty (zeroed) cube on disk and opens it for writing
+    # INPUTS:
+    #   path                    Cube directory, created if missing. An existing cube is replaced
+    #   names                   Case names
+    #   columns                 Timeseries columns, default all TIMESERIES_COLUMNS
+    #   months                  Months per case, default settings forecast_duration
+    #   effective_date          First month, default settings effective_date
+    #   dtype                   Value dtype on disk, e.g. np.float32 to halve the file
+    #   settings                Settings object to use, defaults to read_settings()
+    # OUTPUTS:
+    #   cube                    results_cube opened 'r+'
+
+    from . import helper_functions as helpers
+    if settings is None:
+        settings = helpers.read_settings()
+    columns = list(TIMESERIES_COLUMNS if columns is None else columns)
+    months = settings['forecast_duration'] if months is None else months
+    effective_date = pd.Period(settings['effective_date'] if effective_date is None else effective_date, 'M')
+
+    os.makedirs(path, exist_ok = True)
+    metadata = {
+        'names':            [str(name) for name in names],
+        'columns':          columns,
+        'effective_date':   str(effective_date),
+        'dtype':            np.dtype(dtype).str,
+        'axes':             CUBE_AXES
+    }
+    values = np.lib.format.open_memmap(os.path.join(path, 'cube.npy'), mode = 'w+', dtype = dtype, shape = (len(columns), len(names), months))
+    del values
+    with open(os.path.join(path, 'cube.json'), 'w') as file:
+        json.dump(metadata, file)
+    return results_cube(path, 'r+')
+
+def open_cube(path, mode = 'r'):
+    # Opens a cube written by portfolio.run or create_cube, see results_cube
+
+    return results_cube(path, mode)
\ No newline at end of file
@@ -0,0 +1,198 @@
+import numpy as np
+import pandas as pd
+from . import helper_functions as helpers
+from . import economics as econ
+
+# rollups.py sums portfolio results up a hierarchy of groups (well -> pad -> field
+# -> asset...) without building a DataFrame per case
+#
+# Every case carries a dictionary of {level: label}, e.g. {'pad': 'P-12', 'field':
+# 'North', 'asset': 'Basin A'}. Each level keeps running totals for all its
+# groups at once:
+#
+#   sum                         [groups, months, columns] timeseries sums
+#   weighted                    [groups, months] sums of column * weight for the
+#                               portfolio AGGREGATE_WEIGHTS columns
+#   oneline                     [groups, oneline items] oneline sums
+#   cases                       [groups] case counts
+#
+# Cases are added a block at a time with segment sums - the block is sorted by
+# group and summed with np.add.reduceat, one pass per level. Removing a case
+# subtracts the same contribution, so after one case changes its groups are
+# updated with remove + add instead of rolling everything up again
+#
+# Group results are finished from the totals. Flows and PVs are sums; interests,
+# prices and shrink are weighted averages as in the portfolio aggregate. Items
+# that do not add up are solved again from the group streams:
+#
+#   working_int, rev_int        maximum of the group's weighted average
+#   peak_<phase>_rate           maximum of the group's summed entry rate
+#   irr, payout, dcf_roi        from the group's net cash flow and net capex
+#
+# Items the timeseries columns kept cannot give, and breakevens, are NaN. A level
+# 'total' holding every case is always present
+
+TOTAL_LEVEL = 'total'
+
+# Oneline items solved from group streams, by the timeseries column they need
+PEAK_ITEMS = {
+    'working_int':          'working_int',
+    'rev_int':              'rev_int',
+    'peak_oil_rate':        'entry_oil_rate',
+    'peak_gas_rate':        'entry_gas_rate',
+    'peak_ngl_rate':        'entry_ngl_rate',
+    'peak_water_rate':      'entry_water_rate'
+}
+
+METRIC_ITEMS = ['irr', 'payout_month', 'discounted_payout_month', 'dcf_roi']
+
+def segment_sum(values, codes, groups):
+    # Sums the rows of values by group code
+    # INPUTS:
+    #   values                  Array with one row per case on the first axis
+    #   codes                   Group code of every row, -1 to leave a row out
+    #   groups                  Number of groups
+    # OUTPUTS:
+    #   sums                    Array of shape [groups, ...]
+
+    sums = np.zeros((groups,) + values.shape[1:])
+    order = np.argsort(codes, kind = 'stable')
+    order = order[codes[order] >= 0]
+    if not len(order):
+        return sums
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    sums[sorted_codes[starts]] = np.add.reduceat(values[order], starts, axis = 0)
+    return sums
+
+class rollup:
+
+    def __init__(self, groups, columns, oneline_columns, months, settings = None):
+        # INPUTS:
+        #   groups                  Dictionary of {level: label} for every case, in case order
+        #   columns                 Timeseries columns of the results
+        #   oneline_columns         Oneline items of the results
+        #   months                  Months per case
+        #   settings                Settings object, defaults to read_settings()
+
+        from .portfolio import AGGREGATE_WEIGHTS, TIME_COLUMNS
+
+        self.settings = helpers.read_settings() if settings is None else settings
+        self.columns = list(columns)
+        self.oneline_columns = list(oneline_columns)
+        self.months = months
+        self.weights = {column: weight for column, weight in AGGREGATE_WEIGHTS.items() if column in self.columns and weight in self.columns}
+        self.averages = [column for column in AGGREGATE_WEIGHTS if column in self.columns]
+        self.time_columns = [column for column in TIME_COLUMNS if column in self.columns]
+        self.time = None
+
+        self.levels = list(dict.fromkeys(level for case_groups in groups for level in case_groups)) + [TOTAL_LEVEL]
+        self.labels, self.codes, self.totals = {}, {}, {}
+        for level in self.levels:
+            if level == TOTAL_LEVEL:
+                labels, codes = np.array([TOTAL_LEVEL], dtype = object), np.zeros(len(groups), dtype = np.int64)
+            else:
+                values = [case_groups.get(level) for case_groups in groups]
+                present = [value for value in values if value is not None]
+                labels = np.array(list(dict.fromkeys(present)), dtype = object)
+                lookup = {label: code for code, label in enumerate(labels)}
+                codes = np.array([lookup.get(value, -1) if value is not None else -1 for value in values], dtype = np.int64)
+            self.labels[level], self.codes[level] = labels, codes
+            self.totals[level] = {
+                'sum':          np.zeros((len(labels), months, len(self.columns))),
+                'weighted':     {column: np.zeros((len(labels), months)) for column in self.weights},
+                'oneline':      np.zeros((len(labels), len(self.oneline_columns))),
+                'cases':        np.zeros(len(labels))
+            }
+
+    def add(self, indices, timeseries, oneline_values, sign = 1.0):
+        # Adds a block of cases to every level
+        # INPUTS:
+        #   indices                 Portfolio index of every case in the block
+        #   timeseries              [cases, months, columns] array of the block
+        #   oneline_values          [cases, oneline items] array of the block
+        #   sign                    -1 to remove the block, see remove
+
+        indices = np.asarray(indices)
+        timeseries = np.asarray(timeseries)
+        oneline_values = np.asarray(oneline_values, dtype = float)
+        if self.time is None and len(indices):
+            from .portfolio import first_time_values
+            self.time = first_time_values(timeseries, self.columns)
+
+        offsets = {column: offset for offset, column in enumerate(self.columns)}
+        weighted = {column: timeseries[:, :, offsets[column]] * timeseries[:, :, offsets[weight]] for column, weight in self.weights.items()}
+        for level in self.levels:
+            codes, totals = self.codes[level][indices], self.totals[level]
+            groups = len(self.labels[level])
+            totals['sum'] += sign * segment_sum(timeseries, codes, groups)
+            for column, values in weighted.items():
+                totals['weighted'][column] += sign * segment_sum(values, codes, groups)
+            totals['oneline'] += sign * segment_sum(np.nan_to_num(oneline_values), codes, groups)
+            totals['cases'] += sign * np.bincount(codes[codes >= 0], minlength = groups)
+
+    def remove(self, indices, timeseries, oneline_values):
+        # Subtracts a block of cases added earlier, e.g. the old results of a changed case
+
+        self.add(indices, timeseries, oneline_values, sign = -1.0)
+
+    def values(self, level):
+        # Timeseries of every group of a level
+        # OUTPUTS:
+        #   values                  Array of shape [groups, months, columns]
+
+        totals = self.totals[level]
+        values = totals['sum'].copy()
+        offsets = {column: offset for offset, column in enumerate(self.columns)}
+        if self.time is not None:
+            for column in self.time_columns:
+                values[:, :, offsets[column]] = self.time[:, offsets[column]]
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            for column in self.averages:
+                mean = totals['sum'][:, :, offsets[column]] / totals['cases'][:, None]
+                if column in self.weights:
+                    weights = totals['sum'][:, :, offsets[self.weights[column]]]
+                    values[:, :, offsets[column]] = np.where(weights != 0, totals['weighted'][column] / weights, mean)
+                else:
+                    values[:, :, offsets[column]] = mean
+        return values
+
+    def frame(self, level, label):
+        # Monthly DataFrame of one group, as portfolio.aggregate
+
+        code = list(self.labels[level]).index(label)
+        index = pd.period_range(pd.Period(self.settings['effective_date'], 'M'), periods = self.months, freq = 'M')
+        return pd.DataFrame(self.values(level)[code], index = index, columns = self.columns)
+
+    def oneline(self, level):
+        # Onelines of every group of a level
+        # OUTPUTS:
+        #   oneline                 DataFrame indexed by group label, with a 'cases' count
+
+        values = self.values(level)
+        oneline = self.totals[level]['oneline'].copy()
+        offsets = {column: offset for offset, column in enumerate(self.columns)}
+        items = {item: offset for offset, item in enumerate(self.oneline_columns)}
+
+        for item, column in PEAK_ITEMS.items():
+            if item in items:
+                oneline[:, items[item]] = values[:, :, offsets[column]].max(axis = 1, initial = 0) if column in offsets else np.nan
+        metrics = [item for item in METRIC_ITEMS if item in items]
+        if metrics:
+            # No time columns yet (no cases added, or every case errored) leaves the metrics NaN
+            if self.time is not None and {'net_cash_flow', 'net_capex', 'days_start', 'days_end'}.issubset(offsets):
+                column = lambda name: values[:, :, offsets[name]]
+                solved = econ.calc_cash_flow_metrics(
+                    column('net_cash_flow'), column('net_capex'), self.time[:, offsets['days_start']], self.time[:, offsets['days_end']], self.settings
+                )
+                for item in metrics:
+                    oneline[:, items[item]] = solved[item]
+            else:
+                oneline[:, [items[item] for item in metrics]] = np.nan
+        for item in econ.breakeven_columns(self.settings):
+            if item in items:
+                oneline[:, items[item]] = np.nan
+
+        oneline = pd.DataFrame(oneline, index = pd.Index(self.labels[level], name = level), columns = self.oneline_columns)
+        oneline.insert(0, 'cases', self.totals[level]['cases'].round().astype(np.int64))
+        return oneline
\ No newline at end of file
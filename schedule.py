@@ -0,0 +1,163 @@
+import numpy as np
+from . import decline_calculators as dca
+from . import helper_functions as helpers
+
+# schedule.py builds development scenarios from a type curve and a drilling schedule
+#
+# Every well on a schedule follows the same type curve, shifted to the month it
+# comes online. The aggregate forecast is therefore the convolution of the
+# wells-per-month schedule with the type curve, and the capex timeseries the
+# convolution of the schedule with the capex-per-well profile:
+#
+#   volume[m]   = sum over k of wells[k] * type_volume[m - k]
+#   capex[m]    = sum over k of wells[k] * capex_profile[m - k]
+#
+# Entry and exit rates convolve the same way, so the result has the (months, 3)
+# layout of any calc_(declinetype)_forecast and goes straight into case.add_forecast.
+# Long schedules are convolved by FFT, short ones directly
+#
+# Schedules are vectors of wells coming online in each month (fractions allowed),
+# built directly, from a list of locations with per-well scaling, or from a rig count
+
+# Convolutions with both inputs longer than this use FFT
+FFT_THRESHOLD = 128
+
+def type_curve(forecast_type = 'exponential', months = None, qi = None, De = None, Dte = None, b = None, settings = None, time_vector = None):
+    # One type well forecast, with the same inputs as case.generate_forecast
+    # INPUTS:
+    #   forecast_type           Decline type, see case.generate_forecast
+    #   months                  Type curve length, default settings forecast_duration
+    #   qi                      Initial rate
+    #   De                      Initial decline rate, secant effective
+    #   Dte                     Terminal decline rate, secant effective
+    #   b                       b-factor
+    #   settings                Settings object, defaults to read_settings()
+    #   time_vector             Month boundaries (days) from the first online month, as
+    #                           case.time_vector, default uniform settings days_in_month
+    #                           months. Cut to months when both are given
+    # OUTPUTS:
+    #   forecast                Array of shape (months, 3) - entry rates, exit rates, volumes
+
+    settings = helpers.read_settings() if settings is None else settings
+    Di, Dt = helpers.parse_declines(De, Dte, b, forecast_type)
+    if time_vector is None:
+        months = settings['forecast_duration'] if months is None else months
+        time_vector = np.linspace(0, months, months + 1) * settings['days_in_month']
+    elif months is not None:
+        time_vector = time_vector[:months + 1]
+    return dca.calc_batch_forecast(time_vector, forecast_type, qi = qi, Di = Di, b = b, Dt = Dt, settings = settings)[0]
+
+def schedule_from_locations(months, onlines, scale = None):
+    # Wells-per-month schedule from a list of locations
+    # INPUTS:
+    #   months                  Schedule length
+    #   onlines                 Month offset each location comes online, one per location
+    #   scale                   Per-location multiplier (lateral length, risking...),
+    #                           default 1 for every location
+    # OUTPUTS:
+    #   schedule                Vector of (scaled) wells coming online each month.
+    #                           Locations past the last month are dropped
+
+    onlines = np.asarray(onlines, dtype = int)
+    weights = np.ones(len(onlines)) if scale is None else np.broadcast_to(np.asarray(scale, dtype = float), onlines.shape)
+    inside = (onlines >= 0) & (onlines < months)
+    return np.bincount(onlines[inside], weights = weights[inside], minlength = months).astype(float)
+
+def rig_schedule(months, locations, rigs = 1, wells_per_rig_month = 2.0, first_month = 0):
+    # Wells-per-month schedule of a rig program drilling out an inventory
+    # INPUTS:
+    #   months                  Schedule length
+    #   locations               Locations in the inventory
+    #   rigs                    Rig count, scalar or vector by month
+    #   wells_per_rig_month     Wells one rig brings online per month
+    #   first_month             Month offset of the first wells
+    # OUTPUTS:
+    #   schedule                Vector of wells coming online each month, summing to
+    #                           locations unless the schedule runs out of months
+
+    capacity = np.zeros(months)
+    capacity[first_month:] = np.broadcast_to(np.asarray(rigs, dtype = float), (months,))[first_month:] * wells_per_rig_month
+    drilled = np.minimum(np.cumsum(capacity), locations)
+    return np.diff(drilled, prepend = 0)
+
+def convolve(schedule, profile, months):
+    # Sum of profile shifted to every month of schedule, cut to months entries
+    # INPUTS:
+    #   schedule                Vector of weights per month
+    #   profile                 Per-well profile, vector or array with months on axis 0
+    #   months                  Output length
+    # OUTPUTS:
+    #   result                  Array of shape (months,) + profile.shape[1:]
+
+    schedule = np.asarray(schedule, dtype = float)[:months]
+    profile = np.asarray(profile, dtype = float)
+    flat = profile.reshape(len(profile), -1)[:months]
+    result = np.zeros((months, flat.shape[1]))
+    if not len(schedule) or not len(flat):
+        return result.reshape((months,) + profile.shape[1:])
+
+    if min(len(schedule), len(flat)) > FFT_THRESHOLD:
+        size = 1 << int(np.ceil(np.log2(len(schedule) + len(flat) - 1)))
+        spectrum = np.fft.rfft(schedule, size)[:, None] * np.fft.rfft(flat, size, axis = 0)
+        full = np.fft.irfft(spectrum, size, axis = 0)[:months]
+        # Round-off can leave tiny negatives where both inputs are non-negative
+        if (schedule >= 0).all() and (flat >= 0).all():
+            full = np.maximum(full, 0)
+        result[:len(full)] = full
+    else:
+        for column in range(flat.shape[1]):
+            full = np.convolve(schedule, flat[:, column])[:months]
+            result[:len(full), column] = full
+    return result.reshape((months,) + profile.shape[1:])
+
+def schedule_forecast(schedule, forecast, months = None, risk = 1.0):
+    # Aggregate forecast of a schedule of identical type wells
+    # INPUTS:
+    #   schedule                Wells coming online each month, vector
+    #   forecast                Type well forecast, (type months, 3) as from type_curve
+    #   months                  Output length, default len(schedule)
+    #   risk                    Production risk factor applied to every well
+    # OUTPUTS:
+    #   forecast                Array of shape (months, 3), as taken by case.add_forecast
+
+    months = len(schedule) if months is None else months
+    return convolve(schedule, forecast, months) * risk
+
+def schedule_capex(schedule, capex_per_well, months = None):
+    # Capex timeseries of a schedule
+    # INPUTS:
+    #   schedule                Wells coming online each month, vector
+    #   capex_per_well          Capex of one well by month relative to its online month,
+    #                           scalar (all in the online month) or vector. Spend before
+    #                           first production is given by shifting the schedule
+    #   months                  Output length, default len(schedule)
+    # OUTPUTS:
+    #   capex                   Vector of months capex
+
+    months = len(schedule) if months is None else months
+    return convolve(schedule, np.atleast_1d(np.asarray(capex_per_well, dtype = float)), months)
+
+def schedule_timeseries(schedule, forecast, capex_per_well = None, first = 0, months = None, risk = 1.0):
+    # Aggregate forecast and capex of a schedule, aligned to a case's rows
+    # INPUTS:
+    #   schedule                Wells coming online each month, vector
+    #   forecast                Type well forecast, (type months, 3)
+    #   capex_per_well          See schedule_capex, default no capex
+    #   first                   Row of the schedule's first month. Negative when the
+    #                           schedule starts before the case - wells already online
+    #                           keep producing into the case
+    #   months                  Case months, default len(schedule) + first
+    #   risk                    Production risk factor, see schedule_forecast
+    # OUTPUTS:
+    #   forecast                Array of shape (months, 3)
+    #   capex                   Vector of months capex, None without capex_per_well
+
+    schedule = np.asarray(schedule, dtype = float)
+    months = len(schedule) + first if months is None else months
+    if first > 0:
+        schedule, first = np.concatenate([np.zeros(first), schedule]), 0
+    total = months - first
+
+    production = schedule_forecast(schedule, forecast, total, risk)[-first:]
+    capex = None if capex_per_well is None else schedule_capex(schedule, capex_per_well, total)[-first:]
+    return production, capex
\ No newline at end of file
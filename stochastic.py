@@ -0,0 +1,264 @@
+import numpy as np
+import pandas as pd
+from . import decline_calculators as dca
+from . import helper_functions as helpers
+from . import economics as econ
+from . import time_grids
+from .case import PARTIAL_MONTH_COLUMNS, calc_derived_columns
+
+# stochastic.py runs Monte Carlo and sensitivity analysis on a single-well model
+#
+# The model is a dictionary of the same inputs a simple case uses (decline
+# parameters, ratios, prices, costs, interests and taxes). Any input may be a
+# fixed value or a distribution:
+#
+#   ('normal', mean, sd)                ('lognormal', mean, sigma)  <- of log(value)
+#   ('uniform', low, high)              ('triangular', low, mode, high)
+#   callable(rng, n)                    returning n samples
+#
+# Realizations are not separate case objects - every sampled input becomes a
+# vector, the forecast is calculated with the batch decline calculators and the
+# economics with calc_derived_columns, as [realizations, months] arrays
+#
+# Percentiles use the reserves convention: P10 is the high estimate (exceeded by
+# 10% of realizations), P90 the low estimate
+
+MODEL_DEFAULTS = {
+    'phase':                'oil',
+    'forecast_type':        'modified hyperbolic',
+    'qi':                   0.0,
+    'De':                   None,
+    'b':                    None,
+    'Dte':                  None,
+    'oil_ratio':            0.0,
+    'gas_ratio':            0.0,
+    'ngl_ratio':            0.0,
+    'water_ratio':          0.0,
+    'shrink':               1.0,
+    'oil_price':            0.0,
+    'gas_price':            0.0,
+    'oil_diff':             0.0,
+    'gas_diff':             0.0,
+    'ngl_diff':             0.0,
+    'fixed_opex':           0.0,
+    'oil_opex':             0.0,
+    'gas_opex':             0.0,
+    'ngl_opex':             0.0,
+    'water_opex':           0.0,
+    'overhead':             0.0,
+    'capex':                0.0,
+    'working_int':          1.0,
+    'rev_int':              1.0,
+    'sev_rate':             0.0,
+    'ad_val_rate':          0.0
+}
+
+# Physical limits applied to sampled values. b stays above zero - parse_declines
+# divides by b, and b = 1e-6 is an exponential decline to working precision
+PARAMETER_BOUNDS = {
+    'qi':                   (0, np.inf),
+    'De':                   (0, 0.9999),
+    'Dte':                  (1e-6, 0.9999),
+    'b':                    (1e-6, np.inf),
+    'shrink':               (0, 1),
+    'working_int':          (0, 1),
+    'rev_int':              (0, 1)
+}
+
+DISTRIBUTIONS = {
+    'normal':               lambda rng, n, mean, sd: rng.normal(mean, sd, n),
+    'lognormal':            lambda rng, n, mean, sigma: rng.lognormal(mean, sigma, n),
+    'uniform':              lambda rng, n, low, high: rng.uniform(low, high, n),
+    'triangular':           lambda rng, n, low, mode, high: rng.triangular(low, mode, high, n)
+}
+
+RESULT_COLUMNS = [
+    'net_pv10', 'net_cash_flow', 'reserves_oil', 'reserves_gas', 'reserves_ngl', 'eur_oil', 'eur_gas', 'eur_ngl', 'end_of_life'
+]
+
+class monte_carlo:
+
+    def __init__(self, model, realizations = 1000, seed = None, **settings_overrides):
+
+        self.model = {**MODEL_DEFAULTS, **model}
+        self.realizations = realizations
+        self.rng = np.random.default_rng(seed)
+        self.settings = helpers.read_settings().replace(**settings_overrides)
+
+    def stochastic_parameters(self):
+        # Names of model inputs given as distributions
+
+        return [name for name, value in self.model.items() if is_distribution(value)]
+
+    def sample(self):
+        # Draws one value per realization for every stochastic input
+        # OUTPUTS:
+        #   samples                 Dictionary of {parameter: vector of samples}
+
+        samples = {}
+        for name in self.stochastic_parameters():
+            samples[name] = sample_parameter(self.model[name], self.rng, self.realizations)
+            if name in PARAMETER_BOUNDS:
+                samples[name] = np.clip(samples[name], *PARAMETER_BOUNDS[name])
+        return samples
+
+    def run(self, chunksize = 500):
+        # Samples and evaluates all realizations
+        # INPUTS:
+        #   chunksize               Realizations evaluated per array pass, limits memory
+        # OUTPUTS:
+        #   None - populates samples, results (one row per realization) and summary
+
+        self.samples = self.sample()
+        self.results = evaluate_model(self.model, self.samples, self.realizations, self.settings, chunksize)
+        self.summary = summarize(self.results)
+
+    def tornado(self, metric = 'net_pv10', low = 10, high = 90):
+        # One-at-a-time sensitivity: each stochastic input is moved to its low and
+        # high percentile with every other input held at its median
+        # INPUTS:
+        #   metric                  Result column to measure
+        #   low, high               Percentiles of each input to test
+        # OUTPUTS:
+        #   tornado                 DataFrame sorted by swing, largest first
+
+        if not hasattr(self, 'samples'):
+            self.run()
+
+        parameters = self.stochastic_parameters()
+        base = {name: np.median(self.samples[name]) for name in parameters}
+        cases = [dict(base)]
+        for name in parameters:
+            for percentile in (low, high):
+                cases.append({**base, name: np.percentile(self.samples[name], percentile)})
+
+        samples = {name: np.array([values[name] for values in cases]) for name in parameters}
+        results = evaluate_model(self.model, samples, len(cases), self.settings)[metric].to_numpy()
+
+        tornado = pd.DataFrame({
+            'low_value':        samples_at(samples, parameters, 1),
+            'high_value':       samples_at(samples, parameters, 2),
+            'low_' + metric:    results[1::2],
+            'high_' + metric:   results[2::2]
+        }, index = parameters)
+        tornado['base_' + metric] = results[0]
+        tornado['swing'] = (tornado['high_' + metric] - tornado['low_' + metric]).abs()
+        return tornado.sort_values('swing', ascending = False)
+
+def samples_at(samples, parameters, first):
+    # Picks parameter k's value from tornado case (first + 2k)
+
+    return [samples[name][first + 2 * k] for k, name in enumerate(parameters)]
+
+def is_distribution(value):
+
+    return callable(value) or (isinstance(value, tuple) and len(value) > 0 and value[0] in DISTRIBUTIONS)
+
+def sample_parameter(distribution, rng, n):
+    # Draws n samples from a distribution spec
+    # INPUTS:
+    #   distribution            Tuple spec or callable(rng, n)
+    #   rng                     numpy Generator
+    #   n                       Number of samples
+    # OUTPUTS:
+    #   samples                 Vector of n samples
+
+    if callable(distribution):
+        return np.asarray(distribution(rng, n), dtype = float)
+    return DISTRIBUTIONS[distribution[0]](rng, n, *distribution[1:])
+
+def evaluate_model(model, samples, realizations, settings, chunksize = 500):
+    # Evaluates a model for every realization, chunksize realizations at a time
+    # INPUTS:
+    #   model                   Model dictionary (fixed values and distributions)
+    #   samples                 Dictionary of {parameter: vector of samples}
+    #   realizations            Number of realizations
+    #   settings                Settings object
+    #   chunksize               Realizations per array pass
+    # OUTPUTS:
+    #   results                 DataFrame of RESULT_COLUMNS, one row per realization
+
+    model = {**MODEL_DEFAULTS, **model}
+    results = []
+    for start in range(0, realizations, chunksize):
+        stop = min(start + chunksize, realizations)
+        parameters = {}
+        for name, value in model.items():
+            if name in samples:
+                parameters[name] = samples[name][start:stop]
+            else:
+                parameters[name] = value
+        results.append(evaluate_realizations(parameters, stop - start, settings))
+    return pd.DataFrame(np.concatenate(results), columns = RESULT_COLUMNS)
+
+def evaluate_realizations(parameters, realizations, settings):
+    # Forecast, economics and end of life for a set of realizations in one pass
+    # INPUTS:
+    #   parameters              Dictionary of model inputs, scalars or vectors
+    #   realizations            Number of realizations
+    #   settings                Settings object
+    # OUTPUTS:
+    #   results                 Array of shape [realizations, len(RESULT_COLUMNS)]
+
+    months = settings['forecast_duration']
+    time_vector = time_grids.calc_month_edges(settings['effective_date'], months, settings['time_grid'], settings)
+    column = lambda name: np.broadcast_to(np.asarray(parameters[name], dtype = float), (realizations,)).reshape(-1, 1)
+
+    forecast_type, phase = parameters['forecast_type'], parameters['phase']
+    Di, Dt = helpers.parse_declines(parameters['De'], parameters['Dte'], parameters['b'], forecast_type)
+    forecast = dca.calc_batch_forecast(time_vector, forecast_type, qi = parameters['qi'], Di = Di, b = parameters['b'], Dt = Dt, settings = settings)
+    base_volume = np.broadcast_to(forecast[..., 2], (realizations, months))
+
+    inputs = {
+        'days_start':       time_vector[:-1],
+        'working_int':      column('working_int'),
+        'rev_int':          column('rev_int'),
+        'shrink':           column('shrink'),
+        'gross_fixed_opex': column('fixed_opex'),
+        'gross_overhead':   column('overhead'),
+        'sev_rate':         column('sev_rate'),
+        'ad_val_deductible_rate': column('ad_val_rate')
+    }
+    for price in ['oil_price', 'gas_price', 'oil_diff', 'gas_diff', 'ngl_diff']:
+        inputs[price] = column(price)
+    for other in ['oil', 'gas', 'ngl', 'water']:
+        inputs[other + '_volume'] = base_volume if other == phase else base_volume * column(other + '_ratio')
+        inputs[other + '_opex_rate'] = column(other + '_opex')
+
+    gross_capex = np.zeros((realizations, months))
+    gross_capex[:, 0] = column('capex')[:, 0]
+    inputs['gross_capex'] = gross_capex
+
+    values = calc_derived_columns(inputs, settings)
+
+    end_of_life, fraction = econ.calc_economic_limit(values, settings['loss_function'], settings['partial_month_limit'])
+    if fraction.any():
+        weights = econ.economic_limit_weights(end_of_life, fraction, months)
+        for name in PARTIAL_MONTH_COLUMNS:
+            inputs[name] = inputs[name] * weights
+        values = calc_derived_columns(inputs, settings)
+
+    # Partial limit months are scaled through the inputs above, so the taxes and
+    # discounting of the derived columns follow, and are kept whole here
+    kept = np.arange(months) < (end_of_life + (fraction > 0)).reshape(-1, 1)
+    total = lambda name: (np.broadcast_to(values[name], kept.shape) * kept).sum(axis = 1)
+    return np.column_stack([
+        total('net_pv10'), total('net_cash_flow'),
+        total('net_oil_volume'), total('net_gas_volume'), total('net_ngl_volume'),
+        total('oil_volume'), total('gas_volume'), total('ngl_volume'),
+        end_of_life
+    ])
+
+def summarize(results):
+    # P10/P50/P90 and mean of every result column
+    # INPUTS:
+    #   results                 DataFrame, one row per realization
+    # OUTPUTS:
+    #   summary                 DataFrame indexed P10, P50, P90, mean
+
+    return pd.DataFrame({
+        'P10':      results.quantile(0.9),
+        'P50':      results.quantile(0.5),
+        'P90':      results.quantile(0.1),
+        'mean':     results.mean()
+    }).T
\ No newline at end of file
@@ -0,0 +1,6 @@
+# tests checks behaviour (not speed, see benchmarks) of the numerical building blocks
+#
+#   USAGE:
+#       python -m pytest pumper/tests               from the directory holding pumper
+#
+#   Tests are plain pytest functions on small synthetic inputs with known answers
\ No newline at end of file
@@ -0,0 +1,37 @@
+import numpy as np
+from .. import decline_calculators as dca
+
+# Batch decline calculators against the single-well calculators, well by well
+
+TIME_VECTOR = np.linspace(0, 120, 121) * 30.4375
+
+SINGLE = {
+    'exponential':          dca.calc_exponential_forecast,
+    'harmonic':             dca.calc_harmonic_forecast,
+    'hyperbolic':           dca.calc_hyperbolic_forecast,
+    'modified hyperbolic':  dca.calc_mod_hyperbolic_forecast
+}
+
+WELLS = {
+    'qi':   np.array([1000.0, 250.0, 40.0]),
+    'Di':   np.array([0.9, 1.5, 0.3]),
+    'b':    np.array([0.5, 1.0, 1.4]),
+    'Dt':   np.array([0.3, 0.3, 0.1])
+}
+
+def test_batch_matches_single_well_forecasts():
+
+    for forecast_type, single in SINGLE.items():
+        batch = dca.calc_batch_forecast(TIME_VECTOR, forecast_type, **WELLS)
+        assert batch.shape == (3, 120, 3)
+        for well in range(3):
+            parameters = {name: values[well] for name, values in WELLS.items()}
+            assert np.allclose(batch[well], single(TIME_VECTOR, **parameters), rtol = 1e-9), forecast_type
+
+def test_batch_forecast_does_not_depend_on_its_length():
+
+    batch = dca.calc_batch_forecast(TIME_VECTOR, 'hyperbolic', **WELLS)
+    shorter = dca.calc_batch_forecast(TIME_VECTOR[:61], 'hyperbolic', **WELLS)
+    assert np.allclose(batch[:, :60], shorter)
+    assert np.all(batch[:, :, 2] > 0)
+    assert np.all(np.diff(batch[:, :, 0], axis = 1) < 0)
\ No newline at end of file
@@ -0,0 +1,126 @@
+import numpy as np
+from ..case import COLUMN_INDEX, TIMESERIES_COLUMNS, case
+
+# Case timeseries held as one [months, columns] array
+
+def test_columns_are_views_into_case_data():
+
+    well = case(forecast_duration = 12)
+    well.column('oil_price')[:] = 70
+    assert np.all(well.data[:, COLUMN_INDEX['oil_price']] == 70)
+    assert well.data.flags['F_CONTIGUOUS']
+    frame = well.timeseries
+    assert list(frame.columns) == TIMESERIES_COLUMNS
+    assert len(frame) == 12 and str(frame.index[0]) == str(well.effective_date)
+    assert np.all(frame['oil_price'] == 70)
+
+def test_timeseries_round_trips_through_dataframe():
+
+    well = case(forecast_duration = 12)
+    well.generate_forecast('oil', forecast_type = 'exponential', qi = 1000, De = 0.5)
+    frame = well.timeseries
+    copy = case(forecast_duration = 12)
+    copy.timeseries = frame
+    assert np.array_equal(copy.data, well.data)
+    assert np.array_equal(copy.timeseries.to_numpy(), frame.to_numpy())
+
+def test_forecast_starting_before_effective_date_is_clipped():
+
+    well, early = case(forecast_duration = 24), case(forecast_duration = 24)
+    well.generate_forecast('oil', forecast_type = 'exponential', qi = 1000, De = 0.5)
+    early.generate_forecast('oil', forecast_type = 'exponential', qi = 1000, De = 0.5, start = early.effective_date - 3)
+    assert np.allclose(early.column('oil_volume')[:-3], well.column('oil_volume')[3:])
+
+def build_case(oil_price, working_int = 1.0):
+
+    well = case(forecast_duration = 36)
+    well.generate_forecast('oil', forecast_type = 'exponential', qi = 1000, De = 0.5)
+    well.generate_forecast('gas', forecast_type = 'exponential', qi = 3000, De = 0.4)
+    well.flat_pricing(oil_price, -5, 3, -0.5, 0.3)
+    well.assign_ownership(working_int, 0.8)
+    well.shrink(0.9)
+    well.assign_variable_opex(2.0, 'oil')
+    well.assign_tax(0.01, 0.046)
+    well.flat_fixed_opex(5000)
+    well.assign_capex(2e6)
+    well.calc_cash_flow()
+    return well
+
+def test_edited_inputs_recalculate_like_a_fresh_case():
+
+    well = build_case(60)
+    well.assign_to_timeseries(80, 'oil_price', start = well.effective_date + 12)
+    well.assign_ownership(0.5, 0.8, start = well.effective_date + 24)
+    fresh = build_case(60)
+    fresh.column('oil_price')[12:] = 80
+    fresh.column('working_int')[24:] = 0.5
+    fresh.invalidate('oil_price')
+    fresh.invalidate('working_int')
+    assert np.allclose(well.timeseries.to_numpy(), fresh.timeseries.to_numpy())
+
+def test_edit_only_dirties_later_months():
+
+    well = build_case(60)
+    well.recalculate()
+    well.assign_to_timeseries(80, 'oil_price', start = well.effective_date + 12)
+    assert well.dirty['net_revenue'] == (12, 36)
+    assert 'net_opex' not in well.dirty
+    before = well.column('net_revenue')[:12].copy()
+    well.recalculate()
+    assert not well.dirty
+    assert np.array_equal(well.column('net_revenue')[:12], before)
+
+# Case forecasts built different ways on the same time grid
+
+HYPERBOLIC = {'forecast_type': 'hyperbolic', 'qi': 1000, 'De': 0.6, 'b': 0.9}
+
+def new_case():
+
+    return case(time_grid = 'calendar', effective_date = '2024-01', forecast_duration = 24)
+
+def test_calendar_chain_and_type_curve_match_forecast():
+
+    single, chain, schedule = new_case(), new_case(), new_case()
+    single.generate_forecast('oil', **HYPERBOLIC)
+    chain.generate_forecast_chain('oil', [HYPERBOLIC])
+    schedule.add_schedule('oil', [1], HYPERBOLIC)
+    assert np.allclose(chain.column('oil_volume'), single.column('oil_volume'))
+    assert np.allclose(schedule.column('oil_volume'), single.column('oil_volume'))
+
+def test_calendar_flat_forecast_uses_month_lengths():
+
+    flat = new_case()
+    flat.generate_forecast('oil', forecast_type = 'flat', qi = 100)
+    assert np.allclose(flat.column('oil_volume')[:3], [3100, 2900, 3100])
+def reversion_workflow(oil_price):
+
+    return {
+        'forecasts':    [{'phase': 'oil', **HYPERBOLIC}],
+        'ownership':    [{'working_int': 1.0, 'rev_int': 0.8}],
+        'pricing':      {'oil_price': oil_price, 'oil_diff': 0, 'gas_price': 0, 'gas_diff': 0, 'ngl_diff': 0},
+        'fixed_opex':   [{'input': 5000, 'input_type': 'flat'}],
+        'capex':        [{'amount': 2e6}],
+        'reversions':   [{'working_int': 0.5, 'rev_int': 0.4}]
+    }
+
+def test_scenario_reversion_matches_fullrun():
+
+    low = {'oil_price': 40, 'oil_diff': 0, 'gas_price': 0, 'gas_diff': 0, 'ngl_diff': 0}
+    base = case(forecast_duration = 60)
+    base.fullrun({**reversion_workflow(90), 'scenarios': {'low': {'pricing': low}}}, zero = True)
+    alone = case(forecast_duration = 60)
+    alone.fullrun(reversion_workflow(40), zero = True)
+    assert base.payout_month != alone.payout_month
+
+    scenario = base.scenario_timeseries[0]
+    for column in ['working_int', 'rev_int', 'net_revenue', 'net_cash_flow']:
+        assert np.allclose(scenario[:, COLUMN_INDEX[column]], alone.column(column))
+def test_breakeven_price_with_reversion_gives_zero_pv():
+
+    solved = case(forecast_duration = 60, breakeven_variables = ['oil_price'])
+    solved.fullrun(reversion_workflow(90))
+    price = solved.breakeven_data['oil_price']
+
+    check = case(forecast_duration = 60)
+    check.fullrun(reversion_workflow(price))
+    assert np.isclose(check.column('net_pv10').sum(), 0, atol = 1e-3)
\ No newline at end of file
@@ -0,0 +1,85 @@
+import numpy as np
+from ..checkpoints import case_key
+from ..costs import cost_schedule
+from ..decline_calculators import forecast_chain
+from ..portfolio import portfolio
+
+# Checkpointed portfolio runs against runs from scratch
+
+def workflow(qi):
+
+    return {
+        'forecasts':    [{'phase': 'oil', 'forecast_type': 'exponential', 'qi': qi, 'De': 0.5}],
+        'ownership':    [{'working_int': 1.0, 'rev_int': 0.8}],
+        'pricing':      {'oil_price': 70, 'oil_diff': 0, 'gas_price': 0, 'gas_diff': 0, 'ngl_diff': 0},
+        'fixed_opex':   [{'input': 15000, 'input_type': 'flat'}],
+        'capex':        [{'amount': 1e6}]
+    }
+
+WORKFLOWS = {'w' + str(index): workflow(500 + 100 * index) for index in range(5)}
+
+def run(workflows, checkpoint):
+
+    with portfolio(forecast_duration = 120) as cases:
+        cases.add_cases(workflows)
+        cases.run(processes = 1, checkpoint = checkpoint)
+        return cases.restored, cases.timeseries.copy(), cases.oneline.copy(), cases.errors
+
+def test_rerun_restores_every_case(tmp_path):
+
+    restored, timeseries, oneline, _ = run(WORKFLOWS, str(tmp_path))
+    assert restored == 0
+    restored, resumed, resumed_oneline, _ = run(WORKFLOWS, str(tmp_path))
+    assert restored == len(WORKFLOWS)
+    assert np.array_equal(resumed, timeseries)
+    assert np.array_equal(resumed_oneline.to_numpy(), oneline.to_numpy(), equal_nan = True)
+
+def test_only_edited_and_errored_cases_are_evaluated_again(tmp_path):
+
+    broken = {**WORKFLOWS, 'bad': {**workflow(500), 'forecasts': [{'phase': 'oil', 'forecast_type': 'unknown'}]}}
+    run(broken, str(tmp_path))
+    edited = {**broken, 'w2': workflow(2000)}
+    restored, timeseries, _, errors = run(edited, str(tmp_path))
+    assert restored == len(WORKFLOWS) - 1 and list(errors) == ['bad']
+    assert np.array_equal(timeseries[:5], run(WORKFLOWS | {'w2': workflow(2000)}, None)[1])
+
+def test_case_key_follows_inputs_not_dictionary_order():
+
+    reordered = dict(reversed(list(workflow(500).items())))
+    assert case_key(reordered) == case_key(workflow(500))
+    assert case_key(workflow(501)) != case_key(workflow(500))
+    assert case_key(workflow(500), {'forecast_duration': 60}) != case_key(workflow(500))
+def chain_workflow(De):
+
+    return {
+        'forecast_chains':  [{'phase': 'oil', 'segments': forecast_chain([{'forecast_type': 'exponential', 'qi': 800, 'De': De, 'months': 24}]).shut_in(2)}],
+        'ownership':        [{'working_int': 1.0, 'rev_int': 0.8}],
+        'pricing':          {'oil_price': 70, 'oil_diff': 0, 'gas_price': 0, 'gas_diff': 0, 'ngl_diff': 0},
+        'fixed_opex':       [{'input': cost_schedule(np.linspace(15000, 20000, 120)), 'input_type': 'import'}]
+    }
+
+def test_chain_and_cost_schedule_workflows_resume(tmp_path):
+
+    workflows = {'a': chain_workflow(0.5), 'b': chain_workflow(0.6)}
+    restored, timeseries, _, errors = run(workflows, str(tmp_path))
+    assert restored == 0 and not errors
+    restored, resumed, _, _ = run(workflows, str(tmp_path))
+    assert restored == 2
+    assert np.array_equal(resumed, timeseries)
+    assert case_key(chain_workflow(0.5)) == case_key(chain_workflow(0.5))
+    assert case_key(chain_workflow(0.5)) != case_key(chain_workflow(0.55))
+    rescheduled = chain_workflow(0.5)
+    rescheduled['fixed_opex'][0]['input'] = cost_schedule(np.linspace(15000, 20000, 120), '2030-01')
+    assert case_key(rescheduled) != case_key(chain_workflow(0.5))
+
+def test_updated_case_is_saved_under_its_new_key(tmp_path):
+
+    with portfolio(forecast_duration = 120) as cases:
+        cases.add_cases(WORKFLOWS)
+        cases.run(processes = 1, checkpoint = str(tmp_path))
+        cases.update_case('w2', workflow(2000))
+        assert case_key(workflow(2000), cases.settings) in cases.checkpoint
+        updated = cases.timeseries.copy()
+    restored, timeseries, _, _ = run(WORKFLOWS | {'w2': workflow(2000)}, str(tmp_path))
+    assert restored == len(WORKFLOWS)
+    assert np.array_equal(timeseries, updated)
\ No newline at end of file
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from .. import costs
+from ..case import case
+
+# Cost schedules and escalation on small cases with known answers
+
+def test_escalation_steps_and_compounds():
+
+    annual = costs.escalation_factors([3, 5], '2024-01', 36)
+    assert np.allclose(annual[[0, 11, 12, 23, 24, 35]], [1, 1, 1.03, 1.03, 1.03 * 1.05, 1.03 * 1.05])
+    monthly = costs.escalation_factors(3, '2024-01', 24, step = 'monthly')
+    assert np.isclose(monthly[6], 1.03 ** 0.5) and np.isclose(monthly[12], 1.03)
+    based = costs.escalation_factors(3, '2024-01', 24, start = '2023-07')
+    assert based[5] == 1 and np.isclose(based[6], 1.03)
+    assert not annual.flags.writeable
+    assert costs.escalation_factors([3, 5], '2024-01', 36) is annual
+    with pytest.raises(ValueError):
+        costs.escalation_factors(3, '2024-01', 12, step = 'weekly')
+
+def test_linear_and_stepped_fixed_opex():
+
+    well = case(effective_date = '2024-01', forecast_duration = 12)
+    well.assign_fixed_opex((1000, 2100), 'linear', stop = '2024-12')
+    assert np.allclose(well.column('gross_fixed_opex'), np.linspace(1000, 2100, 12))
+    stepped = case(effective_date = '2024-01', forecast_duration = 12)
+    stepped.assign_fixed_opex({'2024-04': 500, '2024-10': 700}, 'stepped')
+    assert np.allclose(stepped.column('gross_fixed_opex'), [0] * 3 + [500] * 6 + [700] * 3)
+
+def test_imported_costs_by_well(tmp_path):
+
+    path = tmp_path / 'loe.csv'
+    path.write_text('Well,Month,LOE\nA,2023-11,400\nA,2024-02,600\nB,2024-03,900\n')
+    first, second = case(effective_date = '2024-01', forecast_duration = 6), case(effective_date = '2024-01', forecast_duration = 6)
+    first.assign_fixed_opex({'file': str(path), 'well': 'A'}, 'import')
+    second.assign_fixed_opex({'file': str(path), 'well': 'B'}, 'import')
+    assert np.allclose(first.column('gross_fixed_opex'), [400, 600, 600, 600, 600, 600])
+    assert np.allclose(second.column('gross_fixed_opex'), [0, 0, 900, 900, 900, 900])
+    assert costs.read_cost_tables(str(path)) is costs.read_cost_tables(str(path))
+
+def test_escalated_case_costs():
+
+    well = case(effective_date = '2024-01', forecast_duration = 24)
+    well.assign_ownership(0.5, 0.4)
+    well.assign_fixed_opex(1000, 'flat')
+    well.escalate_costs('fixed_opex', 10)
+    well.recalculate()
+    assert np.allclose(well.column('gross_fixed_opex'), [1000] * 12 + [1100] * 12)
+    assert np.allclose(well.column('net_fixed_opex'), well.column('gross_fixed_opex') * 0.5)
\ No newline at end of file
@@ -0,0 +1,53 @@
+import numpy as np
+from .. import decline_calculators as dca
+from .. import helper_functions as helpers
+
+# Decline fits on synthetic monthly histories
+
+def synthetic_history(qi, De, b, months = 36, noise = 0.0, seed = 0):
+
+    time_vector = np.arange(months + 1) * helpers.read_settings()['days_in_month']
+    Di = helpers.secant_to_nominal(De, 'hyperbolic', b)
+    volumes = dca.calc_batch_forecast(time_vector, 'hyperbolic', qi = qi, Di = Di, b = b)[0][:, 2]
+    return volumes * np.exp(np.random.default_rng(seed).normal(0, noise, months))
+
+def test_hyperbolic_recovery_without_noise():
+
+    fit = dca.fit_decline_batch(synthetic_history(1000, 0.6, 1.1), 'hyperbolic')
+    assert fit['converged'][0]
+    assert np.allclose([fit['De'][0], fit['b'][0]], [0.6, 1.1], rtol = 1e-3)
+
+def test_hyperbolic_recovery_from_noisy_history():
+
+    history = np.stack([synthetic_history(1000, 0.6, 1.1, noise = 0.05, seed = seed) for seed in range(8)])
+    fit = dca.fit_decline_batch(history, 'hyperbolic')
+    assert fit['converged'].all()
+    assert abs(np.median(fit['De']) - 0.6) < 0.05
+    assert abs(np.median(fit['b']) - 1.1) < 0.25
+    assert (fit['rmse'] < 0.08).all()
+
+def test_fit_ending_on_a_bound_converges():
+
+    # A straight-line decline is best fitted by the smallest b allowed
+    fit = dca.fit_decline_batch(np.linspace(30000, 25000, 36), 'hyperbolic')
+    assert fit['converged'][0]
+    assert np.isclose(fit['b'][0], dca.FIT_BOUNDS['b'][0])
+
+def test_outliers_are_dropped():
+
+    history = synthetic_history(800, 0.5, 0.8)
+    history[[5, 17]] *= 0.2
+    fit = dca.fit_decline_batch(history, 'hyperbolic')
+    assert fit['outliers'][0] == 2
+    assert np.allclose([fit['De'][0], fit['b'][0]], [0.5, 0.8], rtol = 1e-2)
+
+def test_levenberg_marquardt_exponential():
+
+    tau = (np.arange(24) + 0.5) / 12
+    log_rates = np.log(500) - 0.4 * tau
+    mask = np.ones((1, 24), dtype = bool)
+    model = lambda theta, wells = slice(None): dca.log_rate_model(tau, theta, 'exponential', None)
+    objective = (dca.LOSS_FUNCTIONS['linear'], 1.0)
+    theta, converged = dca.levenberg_marquardt(model, np.array([[5.0, 0.1]]), np.array([-np.inf, 0]), np.array([np.inf, 50]), log_rates[None], mask, objective, 100, 1e-12)
+    assert converged[0]
+    assert np.allclose(theta[0], [np.log(500), 0.4])
\ No newline at end of file
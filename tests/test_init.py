@@ -0,0 +1,32 @@
+import importlib
+import os
+import subprocess
+import sys
+import pytest
+
+# Lazy package exports against the submodules that provide them
+
+PACKAGE = __name__.split('.')[0]
+
+def test_every_export_resolves_to_its_submodule():
+
+    package = importlib.import_module(PACKAGE)
+    for name in package.__all__:
+        module = importlib.import_module(PACKAGE + '.' + package.EXPORT_MODULES[name])
+        assert getattr(package, name) is getattr(module, name), name
+    with pytest.raises(AttributeError):
+        package.not_a_name
+
+def test_class_exports_win_over_their_submodules():
+
+    package = importlib.import_module(PACKAGE)
+    importlib.import_module(PACKAGE + '.case')
+    importlib.import_module(PACKAGE + '.portfolio')
+    assert isinstance(package.case, type) and isinstance(package.portfolio, type)
+
+def test_decline_calculators_load_without_pandas():
+
+    script = 'import sys, ' + PACKAGE + '; ' + PACKAGE + '.calc_hyperbolic_rates; ' + PACKAGE + '.read_settings(); print("pandas" in sys.modules)'
+    root = os.path.dirname(os.path.dirname(os.path.abspath(importlib.import_module(PACKAGE).__file__)))
+    output = subprocess.run([sys.executable, '-c', script], cwd = root, capture_output = True, text = True, check = True)
+    assert output.stdout.strip() == 'False'
\ No newline at end of file
@@ -0,0 +1,22 @@
+import tracemalloc
+from ..helper_functions import instrumentation
+
+# Stage instrumentation and the tracemalloc trace it shares with callers
+
+def test_disable_leaves_a_callers_trace_running():
+
+    tracemalloc.start()
+    try:
+        instrumentation.enable_instrumentation(memory = True)
+        instrumentation.disable_instrumentation()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+def test_disable_stops_the_trace_it_started():
+
+    assert not tracemalloc.is_tracing()
+    instrumentation.enable_instrumentation(memory = True)
+    assert tracemalloc.is_tracing()
+    instrumentation.disable_instrumentation()
+    assert not tracemalloc.is_tracing()
\ No newline at end of file
@@ -0,0 +1,33 @@
+import numpy as np
+from .. import economics as econ
+from .. import helper_functions as helpers
+
+# Cash flow metrics against hand-solved cash flows
+
+def test_irr_of_one_year_investment():
+
+    year = helpers.read_settings()['days_in_year']
+    assert np.allclose(econ.calc_irr([-1000, 1100], [0, year]), 0.1)
+
+def test_irr_of_many_cases_at_once():
+
+    year = helpers.read_settings()['days_in_year']
+    cash_flow = [[-1000, 0, 1210], [-1000, 600, 600], [-100, -100, -100]]
+    irr = econ.calc_irr(cash_flow, [0, year, 2 * year])
+    assert np.allclose(irr[0], 0.1)
+    assert np.isclose(600 / (1 + irr[1]) + 600 / (1 + irr[1]) ** 2, 1000)
+    assert np.isnan(irr[2])
+
+def test_irr_uses_settings_days_in_year():
+
+    settings = helpers.read_settings().replace(days_in_year = 360)
+    assert np.allclose(econ.calc_irr([-1000, 1100], [0, 360], settings = settings), 0.1)
+
+def test_pv_at_irr_is_zero():
+
+    rng = np.random.default_rng(1)
+    cash_flow = np.concatenate([[-5e6], rng.uniform(1e5, 3e5, 59)])
+    days = np.arange(60) * helpers.read_settings()['days_in_month']
+    irr = econ.calc_irr(cash_flow, days)
+    factors = econ.calc_discount_factors(irr, days)
+    assert abs(econ.calc_npv_profile(cash_flow, factors)[0]) < 1e-3
\ No newline at end of file
@@ -0,0 +1,37 @@
+import numpy as np
+from ..portfolio import portfolio
+
+# Portfolio rollups and aggregates against a run of the same cases
+
+def workflow(qi):
+
+    return {
+        'forecasts':    [{'phase': 'oil', 'forecast_type': 'exponential', 'qi': qi, 'De': 0.5}],
+        'ownership':    [{'working_int': 1.0, 'rev_int': 0.8}],
+        'pricing':      {'oil_price': 70, 'oil_diff': 0, 'gas_price': 0, 'gas_diff': 0, 'ngl_diff': 0},
+        'capex':        [{'amount': 2e7}]
+    }
+
+def run(workflows):
+
+    with portfolio(forecast_duration = 36) as cases:
+        cases.add_cases(workflows, {name: {'pad': 'P'} for name in workflows})
+        cases.run(processes = 1)
+        return cases.aggregate.copy(), cases.rollup.oneline('pad').copy()
+
+def test_errored_first_case_keeps_time_columns():
+
+    good = {'w' + str(index): workflow(500 + 100 * index) for index in range(3)}
+    broken = {'bad': {**workflow(500), 'forecasts': [{'phase': 'oil', 'forecast_type': 'unknown'}]}, **good}
+    aggregate, oneline = run(broken)
+    expected_aggregate, expected_oneline = run(good)
+    for column in ['month', 'days_start', 'days_end']:
+        assert np.allclose(aggregate[column], expected_aggregate[column])
+    assert np.allclose(oneline['irr'], expected_oneline['irr'])
+def test_rollup_of_errored_cases_has_nan_metrics():
+
+    broken = {name: {**workflow(500), 'forecasts': [{'phase': 'oil', 'forecast_type': 'unknown'}]} for name in ['a', 'b']}
+    aggregate, oneline = run(broken)
+    assert list(oneline.index) == ['P'] and oneline.loc['P', 'cases'] == 2
+    assert np.isnan(oneline.loc['P', 'irr'])
+    assert oneline.loc['P', 'gross_oil'] == 0
\ No newline at end of file
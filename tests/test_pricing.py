@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from .. import pricing
+from ..case import case
+
+# Aries-style text decks, see pricing.parse_price_text
+
+DECK = """
+START 2024-03
+OIL     50  60  $/B  3  MOS  LIN
+"       60  X   $/B  12 MOS  ESC 12
+"       70  X   $/B  TO LIFE FLAT
+GAS     3   X   $/M  TO 2024-12  FLAT
+"       4   X   $/M  TO LIFE STEP 0.5
+"""
+
+def test_lin_segment_runs_from_value1_to_value2():
+
+    deck = pricing.parse_price_text(DECK)['default']
+    assert np.allclose(deck.values[:3, 0], [50, 55, 60])
+
+def test_esc_segment_compounds_annual_percent_monthly():
+
+    deck = pricing.parse_price_text(DECK)['default']
+    assert np.allclose(deck.values[3:15, 0], 60 * 1.12 ** (np.arange(12) / 12))
+
+def test_to_life_runs_to_the_forecast_horizon():
+
+    deck = pricing.parse_price_text(DECK)['default']
+    assert len(deck) == 600
+    assert np.all(deck.values[15:, 0] == 70)
+
+def test_to_month_and_step_segments():
+
+    deck = pricing.parse_price_text(DECK)['default']
+    gas = deck.values[:, 1]
+    assert np.all(gas[:10] == 3)
+    assert np.allclose(gas[[10, 21, 22, 34]], [4, 4, 4.5, 5])
+
+def test_start_after_the_effective_date():
+
+    deck = pricing.parse_price_text(DECK)['default']
+    assert str(deck.start) == '2024-03'
+    assert np.allclose(deck.window('2024-05', 2)[:, 0], [60, 60])
+    with pytest.raises(ValueError):
+        deck.window('2024-01', 2)
+
+def test_relative_deck_and_scenarios():
+
+    decks = pricing.parse_price_text('SCENARIO low\nOIL 40 X 1 YRS FLAT\nSCENARIO high\nOIL 90 X TO LIFE FLAT\n')
+    assert list(decks) == ['low', 'high']
+    assert decks['low'].start is None
+    assert np.all(decks['low'].window('2030-01', 24)[:, 0] == 40)
+
+def test_unknown_keyword_reports_the_line():
+
+    with pytest.raises(ValueError, match = 'line 2'):
+        pricing.parse_price_text('OIL 50 X 1 MOS FLAT\nCOAL 1 X 1 MOS FLAT\n')
+def test_text_decks_follow_the_settings_they_are_read_with(tmp_path):
+
+    path = tmp_path / 'deck.txt'
+    path.write_text('OIL 50 X TO 2024-06 FLAT\n"   70 X TO LIFE FLAT\n')
+    early = case(effective_date = '2024-01', forecast_duration = 24)
+    late = case(effective_date = '2024-04', forecast_duration = 36)
+    early.import_pricing(format = 'txt', price_file = str(path))
+    late.import_pricing(format = 'txt', price_file = str(path))
+    assert np.allclose(early.column('oil_price')[:7], [50] * 6 + [70])
+    assert np.allclose(late.column('oil_price')[:4], [50] * 3 + [70])
+    assert len(pricing.read_price_decks(str(path), late.settings)['default']) == 36
\ No newline at end of file
@@ -0,0 +1,42 @@
+import numpy as np
+from .. import decline_calculators as dca
+
+# Closed-form reserves against summed batch forecasts
+
+TIME_VECTOR = np.linspace(0, 120, 121) * 30.4375
+
+TYPES = ['exponential', 'harmonic', 'hyperbolic', 'modified hyperbolic', 'flat']
+
+WELLS = {
+    'qi':   np.array([1000.0, 250.0, 40.0]),
+    'Di':   np.array([0.9, 1.5, 0.3]),
+    'b':    np.array([0.5, 1.0, 1.4]),
+    'Dt':   np.array([0.3, 0.3, 0.1])
+}
+
+def test_cum_matches_summed_forecast_volumes():
+
+    for forecast_type in TYPES:
+        volumes = dca.calc_batch_forecast(TIME_VECTOR, forecast_type, **WELLS)[:, :, 2]
+        cum = dca.calc_cum(TIME_VECTOR[1:, None], forecast_type, **WELLS).T
+        assert np.allclose(cum, np.cumsum(volumes, axis = 1)), forecast_type
+
+def test_time_to_rate_lands_on_rate():
+
+    rate = np.array([200.0, 50.0, 10.0])
+    for forecast_type in TYPES[:-1]:
+        time = dca.calc_time_to_rate(rate, forecast_type, **WELLS)
+        for well in range(3):
+            parameters = {name: values[well:well + 1] for name, values in WELLS.items()}
+            exit_rate = dca.calc_batch_forecast(np.array([0.0, time[well]]), forecast_type, **parameters)[0, 0, 1]
+            assert np.isclose(exit_rate, rate[well]), forecast_type
+    assert np.all(dca.calc_time_to_rate(rate, 'flat', **WELLS) == np.inf)
+    assert dca.calc_time_to_rate(2000.0, 'exponential', qi = 1000.0, Di = 0.5) == 0
+
+def test_eur_to_limit_and_time_cap():
+
+    eur, time = dca.calc_eur('exponential', qi = 1000.0, Di = 0.5)
+    assert np.isclose(eur, 1000.0 / 0.5 * 365.25) and time == np.inf
+    eur, time = dca.calc_eur('hyperbolic', rate_limit = 10.0, max_time = TIME_VECTOR[-1], **WELLS)
+    assert np.allclose(eur, dca.calc_cum(time, 'hyperbolic', **WELLS))
+    assert np.all(time <= TIME_VECTOR[-1])
\ No newline at end of file
@@ -0,0 +1,54 @@
+import numpy as np
+from ..case import COLUMN_INDEX
+from ..portfolio import portfolio
+from ..results_cube import open_cube
+
+# Memory-mapped results cube against the in-memory portfolio run
+
+def workflow(qi):
+
+    return {
+        'forecasts':    [{'phase': 'oil', 'forecast_type': 'exponential', 'qi': qi, 'De': 0.5}],
+        'ownership':    [{'working_int': 1.0, 'rev_int': 0.8}],
+        'pricing':      {'oil_price': 70, 'oil_diff': 0, 'gas_price': 0, 'gas_diff': 0, 'ngl_diff': 0},
+        'fixed_opex':   [{'input': 15000, 'input_type': 'flat'}],
+        'capex':        [{'amount': 1e6}]
+    }
+
+WORKFLOWS = {'w' + str(index): workflow(500 + 100 * index) for index in range(5)}
+
+GROUPS = {'w0': 'A', 'w1': 'B', 'w2': 'A', 'w3': 'B'}
+
+def test_cube_run_matches_in_memory_run(tmp_path):
+
+    with portfolio(forecast_duration = 120) as cases:
+        cases.add_cases(WORKFLOWS)
+        cases.run(processes = 1)
+        expected, aggregate = cases.timeseries.copy(), cases.aggregate.copy()
+    with portfolio(forecast_duration = 120) as cases:
+        cases.add_cases(WORKFLOWS)
+        cases.run(processes = 1, cube = str(tmp_path))
+        assert np.allclose(cases.aggregate.to_numpy(), aggregate.to_numpy(), equal_nan = True)
+
+    cube = open_cube(str(tmp_path))
+    assert cube.shape == expected.shape and cube.names == list(WORKFLOWS)
+    assert np.array_equal(np.asarray(cube.values), expected)
+    assert np.array_equal(cube.case('w3'), expected[3])
+    start = cube.effective_date + 14
+    assert np.array_equal(cube.column('oil_volume', start = start), expected[:, 14:, COLUMN_INDEX['oil_volume']])
+
+def test_cube_reductions(tmp_path):
+
+    with portfolio(forecast_duration = 120) as cases:
+        cases.add_cases(WORKFLOWS)
+        cases.run(processes = 1, cube = str(tmp_path))
+    cube = open_cube(str(tmp_path))
+    volumes = np.asarray(cube.column('oil_volume'))
+    assert np.allclose(cube.total('oil_volume'), volumes.sum(axis = 0))
+    rollup = cube.rollup('oil_volume', GROUPS)
+    assert list(rollup.columns) == ['A', 'B']
+    assert np.allclose(rollup['A'], volumes[0] + volumes[2])
+    assert np.allclose(rollup['B'], volumes[1] + volumes[3])
+    cum = np.asarray(cube.column('cum_cash_flow'))
+    life = np.count_nonzero(cum, axis = 1)
+    assert np.allclose(cube.final('cum_cash_flow'), cum[np.arange(5), life - 1])
\ No newline at end of file
@@ -0,0 +1,39 @@
+import numpy as np
+from .. import schedule
+from ..case import case
+
+# Drilling schedules by convolution against one forecast per well
+
+TYPE_CURVE = {'forecast_type': 'hyperbolic', 'qi': 1000, 'De': 0.6, 'b': 0.9}
+
+def shifted_sum(weights, profile, months):
+
+    total = np.zeros((months,) + profile.shape[1:])
+    for month, wells in enumerate(weights):
+        total[month:] += wells * profile[:months - month]
+    return total
+
+def test_direct_and_fft_convolution_match_shifted_sum():
+
+    rng = np.random.default_rng(0)
+    for months in [24, 2 * schedule.FFT_THRESHOLD]:
+        weights = rng.integers(0, 3, months).astype(float)
+        profile = schedule.type_curve(months = months, **TYPE_CURVE)
+        assert np.allclose(schedule.convolve(weights, profile, months), shifted_sum(weights, profile, months))
+
+def test_rig_schedule_drills_out_inventory():
+
+    wells = schedule.rig_schedule(24, 15, rigs = 2, wells_per_rig_month = 1.5, first_month = 2)
+    assert np.all(wells[:2] == 0) and np.all(wells[2:7] == 3)
+    assert wells.sum() == 15
+
+def test_schedule_matches_one_forecast_per_well():
+
+    onlines = [0, 2, 2, 5, 30]
+    scheduled, wells = case(forecast_duration = 24), case(forecast_duration = 24)
+    scheduled.add_schedule('oil', schedule.schedule_from_locations(24, onlines), TYPE_CURVE, capex_per_well = 1e6)
+    for online in onlines[:-1]:
+        wells.generate_forecast('oil', start = wells.effective_date + online, **TYPE_CURVE)
+        wells.assign_capex(1e6, month = wells.effective_date + online)
+    for column in ['entry_oil_rate', 'oil_volume', 'gross_capex']:
+        assert np.allclose(scheduled.column(column), wells.column(column))
\ No newline at end of file
@@ -0,0 +1,35 @@
+import numpy as np
+from .. import decline_calculators as dca
+from ..case import case
+
+# Forecast chains against single forecasts and their own continuity rules
+
+HYPERBOLIC = {'forecast_type': 'hyperbolic', 'qi': 1000, 'De': 0.6, 'b': 0.9}
+
+def test_one_segment_chain_matches_forecast():
+
+    single, chained = case(forecast_duration = 36), case(forecast_duration = 36)
+    single.generate_forecast('oil', **HYPERBOLIC)
+    chained.generate_forecast_chain('oil', [HYPERBOLIC])
+    assert np.allclose(chained.column('oil_volume'), single.column('oil_volume'))
+
+def test_segments_continue_across_shut_in_and_jump_on_qi():
+
+    chain = dca.forecast_chain([{**HYPERBOLIC, 'months': 12}])
+    chain.shut_in(3).add_segment('exponential', months = 9, De = 0.1).add_segment('exponential', qi = 800, De = 0.3)
+    forecast = chain.evaluate(36)
+    assert chain.months is None
+    assert np.all(forecast[12:15] == 0)
+    assert np.isclose(forecast[15, 0], forecast[11, 1])
+    assert np.isclose(forecast[24, 0], 800)
+    assert np.allclose(forecast[1:12, 0], forecast[:11, 1])
+
+def test_shared_segments_are_evaluated_once():
+
+    dca.evaluate_segment.cache_clear()
+    first = dca.forecast_chain([HYPERBOLIC]).evaluate(24)
+    second = dca.forecast_chain([HYPERBOLIC]).evaluate(24)
+    assert dca.evaluate_segment.cache_info().hits == 1
+    assert np.array_equal(first, second)
+    first[:] = 0
+    assert np.any(dca.forecast_chain([HYPERBOLIC]).evaluate(24))
\ No newline at end of file
@@ -0,0 +1,15 @@
+import pytest
+from ..helper_functions import general_helpers
+
+# Process-wide settings and their overrides
+
+def test_override_settings_rejects_unknown_keys():
+
+    settings = general_helpers.read_settings()
+    try:
+        with pytest.raises(KeyError):
+            general_helpers.override_settings(days_in_yaer = 360)
+        assert general_helpers.read_settings() is settings
+        assert general_helpers.override_settings(days_in_year = 360)['days_in_year'] == 360
+    finally:
+        general_helpers.reload_settings()
\ No newline at end of file
@@ -0,0 +1,55 @@
+import numpy as np
+from .. import stochastic
+from ..case import case
+
+# Monte Carlo realizations against the same well run as a case
+
+MODEL = {'forecast_type': 'exponential', 'qi': 1000, 'De': 0.5, 'oil_price': 70, 'fixed_opex': 23456, 'capex': 1e6, 'rev_int': 0.8}
+
+def run_case(**settings_overrides):
+
+    well = case(**settings_overrides)
+    well.generate_forecast('oil', forecast_type = 'exponential', qi = 1000, De = 0.5)
+    well.assign_ownership(1, 0.8)
+    well.flat_pricing(70, 0, 0, 0, 0)
+    well.calc_net_production()
+    well.calc_sales_revenue()
+    well.assign_fixed_opex(23456, 'flat')
+    well.assign_capex(1e6)
+    well.calc_cash_flow()
+    well.impose_end_of_life()
+    return well
+
+def test_partial_limit_month_matches_case():
+
+    overrides = {'forecast_duration': 120, 'loss_function': 'NO', 'partial_month_limit': True}
+    well = run_case(**overrides)
+    assert 0 < well.end_of_life_fraction < 1
+
+    model = stochastic.monte_carlo(MODEL, realizations = 1, **overrides)
+    model.run()
+    result = model.results.iloc[0]
+    assert np.isclose(result['net_cash_flow'], well.column('net_cash_flow').sum())
+    assert np.isclose(result['net_pv10'], well.column('net_pv10').sum())
+    assert np.isclose(result['reserves_oil'], well.column('net_oil_volume').sum())
+def test_calendar_grid_matches_case():
+
+    overrides = {'forecast_duration': 120, 'time_grid': 'calendar', 'effective_date': '2024-01'}
+    well = run_case(**overrides)
+    uniform = run_case(**{**overrides, 'time_grid': 'uniform'})
+    assert not np.isclose(well.column('oil_volume').sum(), uniform.column('oil_volume').sum())
+
+    model = stochastic.monte_carlo(MODEL, realizations = 1, **overrides)
+    model.run()
+    result = model.results.iloc[0]
+    assert np.isclose(result['reserves_oil'], well.column('net_oil_volume').sum())
+    assert np.isclose(result['net_pv10'], well.column('net_pv10').sum())
+def test_b_sampled_at_zero_runs_as_exponential():
+
+    hyperbolic = {**MODEL, 'forecast_type': 'hyperbolic', 'b': ('uniform', -0.5, 0.0)}
+    model = stochastic.monte_carlo(hyperbolic, realizations = 20, seed = 1, forecast_duration = 120)
+    model.run()
+    assert np.all(np.isfinite(model.results.to_numpy()))
+    exponential = stochastic.monte_carlo(MODEL, realizations = 1, forecast_duration = 120)
+    exponential.run()
+    assert np.allclose(model.results['net_pv10'], exponential.results['net_pv10'].iloc[0], rtol = 1e-4)
\ No newline at end of file
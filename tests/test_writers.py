@@ -0,0 +1,52 @@
+import numpy as np
+from ..case import COLUMN_INDEX
+from ..portfolio import portfolio
+from ..writers import open_results, results_writer
+
+# Streamed results read back against the in-memory portfolio run
+
+def workflow(qi):
+
+    return {
+        'forecasts':    [{'phase': 'oil', 'forecast_type': 'exponential', 'qi': qi, 'De': 0.5}],
+        'ownership':    [{'working_int': 1.0, 'rev_int': 0.8}],
+        'pricing':      {'oil_price': 70, 'oil_diff': 0, 'gas_price': 0, 'gas_diff': 0, 'ngl_diff': 0},
+        'fixed_opex':   [{'input': 15000, 'input_type': 'flat'}],
+        'capex':        [{'amount': 1e6}]
+    }
+
+WORKFLOWS = {'w' + str(index): workflow(500 + 100 * index) for index in range(5)}
+
+def test_every_format_reads_back_what_was_written(tmp_path):
+
+    timeseries = np.arange(12, dtype = float).reshape(2, 3, 2)
+    for format in ['parquet', 'arrow', 'csv']:
+        path = str(tmp_path / format)
+        with results_writer(path, format = format) as writer:
+            writer.write_timeseries(['a', 'b'], timeseries, ['oil_volume', 'gas_volume'])
+            writer.write_timeseries(['c'], timeseries[:1] + 100, ['oil_volume', 'gas_volume'])
+        results = open_results(path, columns = ['gas_volume'])
+        results = results if format == 'csv' else results.to_pandas()
+        assert list(results.columns) == ['case', 'gas_volume']
+        assert list(results['case']) == ['a'] * 3 + ['b'] * 3 + ['c'] * 3
+        assert np.allclose(results['gas_volume'], np.concatenate([timeseries[:, :, 1].ravel(), timeseries[0, :, 1] + 100]))
+
+def test_streamed_batches_match_in_memory_run(tmp_path):
+
+    with portfolio(forecast_duration = 120) as cases:
+        cases.add_cases(WORKFLOWS)
+        cases.run(processes = 1)
+        expected = cases.timeseries[:, :, COLUMN_INDEX['oil_volume']].copy()
+        aggregate, oneline = cases.aggregate.copy(), cases.oneline.copy()
+
+    with portfolio(forecast_duration = 120) as cases, results_writer(str(tmp_path), dtype = np.float32) as writer:
+        cases.add_cases(WORKFLOWS)
+        cases.run(processes = 1, columns = ['oil_volume', 'net_cash_flow'], writer = writer, batch_size = 2)
+        assert len(cases.timeseries) == 2
+        assert np.allclose(cases.aggregate['net_cash_flow'], aggregate['net_cash_flow'])
+        assert not cases.errors
+        assert np.allclose(cases.oneline.to_numpy(), oneline.to_numpy(), equal_nan = True)
+
+    results = open_results(str(tmp_path)).to_pandas()
+    assert results['oil_volume'].dtype == np.float32
+    assert np.allclose(results['oil_volume'].to_numpy().reshape(5, 120), expected, rtol = 1e-6)
\ No newline at end of file
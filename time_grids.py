@@ -0,0 +1,223 @@
+import numpy as np
+import pandas as pd
+from . import decline_calculators as dca
+from . import helper_functions as helpers
+
+# time_grids.py builds variable-step time grids and moves values between grids
+#
+# A grid is a vector of edges, in days from the effective date, so row i covers
+# edges[i] to edges[i + 1]. Month lengths come from one of two modes:
+#
+#   uniform                     every month is settings days_in_month long (the
+#                               case default)
+#   calendar                    true calendar month lengths from the effective date
+#
+# On top of the months, a time_grid can use daily rows for the first months (early
+# time flowback) and yearly rows from the first January after a given month (long
+# tails). A 600 month forecast with annual rows after year 5 has about 110 rows.
+#
+# Decline volumes on any grid are exact: the batch calculators take the
+# differences of the analytic cumulative production at the edges. Values move
+# between grids through their cumulative totals:
+#
+#   volumes                     summed exactly wherever the target edges are also
+#                               source edges (days to months, months to years), and
+#                               split at constant rate within a source row otherwise
+#   rates                       interpolated linearly at the target edges
+
+GRID_MODES = ['uniform', 'calendar']
+
+# How resample_columns aggregates case timeseries columns, by name. Everything
+# else is a monthly flow and is summed
+COLUMN_AGGREGATION = {
+    'month':            'first',
+    'days_start':       'first',
+    'days_end':         'last',
+    'cum_cash_flow':    'last',
+    'cum_pv10':         'last'
+}
+
+def calc_month_lengths(effective_date, months, mode = 'uniform', settings = None):
+    # Length of each month from effective_date, in days
+    # INPUTS:
+    #   effective_date          First month, anything pd.Period accepts
+    #   months                  Number of months
+    #   mode                    'uniform' or 'calendar'
+    #   settings                Settings object for days_in_month, defaults to read_settings()
+    # OUTPUTS:
+    #   lengths                 Vector of months day counts
+
+    if mode == 'uniform':
+        return np.full(months, helpers.get_setting('days_in_month', settings))
+    if mode == 'calendar':
+        periods = pd.period_range(pd.Period(effective_date, 'M'), periods = months, freq = 'M')
+        return periods.days_in_month.to_numpy(dtype = float)
+    raise ValueError('unknown time grid mode ' + repr(mode) + ', expected one of ' + ', '.join(GRID_MODES))
+
+def calc_month_edges(effective_date, months, mode = 'uniform', settings = None):
+    # Time vector of month boundaries (days), as case.time_vector
+
+    return np.concatenate([[0.0], np.cumsum(calc_month_lengths(effective_date, months, mode, settings))])
+
+class time_grid:
+
+    def __init__(self, effective_date = None, months = None, mode = 'calendar', daily_months = 0, annual_after = None, settings = None):
+        # INPUTS:
+        #   effective_date          Start of the grid, default settings effective_date
+        #   months                  Months covered, default settings forecast_duration
+        #   mode                    Month lengths, 'uniform' or 'calendar'
+        #   daily_months            Months at the start split into days
+        #   annual_after            Months after which rows become calendar years, from
+        #                           the next January on, default never
+        #   settings                Settings object, defaults to read_settings()
+
+        self.settings = helpers.read_settings() if settings is None else settings
+        settings = self.settings
+        self.effective_date = pd.Period(settings['effective_date'] if effective_date is None else effective_date, 'M')
+        self.months = settings['forecast_duration'] if months is None else months
+        self.mode = mode
+        self.month_edges = calc_month_edges(self.effective_date, self.months, mode, settings)
+
+        # Daily rows keep every month boundary, so the last day of a uniform month
+        # is the fractional remainder
+        daily_months = min(daily_months, self.months)
+        daily = np.union1d(np.arange(0, self.month_edges[daily_months], 1.0), self.month_edges[:daily_months + 1])
+
+        annual = self.months
+        if annual_after is not None and annual_after < self.months:
+            annual = max(annual_after, daily_months)
+            annual += (12 - (self.effective_date + annual).month + 1) % 12
+            annual = min(annual, self.months)
+        yearly = np.append(self.month_edges[annual::12], self.month_edges[-1])
+
+        self.edges = np.unique(np.concatenate([daily, self.month_edges[daily_months:annual + 1], yearly]))
+        starts = self.edges[:-1]
+        self.month = np.searchsorted(self.month_edges, starts, 'right') - 1
+        self.resolution = np.where(self.month < daily_months, 'D', np.where(self.month < annual, 'M', 'Y'))
+
+    @property
+    def rows(self):
+
+        return len(self.edges) - 1
+
+    @property
+    def lengths(self):
+        # Row lengths in days
+
+        return np.diff(self.edges)
+
+    @property
+    def start_dates(self):
+        # Calendar date each row starts on. Exact in calendar mode, nearest day in
+        # uniform mode
+
+        first = self.effective_date.start_time
+        return first + pd.to_timedelta(np.round(self.edges[:-1]), unit = 'D')
+
+    def year_edges(self):
+        # Edges of calendar years (the first and last partial), as grid edges
+
+        offsets = np.arange(self.months)
+        january = offsets[(self.effective_date.month - 1 + offsets) % 12 == 0]
+        return self.month_edges[np.unique(np.concatenate([[0], january, [self.months]]))]
+
+    def target_edges(self, resolution):
+        # Edges of the calendar months ('M') or years ('Y') the grid covers
+
+        if resolution == 'M':
+            return self.month_edges
+        if resolution == 'Y':
+            return self.year_edges()
+        raise ValueError("resolution must be 'M' or 'Y', not " + repr(resolution))
+
+    def forecast(self, forecast_type = 'exponential', **kwargs):
+        # Decline forecast on the grid, integrated exactly over every row
+        # INPUTS:
+        #   forecast_type           Decline type, as in calc_batch_forecast
+        #   qi, Di, b, Dt           Decline parameters, scalars or vectors of wells
+        # OUTPUTS:
+        #   forecast                Array of shape (N, rows, 3)
+
+        return dca.calc_batch_forecast(self.edges, forecast_type, **{'settings': self.settings, **kwargs})
+
+    def aggregate(self, volumes, resolution = 'M'):
+        # Sums volumes on the grid into calendar months or years, see resample_volumes
+
+        return resample_volumes(volumes, self.edges, self.target_edges(resolution))
+
+def resample_volumes(volumes, edges, target_edges):
+    # Moves volumes (or any flow) from one grid to another
+    # INPUTS:
+    #   volumes                 Array with rows on the last axis, one per source row
+    #   edges                   Source grid edges, rows + 1
+    #   target_edges            Target grid edges, inside the source grid
+    # OUTPUTS:
+    #   volumes                 Array with one entry per target row on the last axis.
+    #                           Exact sums where target edges are source edges,
+    #                           constant rate within a source row otherwise
+
+    volumes = np.asarray(volumes, dtype = float)
+    edges = np.asarray(edges, dtype = float)
+    target_edges = np.asarray(target_edges, dtype = float)
+
+    cum = np.concatenate([np.zeros(volumes.shape[:-1] + (1,)), np.cumsum(volumes, axis = -1)], axis = -1)
+    row = np.clip(np.searchsorted(edges, target_edges, 'right') - 1, 0, len(edges) - 2)
+    fraction = (target_edges - edges[row]) / (edges[row + 1] - edges[row])
+    target_cum = cum[..., row] + fraction * volumes[..., row]
+    return np.diff(target_cum, axis = -1)
+
+def resample_rates(rates, edges, target_edges):
+    # Instantaneous rates at edges (rows + 1 values on the last axis), linearly
+    # interpolated at target_edges
+
+    rates = np.asarray(rates, dtype = float)
+    edges = np.asarray(edges, dtype = float)
+    target_edges = np.asarray(target_edges, dtype = float)
+    row = np.clip(np.searchsorted(edges, target_edges, 'right') - 1, 0, len(edges) - 2)
+    fraction = np.clip((target_edges - edges[row]) / (edges[row + 1] - edges[row]), 0, 1)
+    return rates[..., row] * (1 - fraction) + rates[..., row + 1] * fraction
+
+def resample_columns(values, edges, target_edges):
+    # Aggregates case timeseries columns onto a coarser grid whose edges are all
+    # source edges, e.g. months to years
+    # INPUTS:
+    #   values                  Dictionary of {column: vector of rows}
+    #   edges                   Source grid edges
+    #   target_edges            Target grid edges, a subset of edges
+    # OUTPUTS:
+    #   values                  Dictionary of {column: vector of target rows}. Flows are
+    #                           summed, entry rates and starts taken from the first row,
+    #                           exit rates, ends and running totals from the last, and
+    #                           prices, interests and other levels averaged over time
+
+    edges = np.asarray(edges, dtype = float)
+    first = np.searchsorted(edges, np.asarray(target_edges[:-1], dtype = float))
+    last = np.searchsorted(edges, np.asarray(target_edges[1:], dtype = float)) - 1
+    lengths = np.diff(edges)
+
+    resampled = {}
+    for column, vector in values.items():
+        vector = np.asarray(vector, dtype = float)
+        how = column_aggregation(column)
+        if how == 'first':
+            resampled[column] = vector[first]
+        elif how == 'last':
+            resampled[column] = vector[last]
+        elif how == 'mean':
+            resampled[column] = np.add.reduceat(vector * lengths, first) / np.add.reduceat(lengths, first)
+        else:
+            resampled[column] = np.add.reduceat(vector, first)
+    return resampled
+
+def column_aggregation(column):
+    # 'sum', 'first', 'last' or 'mean' for a case timeseries column
+
+    if column in COLUMN_AGGREGATION:
+        return COLUMN_AGGREGATION[column]
+    if column.startswith('entry_'):
+        return 'first'
+    if column.startswith('exit_'):
+        return 'last'
+    if column in ('working_int', 'rev_int', 'shrink') or column.endswith(('_price', '_diff', '_price_real')):
+        return 'mean'
+    return 'sum'
\ No newline at end of file
@@ -0,0 +1,173 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from .case import TIMESERIES_COLUMNS, ONELINE_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# writers.py streams case results to disk in row groups
+#
+# A results_writer owns one output directory with two files:
+#
+#   timeseries.<ext>            one row per case month - 'case' followed by the
+#                               selected timeseries columns
+#   oneline.<ext>               one row per case - 'case' followed by the oneline items
+#
+# Every write call appends one row group (Parquet), one record batch (Arrow IPC)
+# or a block of lines (CSV), so results can be written batch by batch while a
+# portfolio is still running and never have to be held in memory all at once
+#
+#   FORMATS:
+#       'parquet'               Compressed columnar file, one row group per write
+#       'arrow'                 Arrow IPC file, uncompressed - can be memory-mapped
+#                               with zero copy by open_results or any Arrow reader
+#       'csv'                   Plain text, used whenever pyarrow is not installed
+
+EXTENSIONS = {
+    'parquet':          '.parquet',
+    'arrow':            '.arrow',
+    'csv':              '.csv'
+}
+
+class results_writer:
+
+    def __init__(self, path, format = 'parquet', columns = None, dtype = np.float64, compression = 'snappy'):
+        # INPUTS:
+        #   path                    Output directory, created if missing
+        #   format                  'parquet', 'arrow' or 'csv'
+        #   columns                 Timeseries columns to write, default all columns given
+        #   dtype                   Value dtype on disk, e.g. np.float32 to halve file size
+        #   compression             Parquet compression codec
+
+        if format not in EXTENSIONS:
+            raise ValueError("unknown format '" + format + "'")
+        if format != 'csv' and pa is None:
+            warnings.warn('pyarrow is not installed, writing ' + format + ' results as csv instead')
+            format = 'csv'
+
+        os.makedirs(path, exist_ok = True)
+        self.path = path
+        self.format = format
+        self.columns = None if columns is None else list(columns)
+        self.dtype = np.dtype(dtype)
+        self.compression = compression
+        self.sinks = {}
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *args):
+
+        self.close()
+
+    def file_path(self, kind):
+        # Path of the 'timeseries' or 'oneline' file
+
+        return os.path.join(self.path, kind + EXTENSIONS[self.format])
+
+    def write_timeseries(self, names, timeseries, columns = TIMESERIES_COLUMNS):
+        # Appends the monthly results of a block of cases
+        # INPUTS:
+        #   names                   Case names, one per case
+        #   timeseries              Array of shape [cases, months, columns]
+        #   columns                 Column names of the last axis
+
+        timeseries = np.asarray(timeseries)
+        columns = list(columns)
+        months = timeseries.shape[1]
+        selected = columns if self.columns is None else self.columns
+
+        values = {'case': np.repeat(np.asarray(names, dtype = object), months)}
+        for column in selected:
+            values[column] = timeseries[:, :, columns.index(column)].reshape(-1).astype(self.dtype)
+        self.write('timeseries', values)
+
+    def write_oneline(self, names, oneline_values, columns = ONELINE_COLUMNS):
+        # Appends the onelines of a block of cases
+        # INPUTS:
+        #   names                   Case names, one per case
+        #   oneline_values          Array of shape [cases, oneline items]
+        #   columns                 Oneline item names
+
+        oneline_values = np.atleast_2d(np.asarray(oneline_values, dtype = float))
+        values = {'case': np.asarray(names, dtype = object)}
+        for offset, column in enumerate(columns):
+            values[column] = oneline_values[:, offset].astype(self.dtype)
+        self.write('oneline', values)
+
+    def write_case(self, case, name = None):
+        # Appends one evaluated case - its full timeseries and, once generated,
+        # its oneline
+        # INPUTS:
+        #   case                    case object
+        #   name                    Case name, default the case's oneline name
+
+        case.recalculate()
+        name = getattr(case, 'oneline_name', None) if name is None else name
+        self.write_timeseries([name], case.data[None], TIMESERIES_COLUMNS)
+        if hasattr(case, 'oneline_data'):
+            items = list(case.oneline_data)
+            self.write_oneline([name], [[case.oneline_data[item] for item in items]], items)
+
+    def write(self, kind, values):
+        # Appends a dictionary of equal length columns to the 'timeseries' or 'oneline' file
+
+        if self.format == 'csv':
+            dataframe = pd.DataFrame(values)
+            if kind not in self.sinks:
+                self.sinks[kind] = open(self.file_path(kind), 'w', newline = '')
+                dataframe.to_csv(self.sinks[kind], index = False)
+            else:
+                dataframe.to_csv(self.sinks[kind], index = False, header = False)
+            return
+
+        table = pa.table(values)
+        if kind not in self.sinks:
+            if self.format == 'parquet':
+                self.sinks[kind] = pq.ParquetWriter(self.file_path(kind), table.schema, compression = self.compression)
+            else:
+                self.sinks[kind] = pa.ipc.new_file(self.file_path(kind), table.schema)
+        if self.format == 'parquet':
+            self.sinks[kind].write_table(table, row_group_size = max(table.num_rows, 1))
+        else:
+            self.sinks[kind].write_table(table)
+
+    def close(self):
+        # Finishes every open file. Parquet and Arrow files are unreadable until closed
+
+        for sink in self.sinks.values():
+            sink.close()
+        self.sinks = {}
+
+def open_results(path, kind = 'timeseries', format = None, columns = None):
+    # Opens results written by results_writer. Arrow files are memory-mapped and
+    # Parquet files read through a memory map, so only the columns asked for are loaded
+    # INPUTS:
+    #   path                    Output directory of the writer
+    #   kind                    'timeseries' or 'oneline'
+    #   format                  'parquet', 'arrow' or 'csv', default found from the files present
+    #   columns                 Columns to read, default all
+    # OUTPUTS:
+    #   results                 pyarrow Table, or DataFrame for csv
+
+    if format is None:
+        present = [name for name, extension in EXTENSIONS.items() if os.path.exists(os.path.join(path, kind + extension))]
+        if not present:
+            raise FileNotFoundError('no ' + kind + ' results in ' + path)
+        format = present[0]
+
+    file_path = os.path.join(path, kind + EXTENSIONS[format])
+    if format == 'csv':
+        return pd.read_csv(file_path, usecols = None if columns is None else ['case'] + list(columns))
+    if pa is None:
+        raise ImportError('pyarrow is needed to read ' + format + ' results')
+    if format == 'parquet':
+        return pq.read_table(file_path, columns = None if columns is None else ['case'] + list(columns), memory_map = True)
+    table = pa.ipc.open_file(pa.memory_map(file_path)).read_all()
+    return table if columns is None else table.select(['case'] + list(columns))
\ No newline at end of file